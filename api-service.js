@@ -53,7 +53,8 @@ class ApiService {
 
             if (response.ok) {
                 const data = await response.json();
-                this.setTokens(data.access, refresh);
+                // Refresh tokens rotate: keep the new one, the old one is blacklisted
+                this.setTokens(data.access, data.refresh || refresh);
                 return true;
             }
         } catch (error) {
@@ -94,6 +95,29 @@ class ApiService {
         }
     }
 
+    // ===========================
+    // Cursor Pagination
+    // ===========================
+
+    // Fetch one keyset page of a list endpoint; pass the previous page's `next` link to continue
+    async getCursorPage(endpoint, next = null) {
+        if (next) {
+            const cursor = new URL(next).searchParams.get('cursor');
+            return await this.request(`${endpoint}?cursor=${encodeURIComponent(cursor)}`);
+        }
+        return await this.request(`${endpoint}?pagination=cursor`);
+    }
+
+    // Iterate a whole history page by page, each page costs the same
+    async *iterateHistory(endpoint) {
+        let next = null;
+        do {
+            const page = await this.getCursorPage(endpoint, next);
+            yield* page.results;
+            next = page.next;
+        } while (next);
+    }
+
     // ===========================
     // Authentication API
     // ===========================
@@ -133,6 +157,20 @@ class ApiService {
         return await this.request('/auth/me/');
     }
 
+    // ===========================
+    // Bootstrap API
+    // ===========================
+
+    // Load user, tasks, progress, notifications, unread count, activities,
+    // dashboard stats and chart data in a single request
+    async getBootstrap(sections = null, period = 'week') {
+        const params = new URLSearchParams({ period });
+        if (sections) {
+            params.set('include', sections.join(','));
+        }
+        return await this.request(`/bootstrap/?${params}`);
+    }
+
     // ===========================
     // Tasks API
     // ===========================
@@ -171,6 +209,38 @@ class ApiService {
         return await this.request('/tasks/progress/');
     }
 
+    // Bulk operations return { succeeded, failed, results: [{ index, id, status, ... }] }
+
+    async bulkCreateTasks(tasks) {
+        return await this.request('/tasks/bulk_create/', {
+            method: 'POST',
+            body: JSON.stringify({ tasks })
+        });
+    }
+
+    async bulkUpdateTasks(tasks) {
+        return await this.request('/tasks/bulk_update/', {
+            method: 'PATCH',
+            body: JSON.stringify({ tasks })
+        });
+    }
+
+    // Flip each task, or set them all when `completed` is true/false
+    async bulkToggleTasks(ids, completed = null) {
+        const body = completed === null ? { ids } : { ids, completed };
+        return await this.request('/tasks/bulk_toggle/', {
+            method: 'PATCH',
+            body: JSON.stringify(body)
+        });
+    }
+
+    async bulkDeleteTasks(ids) {
+        return await this.request('/tasks/bulk_delete/', {
+            method: 'POST',
+            body: JSON.stringify({ ids })
+        });
+    }
+
     // ===========================
     // Notifications API
     // ===========================
@@ -209,6 +279,12 @@ class ApiService {
         return await this.request('/activities/');
     }
 
+    // Archived activity history: list of months, or one month ('YYYY-MM')
+    async getActivityArchive(month = null) {
+        const query = month ? `?month=${encodeURIComponent(month)}` : '';
+        return await this.request(`/activities/archive/${query}`);
+    }
+
     // ===========================
     // Statistics API
     // ===========================
@@ -221,6 +297,74 @@ class ApiService {
         return await this.request(`/statistics/chart/?period=${period}`);
     }
 
+    // Download an export as a Blob. resource: 'tasks' | 'activities' | 'statistics',
+    // fmt: 'csv' | 'ndjson', from/to: optional 'YYYY-MM-DD'
+    async exportData(resource, fmt = 'csv', from = null, to = null) {
+        const params = new URLSearchParams({ fmt });
+        if (from) params.set('from', from);
+        if (to) params.set('to', to);
+        const url = `${API_BASE_URL}/${resource}/export/?${params}`;
+
+        let response = await fetch(url, { headers: this.getHeaders() });
+        if (response.status === 401 && await this.refreshToken()) {
+            response = await fetch(url, { headers: this.getHeaders() });
+        }
+        if (!response.ok) {
+            throw new Error('تعذر تصدير البيانات');
+        }
+        return await response.blob();
+    }
+
+    // ===========================
+    // Live Events (Server-Sent Events)
+    // ===========================
+
+    // handlers: { notification, activity, counters, broadcast, resync } called with parsed data,
+    // and fallback() when live updates are unavailable (e.g. a WSGI server) so the caller can poll.
+    // Returns an object with close() to stop listening.
+    async subscribeEvents(handlers = {}) {
+        let source = null;
+        let closed = false;
+        const fallback = () => {
+            if (!closed && handlers.fallback) handlers.fallback();
+        };
+
+        // The stream URL carries a single-use ticket, never the access token
+        const connect = async () => {
+            const { ticket } = await this.request('/events/ticket/', { method: 'POST' });
+            if (closed) return;
+            source = new EventSource(`${API_BASE_URL}/events/stream/?ticket=${encodeURIComponent(ticket)}`);
+            let opened = false;
+            source.addEventListener('open', () => { opened = true; });
+            ['notification', 'activity', 'counters', 'broadcast', 'resync'].forEach(name => {
+                if (handlers[name]) {
+                    source.addEventListener(name, event => handlers[name](JSON.parse(event.data)));
+                }
+            });
+            source.onerror = () => {
+                // EventSource would retry with the spent ticket; reconnect with a fresh one instead
+                source.close();
+                if (closed) return;
+                if (opened) {
+                    // Events sent while disconnected are lost: reload state like after an overflow
+                    setTimeout(() => connect()
+                        .then(() => handlers.resync && handlers.resync({ reason: 'reconnect' }))
+                        .catch(fallback), 5000);
+                } else {
+                    fallback();
+                }
+            };
+        };
+
+        await connect();
+        return {
+            close() {
+                closed = true;
+                if (source) source.close();
+            }
+        };
+    }
+
     // ===========================
     // Seed Data (Development)
     // ===========================
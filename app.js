@@ -42,7 +42,7 @@ const initialTasks = [
     { id: 4, title: 'تحديث واجهة المستخدم', priority: 'high', date: '2026-01-16', completed: false }
 ];
 
-const activities = [
+let activities = [
     { type: 'success', icon: 'check', title: 'تم إكمال المشروع بنجاح', time: 'منذ 5 دقائق' },
     { type: 'info', icon: 'user', title: 'انضمام عضو جديد للفريق', time: 'منذ 15 دقيقة' },
     { type: 'warning', icon: 'alert', title: 'تنبيه: موعد تسليم قريب', time: 'منذ 30 دقيقة' },
@@ -50,7 +50,7 @@ const activities = [
     { type: 'info', icon: 'message', title: 'رسالة جديدة من العميل', time: 'منذ ساعتين' }
 ];
 
-const notifications = [
+let notifications = [
     { title: 'طلب جديد', desc: 'تم استلام طلب شراء جديد من أحمد علي', time: 'منذ 5 دقائق', unread: true, type: 'info' },
     { title: 'تحديث النظام', desc: 'تم تحديث النظام بنجاح إلى الإصدار 2.5', time: 'منذ 30 دقيقة', unread: true, type: 'success' },
     { title: 'تنبيه أمني', desc: 'تم تسجيل دخول من جهاز جديد', time: 'منذ ساعة', unread: true, type: 'warning' },
@@ -61,6 +61,7 @@ const notifications = [
 // State
 let tasks = [...initialTasks];
 let currentTheme = 'dark';
+let mainChart = null;
 
 // ===========================
 // Initialization
@@ -75,8 +76,62 @@ document.addEventListener('DOMContentLoaded', () => {
     renderNotifications();
     animateStats();
     initEventListeners();
+    loadDashboard();
 });
 
+// ===========================
+// Backend Data
+// ===========================
+
+// One bootstrap request replaces the sample data; without a session the samples stay
+async function loadDashboard() {
+    if (!window.api || !api.isAuthenticated()) return;
+
+    let data;
+    try {
+        data = await api.getBootstrap();
+    } catch (error) {
+        console.warn('Dashboard data unavailable, showing sample data:', error);
+        return;
+    }
+
+    tasks = data.tasks.results.map(task => ({
+        id: task.id,
+        title: task.title,
+        priority: task.priority,
+        date: task.due_date,
+        completed: task.completed
+    }));
+    activities = data.activities.results.map(activity => ({
+        type: activity.type,
+        icon: activity.icon,
+        title: activity.title,
+        time: activity.time_ago
+    }));
+    notifications = data.notifications.results.map(notification => ({
+        title: notification.title,
+        desc: notification.description,
+        time: notification.time_ago,
+        unread: !notification.is_read,
+        type: notification.type
+    }));
+
+    renderTasks();
+    renderActivities();
+    renderNotifications();
+    animateStats(data.dashboard);
+    setProgress(data.progress.percentage);
+    document.querySelector('.notification-badge').textContent = data.unread_count;
+
+    if (mainChart) {
+        mainChart.data.labels = data.chart.labels;
+        data.chart.datasets.forEach((dataset, index) => {
+            mainChart.data.datasets[index].data = dataset.data;
+        });
+        mainChart.update();
+    }
+}
+
 // ===========================
 // Theme Management
 // ===========================
@@ -135,12 +190,17 @@ function updateDateTime() {
 // ===========================
 // Animated Statistics
 // ===========================
-function animateStats() {
+// dashboard: the bootstrap `dashboard` section; the sample figures when omitted
+function animateStats(dashboard = null) {
+    const values = dashboard || {
+        total_revenue: 156420, active_users: 12847, completed_projects: 342,
+        conversion_rate: 24.8, total_sales: 85420
+    };
     const stats = [
-        { element: document.getElementById('revenueValue'), value: 156420, prefix: '$', suffix: '' },
-        { element: document.getElementById('usersValue'), value: 12847, prefix: '', suffix: '' },
-        { element: document.getElementById('projectsValue'), value: 342, prefix: '', suffix: '' },
-        { element: document.getElementById('conversionValue'), value: 24.8, prefix: '', suffix: '%' }
+        { element: document.getElementById('revenueValue'), value: Number(values.total_revenue), prefix: '$', suffix: '' },
+        { element: document.getElementById('usersValue'), value: values.active_users, prefix: '', suffix: '' },
+        { element: document.getElementById('projectsValue'), value: values.completed_projects, prefix: '', suffix: '' },
+        { element: document.getElementById('conversionValue'), value: Number(values.conversion_rate), prefix: '', suffix: '%' }
     ];
     
     stats.forEach(stat => {
@@ -149,15 +209,12 @@ function animateStats() {
     
     // Animate total sales
     const totalSales = document.getElementById('totalSales');
-    animateValue(totalSales, 0, 85420, 2000, '$', '');
+    animateValue(totalSales, 0, values.total_sales, 2000, '$', '');
     
     // Animate progress
-    setTimeout(() => {
-        const completedTasks = tasks.filter(t => t.completed).length;
-        const progress = Math.round((completedTasks / tasks.length) * 100);
-        elements.progressFill.style.width = `${progress}%`;
-        elements.progressPercent.textContent = `${progress}%`;
-    }, 500);
+    if (!dashboard) {
+        setTimeout(updateProgress, 500);
+    }
 }
 
 function animateValue(element, start, end, duration, prefix = '', suffix = '') {
@@ -245,7 +302,7 @@ function initMainChart() {
     gradient2.addColorStop(0, 'rgba(139, 92, 246, 0.3)');
     gradient2.addColorStop(1, 'rgba(139, 92, 246, 0)');
     
-    new Chart(ctx, {
+    mainChart = new Chart(ctx, {
         type: 'line',
         data: {
             labels: ['السبت', 'الأحد', 'الاثنين', 'الثلاثاء', 'الأربعاء', 'الخميس', 'الجمعة'],
@@ -447,12 +504,16 @@ function addTask(title, priority, date) {
 
 function updateProgress() {
     const completedTasks = tasks.filter(t => t.completed).length;
-    const progress = tasks.length > 0 ? Math.round((completedTasks / tasks.length) * 100) : 0;
+    setProgress(tasks.length > 0 ? Math.round((completedTasks / tasks.length) * 100) : 0);
+}
+
+function setProgress(progress) {
     elements.progressFill.style.width = `${progress}%`;
     elements.progressPercent.textContent = `${progress}%`;
 }
 
 function formatDate(dateStr) {
+    if (!dateStr) return '';
     const date = new Date(dateStr);
     return date.toLocaleDateString('ar-SA', { month: 'short', day: 'numeric' });
 }
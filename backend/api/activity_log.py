@@ -0,0 +1,181 @@
+# Write-behind buffer for Activity logging
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+
+from .models import Activity
+from .serializers import ActivitySerializer
+from . import events
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'MODE': 'buffered',
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 1.0,
+    'MAX_QUEUE': 10000,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'ACTIVITY_LOG', {})}
+
+
+class ActivityBuffer:
+    """
+    Queue Activity rows in process and write them with bulk_create.
+
+    A daemon thread flushes when BATCH_SIZE rows are queued or every
+    FLUSH_INTERVAL seconds, whichever comes first. If the queue reaches
+    MAX_QUEUE the caller flushes inline instead of growing without bound.
+    Rows still queued when the process is killed (SIGKILL, OOM) are lost;
+    a normal exit flushes them. Each row is published to the event stream
+    once it has been written.
+    """
+
+    def __init__(self, batch_size, flush_interval, max_queue):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def add(self, activities):
+        with self._lock:
+            self._pending.extend(activities)
+            size = len(self._pending)
+        self._ensure_thread()
+        if size >= self.max_queue:
+            self.flush()
+        elif size >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write everything queued so far; returns the number of rows written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                Activity.objects.bulk_create(batch, batch_size=self.batch_size)
+                written = batch
+            except (IntegrityError, ValueError):
+                # A bad row (e.g. its user was deleted meanwhile) must not hold back the rest
+                written = self._write_one_by_one(batch)
+            except Exception:
+                with self._lock:
+                    room = max(self.max_queue - len(self._pending), 0)
+                    self._pending[:0] = batch[:room]
+                dropped = len(batch) - room if len(batch) > room else 0
+                logger.exception('Failed to flush %d activities, requeued %d, dropped %d',
+                                 len(batch), len(batch) - dropped, dropped)
+                return 0
+        publish(written)
+        return len(written)
+
+    def _write_one_by_one(self, batch):
+        written = []
+        for activity in batch:
+            try:
+                Activity.objects.bulk_create([activity])
+                written.append(activity)
+            except (IntegrityError, ValueError):
+                pass
+        if len(written) < len(batch):
+            logger.warning('Dropped %d of %d activities that could not be stored', len(batch) - len(written),
+                           len(batch))
+        return written
+
+    def shutdown(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=self.flush_interval * 5)
+        self.flush()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='activity-log-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        try:
+            while not self._stopped.is_set():
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                self.flush()
+        finally:
+            connections.close_all()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                config = get_config()
+                _buffer = ActivityBuffer(config['BATCH_SIZE'], config['FLUSH_INTERVAL'], config['MAX_QUEUE'])
+    return _buffer
+
+
+def build_activity(user, type, icon, title):
+    # created_at is taken now, not at flush time, so the feed keeps event order
+    return Activity(user=user, type=type, icon=icon, title=title, created_at=timezone.now())
+
+
+def publish(activities):
+    """Push stored activities to their users' open streams"""
+    for activity in activities:
+        events.publish(activity.user_id, 'activity', ActivitySerializer(activity).data)
+
+
+def log_activities(activities):
+    """
+    Record unsaved Activity instances and push them to the event stream.
+
+    'sync' writes them right away, in the caller's transaction; 'buffered'
+    queues them once that transaction commits and publishes them after the
+    flush that writes them.
+    """
+    activities = list(activities)
+    if not activities:
+        return
+    if get_config()['MODE'] == 'sync':
+        Activity.objects.bulk_create(activities)
+        publish(activities)
+    else:
+        transaction.on_commit(lambda: get_buffer().add(activities))
+
+
+def log_activity(user, type, icon, title):
+    """Record a single activity for `user`"""
+    log_activities([build_activity(user, type, icon, title)])
+
+
+def flush():
+    """Write out any buffered activities immediately"""
+    if _buffer is not None:
+        return _buffer.flush()
+    return 0
+
+
+@atexit.register
+def _flush_on_exit():
+    if _buffer is not None:
+        _buffer.shutdown()
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from . import db  # noqa: F401  (SQLite pragmas on connect)
+        from . import metrics, slow_queries  # noqa: F401  (wrap database connections)
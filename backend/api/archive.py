@@ -0,0 +1,159 @@
+# Activity retention: move old rows into gzip NDJSON files, one per month
+import gzip
+import heapq
+import json
+import os
+import re
+import time
+import zlib
+from datetime import timedelta, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Activity
+
+ARCHIVE = {'DIR': Path(settings.BASE_DIR) / 'archive' / 'activities', 'RETENTION_DAYS': 90,
+           'BATCH_SIZE': 2000, 'MAX_ROWS': 1000, **getattr(settings, 'ACTIVITY_ARCHIVE', {})}
+
+FIELDS = ('id', 'user_id', 'type', 'icon', 'title', 'created_at')
+MONTH_RE = re.compile(r'^\d{4}-\d{2}$')
+
+
+def archive_dir():
+    return Path(ARCHIVE['DIR'])
+
+
+def archive_path(month):
+    """File holding the activities of one 'YYYY-MM' month (UTC)"""
+    return archive_dir() / f'{month}.ndjson.gz'
+
+
+def index_path(month):
+    """'user_id offset length' per gzip member of the month file, so a reader only inflates its own rows"""
+    return archive_dir() / f'{month}.idx'
+
+
+def archived_months():
+    """Months with an archive file, newest first"""
+    if not archive_dir().is_dir():
+        return []
+    months = (path.name[:7] for path in archive_dir().glob('*.ndjson.gz'))
+    return sorted((month for month in months if MONTH_RE.match(month)), reverse=True)
+
+
+def _append(path, data):
+    with open(path, 'ab') as out:
+        offset = out.tell()
+        out.write(data)
+        out.flush()
+        os.fsync(out.fileno())
+    return offset
+
+
+def _write(month, rows):
+    """
+    Append each user's rows as a separate gzip member, then index the members.
+
+    The data is fsynced before the index, so a crash leaves at worst an
+    unindexed member, which readers never see.
+    """
+    archive_dir().mkdir(parents=True, exist_ok=True)
+    by_user = {}
+    for row in rows:
+        line = json.dumps(row, ensure_ascii=False, separators=(',', ':')).encode() + b'\n'
+        by_user.setdefault(row['user_id'], []).append(line)
+
+    members = [(user_id, gzip.compress(b''.join(lines))) for user_id, lines in by_user.items()]
+    offset = _append(archive_path(month), b''.join(member for _, member in members))
+    index = []
+    for user_id, member in members:
+        index.append(f'{user_id} {offset} {len(member)}\n')
+        offset += len(member)
+    _append(index_path(month), ''.join(index).encode())
+
+
+def archive_activities(days=None, batch_size=None, sleep=0):
+    """
+    Move activities older than `days` into the monthly archive files.
+
+    Each batch is written and fsynced before its rows are deleted by primary
+    key, so the table is never locked for long and a crash can at worst
+    leave a batch both archived and in the table; readers drop duplicates.
+    Returns the number of rows moved.
+    """
+    days = ARCHIVE['RETENTION_DAYS'] if days is None else days
+    batch_size = batch_size or ARCHIVE['BATCH_SIZE']
+    cutoff = timezone.now() - timedelta(days=days)
+    old = Activity.objects.filter(created_at__lt=cutoff).order_by('id')
+
+    moved = 0
+    while True:
+        rows = list(old.values(*FIELDS)[:batch_size])
+        if not rows:
+            return moved
+
+        by_month = {}
+        for row in rows:
+            created_at = row['created_at'].astimezone(dt_timezone.utc)
+            row['created_at'] = created_at.isoformat()
+            by_month.setdefault(created_at.strftime('%Y-%m'), []).append(row)
+        for month, month_rows in by_month.items():
+            _write(month, month_rows)
+
+        Activity.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        moved += len(rows)
+        if sleep:
+            time.sleep(sleep)
+
+
+def _user_members(user_id, month):
+    """(offset, length) of the user's members, or None when the month has no index (older archives)"""
+    try:
+        with open(index_path(month), encoding='ascii') as index:
+            members = []
+            for line in index:
+                parts = line.split()
+                # A line cut short by a crash is skipped; its rows are still in the table
+                if len(parts) == 3 and parts[0] == str(user_id):
+                    members.append((int(parts[1]), int(parts[2])))
+            return members
+    except FileNotFoundError:
+        return None
+
+
+def _user_lines(user_id, month):
+    members = _user_members(user_id, month)
+    if members is None:
+        # Unindexed file: every user's rows have to be inflated and filtered
+        with gzip.open(archive_path(month), 'rb') as lines:
+            yield from lines
+        return
+    with open(archive_path(month), 'rb') as archived:
+        for offset, length in members:
+            archived.seek(offset)
+            yield from zlib.decompress(archived.read(length), wbits=31).splitlines()
+
+
+def read_archive(user_id, month, limit=None):
+    """
+    A user's archived activities for one month, newest first: (rows, total).
+
+    Only the user's own gzip members are read. `limit` caps the rows
+    returned (default ARCHIVE['MAX_ROWS']); `total` counts them all.
+    """
+    if not MONTH_RE.match(month) or not archive_path(month).exists():
+        return [], 0
+    limit = min(limit or ARCHIVE['MAX_ROWS'], ARCHIVE['MAX_ROWS'])
+    rows = {}
+    for line in _user_lines(user_id, month):
+        row = json.loads(line)
+        if row['user_id'] == user_id:
+            rows[row['id']] = row
+    # ISO timestamps in UTC sort as text; only the rows returned are parsed
+    newest = heapq.nlargest(limit, rows.values(), key=lambda row: (row['created_at'], row['id']))
+    for row in newest:
+        row['created_at'] = parse_datetime(row['created_at'])
+    return newest, len(rows)
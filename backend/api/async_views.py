@@ -0,0 +1,143 @@
+# Native async versions of the read-heavy endpoints (served under ASGI)
+import json
+from collections import OrderedDict
+from functools import wraps
+
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .authentication import aauthenticate
+from .dashboard import aget_dashboard
+from .login import alogin
+from .models import Task, Notification, Activity
+from .pagination import TimelinePagination, ActivityPagination, akeyset_page
+from .renderers import dumps
+from .serializers import TaskSerializer, NotificationSerializer, ActivitySerializer
+from . import counters
+
+
+def json_response(data, status=200):
+    # Same bytes as the DRF views render
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
+
+
+def async_api_view(view):
+    """GET-only async view authenticated with the JWT Bearer header"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return json_response({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+        user_id = await aauthenticate(request)
+        if user_id is None:
+            return json_response({'detail': 'بيانات الاعتماد غير صالحة'}, status=401)
+        return await view(request, user_id, *args, **kwargs)
+    return wrapper
+
+
+def _flag(value, default):
+    if value is None:
+        return default
+    return value.lower() not in ('0', 'false', 'no')
+
+
+async def paginate(request, queryset, serializer_class, pagination_class):
+    """Same parameters and response shape as TimelinePagination"""
+    params = request.GET
+    paginator = pagination_class
+    try:
+        page_size = min(max(int(params.get(paginator.page_size_query_param, paginator.page_size)), 1),
+                        paginator.max_page_size)
+    except ValueError:
+        page_size = paginator.page_size
+    url = request.build_absolute_uri()
+    body = OrderedDict()
+
+    if paginator.cursor_query_param in params or params.get(paginator.mode_query_param) == 'cursor':
+        if _flag(params.get(paginator.count_query_param), False):
+            body['count'] = await queryset.acount()
+        try:
+            rows, cursor = await akeyset_page(queryset, params.get(paginator.cursor_query_param), page_size)
+        except (TypeError, ValueError):
+            return json_response({'detail': paginator.invalid_cursor_message}, status=404)
+        body['next'] = None
+        if cursor:
+            url = remove_query_param(url, paginator.mode_query_param)
+            body['next'] = replace_query_param(url, paginator.cursor_query_param, cursor)
+        body['results'] = serializer_class(rows, many=True).data
+        return json_response(body)
+
+    try:
+        page = max(int(params.get(paginator.page_query_param, 1)), 1)
+    except ValueError:
+        return json_response({'detail': str(paginator.invalid_page_message)}, status=404)
+    offset = (page - 1) * page_size
+    with_count = _flag(params.get(paginator.count_query_param), True)
+    if with_count:
+        total = await queryset.acount()
+        if page > 1 and offset >= total:
+            return json_response({'detail': str(paginator.invalid_page_message)}, status=404)
+        rows = [row async for row in queryset[offset:offset + page_size]]
+        has_next = offset + page_size < total
+        body['count'] = total
+    else:
+        rows = [row async for row in queryset[offset:offset + page_size + 1]]
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+
+    body['next'] = replace_query_param(url, paginator.page_query_param, page + 1) if has_next else None
+    if page <= 1:
+        body['previous'] = None
+    elif page == 2:
+        body['previous'] = remove_query_param(url, paginator.page_query_param)
+    else:
+        body['previous'] = replace_query_param(url, paginator.page_query_param, page - 1)
+    body['results'] = serializer_class(rows, many=True).data
+    return json_response(body)
+
+
+@async_api_view
+async def task_list(request, user_id):
+    return await paginate(request, Task.objects.filter(user_id=user_id), TaskSerializer, TimelinePagination)
+
+
+@async_api_view
+async def task_progress(request, user_id):
+    return json_response(counters.progress(await counters.aget_counters(user_id)))
+
+
+@async_api_view
+async def notification_list(request, user_id):
+    return await paginate(request, Notification.objects.filter(user_id=user_id),
+                          NotificationSerializer, TimelinePagination)
+
+
+@async_api_view
+async def notification_unread_count(request, user_id):
+    row = await counters.aget_counters(user_id)
+    return json_response({'unread_count': row.notifications_unread})
+
+
+@async_api_view
+async def activity_list(request, user_id):
+    return await paginate(request, Activity.objects.filter(user_id=user_id), ActivitySerializer, ActivityPagination)
+
+
+@async_api_view
+async def dashboard(request, user_id):
+    return json_response(await aget_dashboard())
+
+
+@csrf_exempt
+async def login(request):
+    """Same request and response as /api/auth/login/; hashing runs on the login pool"""
+    if request.method != 'POST':
+        return json_response({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return json_response({'detail': 'JSON parse error'}, status=400)
+    if not isinstance(data, dict):
+        return json_response({'detail': 'JSON parse error'}, status=400)
+    status, body = await alogin(data)
+    return json_response(body, status=status)
@@ -0,0 +1,167 @@
+# Authentication helpers shared by the DRF and native async views
+import copy
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Lower
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .cache import build_backend
+from .models import User
+from .replicas import primary_reads
+from .revocation import RefreshToken
+
+USER_CACHE = {'MODE': 'cached', 'BACKEND': 'django', 'ALIAS': 'default', 'MAX_ENTRIES': 10000, 'TIMEOUT': 60,
+              **getattr(settings, 'AUTH_USER_CACHE', {})}
+
+# Profile fields copied into tokens in 'stateless' mode to build the user from claims
+USER_CLAIMS = ('username', 'email', 'first_name', 'last_name', 'avatar_url', 'role', 'is_staff')
+
+user_cache = build_backend(USER_CACHE)
+
+
+def user_cache_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def invalidate_user(user_id):
+    """Forget the cached user so the next request reloads it"""
+    user_cache.delete(user_cache_key(user_id))
+
+
+def deactivate_users(queryset):
+    """
+    Deactivate the users in `queryset` with one UPDATE. Unlike a bare
+    .update(), this also drops them from the auth cache, now and after commit.
+    """
+    user_ids = list(queryset.filter(is_active=True).values_list('pk', flat=True))
+    User.objects.filter(pk__in=user_ids).update(is_active=False)
+
+    def invalidate():
+        for user_id in user_ids:
+            invalidate_user(user_id)
+    invalidate()
+    transaction.on_commit(invalidate)
+    return len(user_ids)
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def users_by_email(email):
+    """Case-insensitive email lookup served by the users_email_lower_idx index"""
+    return User.objects.alias(email_lower=Lower('email')).filter(
+        email_lower=normalize_email(email)).order_by('pk')
+
+
+def tokens_for_user(user):
+    """Refresh token (and its access token); carries the profile claims in 'stateless' mode only"""
+    refresh = RefreshToken.for_user(user)
+    if USER_CACHE['MODE'] == 'stateless':
+        for claim in USER_CLAIMS:
+            refresh[claim] = getattr(user, claim)
+    return refresh
+
+
+def user_from_claims(token):
+    """Unsaved User built from the token claims; no database access"""
+    user_id = token.get(jwt_settings.USER_ID_CLAIM)
+    if user_id is None or 'username' not in token:
+        return None
+    user = User(**{claim: token[claim] for claim in USER_CLAIMS if claim in token})
+    setattr(user, jwt_settings.USER_ID_FIELD, User._meta.get_field(jwt_settings.USER_ID_FIELD).to_python(user_id))
+    user._state.adding = False
+    user._state.db = 'default'
+    return user
+
+
+def _remaining_lifetime(token):
+    exp = token.get('exp')
+    if exp is None:
+        return int(jwt_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+    return max(int(exp - time.time()), 1)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without a users query on every request.
+
+    AUTH_USER_CACHE['MODE']:
+    - 'cached': the user row is cached for up to TIMEOUT seconds (never past
+      the token's expiry) and dropped when the user is saved, deleted or
+      deactivated through deactivate_users().
+    - 'stateless': the user is built from the token claims (see
+      tokens_for_user); deactivation only takes effect when the token expires.
+    - 'db': plain JWTAuthentication behaviour.
+    """
+
+    def get_user(self, validated_token):
+        mode = USER_CACHE['MODE']
+        if mode == 'stateless':
+            user = user_from_claims(validated_token)
+            if user is None:
+                raise InvalidToken('Token contained no recognizable user identification')
+            return user
+        # Users come from the primary: a lagging replica would reject new
+        # accounts and could put a stale row back into the cache
+        if mode != 'cached':
+            with primary_reads():
+                return super().get_user(validated_token)
+
+        key = user_cache_key(validated_token.get(jwt_settings.USER_ID_CLAIM))
+        user = user_cache.get(key)
+        if user is not None:
+            # Views may modify request.user; never hand out the cached instance itself
+            return copy.copy(user)
+        with primary_reads():
+            user = super().get_user(validated_token)
+        user_cache.set(key, user, min(_remaining_lifetime(validated_token), USER_CACHE['TIMEOUT']))
+        return copy.copy(user)
+
+
+def token_from_request(request):
+    """Raw access token from the Bearer header"""
+    parts = request.headers.get('Authorization', '').split()
+    if len(parts) == 2 and parts[0] in jwt_settings.AUTH_HEADER_TYPES:
+        return parts[1]
+    return None
+
+
+async def aauthenticate(request):
+    """Return the active user id for the request's access token, or None"""
+    raw = token_from_request(request)
+    if not raw:
+        return None
+    try:
+        token = AccessToken(raw)
+    except TokenError:
+        return None
+    user_id = token.get(jwt_settings.USER_ID_CLAIM)
+    if user_id is None:
+        return None
+
+    mode = USER_CACHE['MODE']
+    if mode == 'stateless':
+        user = user_from_claims(token)
+        return user.pk if user is not None else None
+    active = User.objects.filter(**{jwt_settings.USER_ID_FIELD: user_id}, is_active=True)
+    if mode == 'cached':
+        # Shared file or Redis cache: read and fill it without blocking the event loop
+        key = user_cache_key(user_id)
+        user = await user_cache.aget(key)
+        if user is None:
+            with primary_reads():
+                user = await active.afirst()
+            if user is None:
+                return None
+            await user_cache.aset(key, user, min(_remaining_lifetime(token), USER_CACHE['TIMEOUT']))
+        return user.pk
+
+    # The claim is a string; return the stored primary key
+    with primary_reads():
+        return await active.values_list('pk', flat=True).afirst()
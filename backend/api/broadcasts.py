@@ -0,0 +1,122 @@
+# Fan a broadcast out to every active user as ordinary notifications
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import User, Notification, UserCounters, Broadcast
+from . import events
+
+logger = logging.getLogger(__name__)
+
+BROADCASTS = {'MODE': 'sync', 'CHUNK_SIZE': 1000, **getattr(settings, 'BROADCASTS', {})}
+
+
+def recipients():
+    return User.objects.filter(is_active=True).order_by('id')
+
+
+def create_broadcast(title, description='', type='info', created_by=None):
+    return Broadcast.objects.create(
+        title=title, description=description, type=type, created_by=created_by,
+        total_recipients=recipients().count())
+
+
+def send_chunk(broadcast_id, chunk_size):
+    """
+    Notify the next `chunk_size` recipients in one transaction.
+
+    The notifications, the unread counters and the broadcast's position are
+    committed together, so an interrupted run resumes exactly where it
+    stopped. Returns the locked broadcast row, or None once nothing is left.
+    """
+    with transaction.atomic():
+        broadcast = Broadcast.objects.select_for_update().get(pk=broadcast_id)
+        if broadcast.status == 'completed':
+            return None
+        user_ids = list(recipients().filter(id__gt=broadcast.last_user_id)
+                        .values_list('id', flat=True)[:chunk_size])
+        if not user_ids:
+            return None
+
+        Notification.objects.bulk_create([
+            Notification(user_id=user_id, title=broadcast.title,
+                         description=broadcast.description, type=broadcast.type)
+            for user_id in user_ids
+        ])
+        # Users without a counters row get theirs computed from the table on first read
+        UserCounters.objects.filter(user_id__in=user_ids).update(
+            notifications_unread=F('notifications_unread') + 1)
+
+        broadcast.last_user_id = user_ids[-1]
+        broadcast.sent_count += len(user_ids)
+        fields = ['last_user_id', 'sent_count']
+        if broadcast.status == 'pending':
+            broadcast.status = 'running'
+            broadcast.started_at = timezone.now()
+            fields += ['status', 'started_at']
+        broadcast.save(update_fields=fields)
+        return broadcast
+
+
+def send(broadcast, chunk_size=None, progress=None):
+    """
+    Run (or resume) a broadcast to the end.
+
+    `progress(broadcast)` is called after every committed chunk.
+    """
+    chunk_size = chunk_size or BROADCASTS['CHUNK_SIZE']
+    while True:
+        sent = send_chunk(broadcast.pk, chunk_size)
+        if sent is None:
+            break
+        broadcast = sent
+        if progress:
+            progress(broadcast)
+
+    with transaction.atomic():
+        broadcast = Broadcast.objects.select_for_update().get(pk=broadcast.pk)
+        if broadcast.status != 'completed':
+            broadcast.status = 'completed'
+            broadcast.finished_at = timezone.now()
+            broadcast.save(update_fields=['status', 'finished_at'])
+            events.publish_all('broadcast', {
+                'id': broadcast.id,
+                'title': broadcast.title,
+                'description': broadcast.description,
+                'type': broadcast.type,
+            })
+    return broadcast
+
+
+def unfinished():
+    return Broadcast.objects.exclude(status='completed').order_by('created_at')
+
+
+def _send_in_thread(broadcast_id):
+    try:
+        send(Broadcast.objects.get(pk=broadcast_id))
+    except Exception:
+        # Left as pending/running; `manage.py broadcast --resume` picks it up
+        logger.exception('Broadcast %s stopped', broadcast_id)
+    finally:
+        close_old_connections()
+
+
+def dispatch(broadcast):
+    """
+    Start sending according to BROADCASTS['MODE'] once the broadcast is committed.
+
+    'thread' is for development only: the thread dies with a recycled worker
+    and nothing retries it until someone runs `manage.py broadcast --resume`.
+    """
+    mode = BROADCASTS['MODE']
+    if mode == 'sync':
+        transaction.on_commit(lambda: send(broadcast))
+    elif mode == 'thread':
+        transaction.on_commit(lambda: threading.Thread(
+            target=_send_in_thread, args=(broadcast.pk,), name=f'broadcast-{broadcast.pk}', daemon=True).start())
+    # 'command': left pending for `manage.py broadcast --resume`
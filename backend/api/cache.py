@@ -0,0 +1,263 @@
+# Versioned read-through cache with stampede protection
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .replicas import primary_reads
+
+_MISSING = object()
+
+
+def _fresh_version():
+    return int(time.time() * 1000)
+
+
+class LRUBackend:
+    """Bounded in-process LRU with per-entry expiry"""
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        # Counters (version keys) live outside the LRU so they are never evicted
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._counters:
+                return self._counters[key]
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            value, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    async def aget(self, key, default=None):
+        # In memory: nothing to wait for
+        return self.get(key, default)
+
+    async def aset(self, key, value, timeout=None):
+        self.set(key, value, timeout)
+
+    def set(self, key, value, timeout=None):
+        expires = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def add(self, key, value, timeout=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING and (item[1] is None or item[1] >= time.monotonic()):
+                return False
+        self.set(key, value, timeout)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 1) + 1
+            return self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+
+
+class DjangoBackend:
+    """Adapter over a Django cache alias, shared between worker processes"""
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        # Looked up on use, so a changed CACHES setting (tests) reaches module-level caches
+        return caches[self.alias]
+
+    def get(self, key, default=None):
+        return self.cache.get(key, default)
+
+    def set(self, key, value, timeout=None):
+        self.cache.set(key, value, timeout)
+
+    async def aget(self, key, default=None):
+        return await self.cache.aget(key, default)
+
+    async def aset(self, key, value, timeout=None):
+        await self.cache.aset(key, value, timeout)
+
+    def add(self, key, value, timeout=None):
+        return self.cache.add(key, value, timeout)
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+    def incr(self, key):
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Missing (never set, or evicted): restart above any version used before
+            if self.cache.add(key, _fresh_version(), None):
+                return self.cache.get(key)
+            return self.cache.incr(key)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class VersionedCache:
+    """
+    Cache whose entries are keyed by a namespace version.
+
+    `bump()` makes every existing entry unreachable at once. On a miss only
+    one caller rebuilds the value; concurrent callers wait for it instead of
+    all hitting the database.
+    """
+
+    def __init__(self, namespace, backend, timeout=300, lock_timeout=10):
+        self.namespace = namespace
+        self.backend = backend
+        self.timeout = timeout
+        self.lock_timeout = lock_timeout
+        self._local_locks = {}
+        self._locks_guard = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def version_key(self):
+        return f'{self.namespace}:version'
+
+    def version(self):
+        version = self.backend.get(self.version_key)
+        if version is None:
+            # Evicted from a shared cache: a time-based start never reuses an old version
+            self.backend.add(self.version_key, _fresh_version(), None)
+            version = self.backend.get(self.version_key) or 1
+        return version
+
+    def bump(self):
+        """Invalidate everything cached so far"""
+        self.backend.incr(self.version_key)
+
+    def peek(self, key):
+        """Cached value or None, without building; never touches the database"""
+        value = self.backend.get(f'{self.namespace}:v{self.version()}:{key}', _MISSING)
+        if value is _MISSING:
+            return None
+        self._count('hits')
+        return value
+
+    async def apeek(self, key):
+        """peek() for async code: the cache reads do not block the event loop"""
+        version = await self.backend.aget(self.version_key)
+        if version is None:
+            # No version yet: peek() would have to create one, leave that to the sync path
+            return None
+        value = await self.backend.aget(f'{self.namespace}:v{version}:{key}', _MISSING)
+        if value is _MISSING:
+            return None
+        self._count('hits')
+        return value
+
+    def get_or_build(self, key, builder):
+        full_key = f'{self.namespace}:v{self.version()}:{key}'
+        value = self.backend.get(full_key, _MISSING)
+        if value is not _MISSING:
+            self._count('hits')
+            return value
+
+        self._count('misses')
+        with self._local_lock(full_key):
+            # Another thread of this process may have rebuilt it meanwhile
+            value = self.backend.get(full_key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+            lock_key = f'{full_key}:lock'
+            token = uuid.uuid4().hex
+            owned = self.backend.add(lock_key, token, self.lock_timeout)
+            if not owned:
+                value = self._wait_for(full_key)
+                if value is not _MISSING:
+                    self._count('waits')
+                    return value
+                # The other builder is slow or gone; build without taking its lock
+
+            try:
+                # From the primary: a lagging replica would be cached under the new version
+                with primary_reads():
+                    value = builder()
+                self._count('builds')
+                self.backend.set(full_key, value, self.timeout)
+            finally:
+                # Only release our own lock; it may have expired and been taken by another worker
+                if owned and self.backend.get(lock_key) == token:
+                    self.backend.delete(lock_key)
+            return value
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['version'] = self.version()
+        return stats
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = {'hits': 0, 'misses': 0, 'builds': 0, 'waits': 0}
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _local_lock(self, key):
+        with self._locks_guard:
+            if len(self._local_locks) > 1024:
+                self._local_locks = {k: v for k, v in self._local_locks.items() if v.locked()}
+            return self._local_locks.setdefault(key, threading.Lock())
+
+    def _wait_for(self, key):
+        """Poll for a value another worker is building"""
+        deadline = time.monotonic() + self.lock_timeout
+        delay = 0.01
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            value = self.backend.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            delay = min(delay * 2, 0.2)
+        return _MISSING
+
+
+def build_backend(config):
+    """LRUBackend or DjangoBackend from a BACKEND/ALIAS/MAX_ENTRIES config dict"""
+    if config.get('BACKEND') == 'django':
+        return DjangoBackend(config.get('ALIAS', 'default'))
+    return LRUBackend(config.get('MAX_ENTRIES', 128))
+
+
+def build_cache(namespace, config):
+    config = {'BACKEND': 'django', 'ALIAS': 'default', 'MAX_ENTRIES': 128,
+              'TIMEOUT': 300, 'LOCK_TIMEOUT': 10, **config}
+    return VersionedCache(namespace, build_backend(config),
+                          timeout=config['TIMEOUT'], lock_timeout=config['LOCK_TIMEOUT'])
+
+
+dashboard_cache = build_cache('dashboard', getattr(settings, 'DASHBOARD_CACHE', {}))
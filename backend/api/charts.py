@@ -0,0 +1,155 @@
+# Time-bucketed chart data aggregated by the database
+from datetime import date, datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import Statistics, StatisticsRollup
+
+WEEKDAYS = ['الاثنين', 'الثلاثاء', 'الأربعاء', 'الخميس', 'الجمعة', 'السبت', 'الأحد']
+MONTHS = ['يناير', 'فبراير', 'مارس', 'أبريل', 'مايو', 'يونيو',
+          'يوليو', 'أغسطس', 'سبتمبر', 'أكتوبر', 'نوفمبر', 'ديسمبر']
+
+TRUNCATE = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def period_start(period, day):
+    """First day of the week (Monday) or month containing `day`"""
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def period_end(period, day):
+    """Last day of the week or month containing `day`"""
+    if period == 'week':
+        return period_start(period, day) + timedelta(days=6)
+    if period == 'month':
+        next_month = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return next_month - timedelta(days=1)
+    return day
+
+
+def _as_date(value):
+    # TruncX returns a datetime on some backends even for a DateField
+    return value.date() if isinstance(value, datetime) else value
+
+
+def bucket_totals(unit, start, end):
+    """One GROUP BY over Statistics: {bucket_start: (revenue, expenses, days)}"""
+    rows = (Statistics.objects.filter(record_date__range=(start, end))
+            .annotate(bucket=TRUNCATE[unit]('record_date'))
+            .order_by()
+            .values('bucket')
+            .annotate(revenue=Sum('revenue'), expenses=Sum('expenses'), days=Count('id')))
+    return {_as_date(row['bucket']): (row['revenue'], row['expenses'], row['days']) for row in rows}
+
+
+def refresh_rollups(start=None, end=None):
+    """
+    Rebuild the weekly and monthly rollups overlapping [start, end].
+
+    Without a range every rollup is rebuilt from scratch.
+    """
+    if start is None or end is None:
+        bounds = Statistics.objects.order_by().aggregate(first=Min('record_date'), last=Max('record_date'))
+        start, end = bounds['first'], bounds['last']
+        if start is None:
+            StatisticsRollup.objects.all().delete()
+            return 0
+
+    written = 0
+    with transaction.atomic():
+        for period in ('week', 'month'):
+            first, last = period_start(period, start), period_end(period, end)
+            totals = bucket_totals(period, first, last)
+            StatisticsRollup.objects.filter(period=period, period_start__range=(first, last)) \
+                .exclude(period_start__in=list(totals)).delete()
+            rollups = [
+                StatisticsRollup(period=period, period_start=bucket, revenue=revenue, expenses=expenses, days=days)
+                for bucket, (revenue, expenses, days) in totals.items()
+            ]
+            StatisticsRollup.objects.bulk_create(
+                rollups, batch_size=500, update_conflicts=True,
+                unique_fields=['period', 'period_start'], update_fields=['revenue', 'expenses', 'days'])
+            written += len(rollups)
+    return written
+
+
+def _dataset(values):
+    # Whole amounts, as the chart has always sent them
+    return [int(round(value)) for value in values]
+
+
+def _week_of_month(day):
+    """Index of the month's week containing `day`: days 1-7, 8-14, 15-21, then 22 to the end"""
+    return min((day.day - 1) // 7, 3)
+
+
+def chart_data(period, today=None):
+    """
+    Labels and revenue/expense series for the `week` (last 7 days), `month`
+    (the weeks of the current calendar month) or `year` (its calendar months) view.
+    """
+    today = today or timezone.localdate()
+
+    if period == 'week':
+        days = [today - timedelta(days=offset) for offset in range(6, -1, -1)]
+        totals = bucket_totals('day', days[0], today)
+        labels = [WEEKDAYS[day.weekday()] for day in days]
+        buckets = days
+    elif period == 'month':
+        # At most 31 daily rows; Monday-based week rollups would spill into the neighbouring months
+        daily = bucket_totals('day', period_start('month', today), period_end('month', today))
+        buckets = list(range(4))
+        labels = [f'الأسبوع {i + 1}' for i in buckets]
+        totals = {}
+        for day, (revenue, expenses, days) in daily.items():
+            week = totals.setdefault(_week_of_month(day), [0, 0, 0])
+            week[0] += revenue or 0
+            week[1] += expenses or 0
+            week[2] += days
+    else:
+        buckets = [date(today.year, month, 1) for month in range(1, 13)]
+        labels = list(MONTHS)
+        rows = StatisticsRollup.objects.filter(
+            period='month', period_start__range=(buckets[0], buckets[-1]),
+        ).values_list('period_start', 'revenue', 'expenses', 'days')
+        totals = {row[0]: row[1:] for row in rows}
+
+    empty = (0, 0, 0)
+    return {
+        'labels': labels,
+        'revenue': _dataset(totals.get(bucket, empty)[0] for bucket in buckets),
+        'expenses': _dataset(totals.get(bucket, empty)[1] for bucket in buckets),
+    }
+
+
+def chart_payload(period):
+    """Chart response body; unknown periods fall back to the year view"""
+    if period not in ('week', 'month', 'year'):
+        period = 'year'
+    data = chart_data(period)
+    return {
+        'labels': data['labels'],
+        'datasets': [
+            {
+                'label': 'الإيرادات',
+                'data': data['revenue'],
+                'color': '#00d9ff'
+            },
+            {
+                'label': 'المصروفات',
+                'data': data['expenses'],
+                'color': '#8b5cf6'
+            }
+        ]
+    }
@@ -0,0 +1,195 @@
+# Negotiated response compression: brotli or gzip above a size threshold
+import secrets
+import struct
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSION = {'ENABLED': True, 'MIN_SIZE': 1024, 'ENCODINGS': ('br', 'gzip'), 'GZIP_LEVEL': 6,
+               'BROTLI_QUALITY': 4, **getattr(settings, 'COMPRESSION', {})}
+
+# Up to this many random bytes are added to every compressed body, as GZipMiddleware
+# does, so its length does not reveal how well secrets compress against reflected input (BREACH)
+MAX_RANDOM_BYTES = 100
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'application/javascript',
+                      'application/xml', 'text/')
+# Events must reach the client as they happen, not when a compressor block fills
+UNCOMPRESSED_TYPES = ('text/event-stream',)
+
+
+def available_encodings():
+    return tuple(encoding for encoding in COMPRESSION['ENCODINGS'] if encoding != 'br' or brotli is not None)
+
+
+def negotiate(accept_encoding):
+    """The first of our encodings the client accepts (q > 0), or None"""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip():
+            accepted[name.strip().lower()] = quality
+    for encoding in available_encodings():
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+
+def _padding_length():
+    return secrets.randbelow(MAX_RANDOM_BYTES) + 1
+
+
+def gzip_header():
+    """gzip member header whose FNAME field is the random padding (as in GZipMiddleware)"""
+    return b'\x1f\x8b\x08\x08\x00\x00\x00\x00\x00\xff' + b'a' * _padding_length() + b'\x00'
+
+
+def brotli_padding():
+    """
+    An empty brotli metadata block carrying random bytes, which decoders skip
+    (RFC 7932, 9.2). Valid wherever the stream is byte aligned, i.e. after a flush.
+    """
+    length = _padding_length()
+    # ISLAST=0, MNIBBLES=3 (metadata), reserved=0, MSKIPBYTES=1, MSKIPLEN-1, then byte alignment
+    return (0b0110 | 1 << 4 | (length - 1) << 6).to_bytes(2, 'little') + bytes(length)
+
+
+def compress(encoding, content):
+    if encoding == 'br':
+        compressor = StreamCompressor('br')
+        return compressor.compress(content) + compressor.finish()
+    # Django's gzip, with the same random header padding
+    return compress_string(content, max_random_bytes=MAX_RANDOM_BYTES)
+
+
+class StreamCompressor:
+    """
+    Incremental compressor; every chunk is flushed so streams keep arriving as
+    they are produced. Both encodings carry the random length padding.
+    """
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=COMPRESSION['BROTLI_QUALITY'])
+        else:
+            # Raw deflate inside a gzip member written here, so the header can carry the padding
+            self._compressor = zlib.compressobj(COMPRESSION['GZIP_LEVEL'], zlib.DEFLATED, -zlib.MAX_WBITS)
+            self._header = gzip_header()
+            self._crc = 0
+            self._size = 0
+
+    def compress(self, chunk):
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        if self.encoding == 'br':
+            return self._compressor.process(chunk) + self._compressor.flush()
+        self._crc = zlib.crc32(chunk, self._crc)
+        self._size += len(chunk)
+        return self._start() + self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._compressor.flush() + brotli_padding() + self._compressor.finish()
+        return (self._start() + self._compressor.flush()
+                + struct.pack('<II', self._crc, self._size & 0xffffffff))
+
+    def _start(self):
+        header, self._header = self._header, b''
+        return header
+
+
+def _stream(chunks, compressor):
+    for chunk in chunks:
+        if chunk:
+            yield compressor.compress(chunk)
+    yield compressor.finish()
+
+
+async def _astream(chunks, compressor):
+    async for chunk in chunks:
+        if chunk:
+            yield compressor.compress(chunk)
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Compress text and JSON responses with the best encoding the client accepts
+    (brotli when installed, else gzip). Bodies under MIN_SIZE bytes go out as
+    they are; streaming responses are compressed chunk by chunk. Put it right
+    after MetricsMiddleware so response sizes are the bytes on the wire.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not COMPRESSION['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not self.compressible(response):
+            return response
+        if not response.streaming and len(response.content) < COMPRESSION['MIN_SIZE']:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            compressor = StreamCompressor(encoding)
+            if response.is_async:
+                response.streaming_content = _astream(response.streaming_content, compressor)
+            else:
+                response.streaming_content = _stream(response.streaming_content, compressor)
+            response.headers.pop('Content-Length', None)
+        else:
+            compressed = compress(encoding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # The compressed body is a different representation: strong ETags no longer apply
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def compressible(self, response):
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type in UNCOMPRESSED_TYPES:
+            return False
+        return content_type.startswith(COMPRESSIBLE_TYPES) or content_type.endswith('+json')
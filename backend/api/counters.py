@@ -0,0 +1,130 @@
+# Denormalized per-user counters for task progress and unread notifications
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+
+from .models import User, Task, Notification, UserCounters
+from . import events
+
+FIELDS = ('tasks_total', 'tasks_completed', 'notifications_unread')
+
+
+def compute(user_id):
+    """Count everything from scratch for one user"""
+    tasks = Task.objects.filter(user_id=user_id).aggregate(
+        total=Count('id'), completed=Count('id', filter=Q(completed=True)))
+    return {
+        'tasks_total': tasks['total'],
+        'tasks_completed': tasks['completed'],
+        'notifications_unread': Notification.objects.filter(user_id=user_id, is_read=False).count(),
+    }
+
+
+def recompute(user_id):
+    """Rebuild and store the counters row for one user"""
+    values = compute(user_id)
+    try:
+        with transaction.atomic():
+            counters, _ = UserCounters.objects.update_or_create(user_id=user_id, defaults=values)
+    except IntegrityError:
+        # Another request created the row first
+        UserCounters.objects.filter(user_id=user_id).update(**values)
+        counters = UserCounters(user_id=user_id, **values)
+    events.publish(user_id, 'counters', {'values': values})
+    return counters
+
+
+def get_counters(user_id):
+    """Return the counters row in one query, building it on first use"""
+    counters = UserCounters.objects.filter(user_id=user_id).first()
+    if counters is None:
+        counters = recompute(user_id)
+    return counters
+
+
+async def aget_counters(user_id):
+    """Async variant of get_counters()"""
+    counters = await UserCounters.objects.filter(user_id=user_id).afirst()
+    if counters is None:
+        counters = await sync_to_async(recompute)(user_id)
+    return counters
+
+
+def progress(counters):
+    """Task progress payload for a counters row"""
+    total = counters.tasks_total
+    completed = counters.tasks_completed
+    percentage = round((completed / total) * 100) if total > 0 else 0
+    return {
+        'total': total,
+        'completed': completed,
+        'percentage': percentage
+    }
+
+
+def adjust(user_id, **deltas):
+    """Apply relative changes, e.g. adjust(user.id, tasks_total=1)"""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updated = UserCounters.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()})
+    if not updated:
+        # No row yet: the write that triggered this is already visible, so count it in
+        recompute(user_id)
+    else:
+        events.publish(user_id, 'counters', {'deltas': deltas})
+
+
+def reset(user_id, **values):
+    """Set absolute values, e.g. reset(user.id, notifications_unread=0)"""
+    updated = UserCounters.objects.filter(user_id=user_id).update(**values)
+    if not updated:
+        recompute(user_id)
+    else:
+        events.publish(user_id, 'counters', {'values': values})
+
+
+def reconcile(user_ids=None, batch_size=1000):
+    """
+    Recompute counters for the given users (or everybody) with grouped queries.
+
+    Returns the number of rows whose stored values were wrong or missing.
+    """
+    users = User.objects.order_by('id').values_list('id', flat=True)
+    if user_ids is not None:
+        users = users.filter(id__in=user_ids)
+
+    fixed = 0
+    last_id = 0
+    while True:
+        ids = list(users.filter(id__gt=last_id)[:batch_size])
+        if not ids:
+            return fixed
+        last_id = ids[-1]
+
+        values = {user_id: dict.fromkeys(FIELDS, 0) for user_id in ids}
+        tasks = (Task.objects.filter(user_id__in=ids).order_by().values('user_id')
+                 .annotate(total=Count('id'), completed=Count('id', filter=Q(completed=True))))
+        for row in tasks:
+            values[row['user_id']].update(tasks_total=row['total'], tasks_completed=row['completed'])
+        unread = (Notification.objects.filter(user_id__in=ids, is_read=False).order_by()
+                  .values('user_id').annotate(unread=Count('id')))
+        for row in unread:
+            values[row['user_id']]['notifications_unread'] = row['unread']
+
+        stored = {row.user_id: row for row in UserCounters.objects.filter(user_id__in=ids)}
+        to_update, to_create = [], []
+        for user_id, fresh in values.items():
+            row = stored.get(user_id)
+            if row is None:
+                to_create.append(UserCounters(user_id=user_id, **fresh))
+            elif any(getattr(row, field) != fresh[field] for field in FIELDS):
+                for field in FIELDS:
+                    setattr(row, field, fresh[field])
+                to_update.append(row)
+
+        with transaction.atomic():
+            UserCounters.objects.bulk_create(to_create, ignore_conflicts=True)
+            UserCounters.objects.bulk_update(to_update, FIELDS)
+        fixed += len(to_create) + len(to_update)
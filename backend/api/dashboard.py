@@ -0,0 +1,55 @@
+# Dashboard statistics payload
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from .cache import dashboard_cache
+from .models import Statistics
+
+
+def sample_statistics():
+    """Unsaved placeholder shown until real statistics are loaded"""
+    return Statistics(
+        record_date=timezone.now().date(),
+        revenue=156420,
+        active_users=12847,
+        completed_projects=342,
+        conversion_rate=Decimal('24.8'),
+        products_sales=35,
+        services_sales=25,
+        subscriptions_sales=25,
+        consulting_sales=15
+    )
+
+
+def build_dashboard():
+    """Build the dashboard payload from the latest Statistics row"""
+    latest = Statistics.objects.first() or sample_statistics()
+
+    return {
+        'total_revenue': latest.revenue,
+        'active_users': latest.active_users,
+        'completed_projects': latest.completed_projects,
+        'conversion_rate': latest.conversion_rate,
+        'total_sales': 85420,
+        'sales_distribution': {
+            'products': float(latest.products_sales),
+            'services': float(latest.services_sales),
+            'subscriptions': float(latest.subscriptions_sales),
+            'consulting': float(latest.consulting_sales)
+        }
+    }
+
+
+def get_dashboard():
+    """Cached dashboard payload, rebuilt after any Statistics write"""
+    return dashboard_cache.get_or_build('payload', build_dashboard)
+
+
+async def aget_dashboard():
+    """Async variant of get_dashboard(); a hit is read without blocking, only a miss is built in a thread"""
+    payload = await dashboard_cache.apeek('payload')
+    if payload is None:
+        payload = await sync_to_async(get_dashboard)()
+    return payload
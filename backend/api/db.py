@@ -0,0 +1,34 @@
+# Per-connection database tuning
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+SQLITE_PRAGMAS = getattr(settings, 'SQLITE_PRAGMAS', {})
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Run SQLITE_PRAGMAS on a new SQLite connection.
+
+    journal_mode is stored in the database file, the others only last for
+    the connection, so all of them run on every connect (a few microseconds).
+    They go to the driver connection directly so request query counts and
+    the slow-query log never see them.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def sqlite_pragmas(connection):
+    """{name: current value} of the tuned pragmas, for checking a connection"""
+    connection.ensure_connection()
+    values = {}
+    for name in SQLITE_PRAGMAS:
+        row = connection.connection.execute(f'PRAGMA {name}').fetchone()
+        values[name] = row[0] if row else None
+    return values
+
+
+if SQLITE_PRAGMAS:
+    connection_created.connect(apply_sqlite_pragmas, dispatch_uid='api.db.apply_sqlite_pragmas')
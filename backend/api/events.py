@@ -0,0 +1,203 @@
+# Per-user event hub feeding the Server-Sent Events stream
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BACKEND': 'local',
+    'REDIS_URL': 'redis://localhost:6379/0',
+    'CHANNEL_PREFIX': 'smart-dashboard:events:',
+    'QUEUE_SIZE': 100,
+    'HEARTBEAT': 15,
+    'RETRY': 5000,
+    'TICKET_TTL': 30,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'EVENTS', {})}
+
+
+def encode(event, data):
+    """Format one SSE message; done once per publish, shared by all subscribers"""
+    payload = json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+    return f'event: {event}\ndata: {payload}\n\n'
+
+
+RESYNC = encode('resync', {'reason': 'overflow'})
+
+# Channel suffix for events sent to every connected user
+ALL_USERS = 'all'
+
+
+class Subscription:
+    """
+    A bounded queue of encoded messages for one open stream.
+
+    When a slow client lets the queue fill up, everything queued is dropped
+    and replaced by one `resync` event telling the client to reload its
+    state instead of replaying what it missed.
+    """
+
+    def __init__(self, user_id, loop, max_size):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_size)
+
+    def push(self, message):
+        # Runs on the subscriber's event loop
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = RESYNC
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class LocalHub:
+    """In-process pub/sub: delivers to the streams open in this worker"""
+
+    def __init__(self, queue_size):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[subscription.user_id]
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscribers.values())
+
+    def deliver(self, user_id, message):
+        """Hand a message to every local stream of `user_id`; safe from any thread"""
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, message)
+            except RuntimeError:
+                # The stream's loop has closed; it will unsubscribe itself
+                pass
+
+    def deliver_all(self, message):
+        """Hand a message to every stream open in this worker"""
+        with self._lock:
+            user_ids = list(self._subscribers)
+        for user_id in user_ids:
+            self.deliver(user_id, message)
+
+    def publish(self, user_id, message):
+        self.deliver(user_id, message)
+
+    def publish_all(self, message):
+        self.deliver_all(message)
+
+
+class RedisHub(LocalHub):
+    """
+    Fan out through Redis pub/sub so every worker sees every event.
+
+    Publishing goes to Redis only; a listener thread per process receives
+    all user channels and delivers to the local streams.
+    """
+
+    def __init__(self, queue_size, url, prefix):
+        super().__init__(queue_size)
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("EVENTS['BACKEND'] = 'redis' requires the redis package")
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+        self._listener = None
+
+    def subscribe(self, user_id):
+        self._ensure_listener()
+        return super().subscribe(user_id)
+
+    def publish(self, user_id, message):
+        self.client.publish(f'{self.prefix}{user_id}', message)
+
+    def publish_all(self, message):
+        self.client.publish(f'{self.prefix}{ALL_USERS}', message)
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='events-redis-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(f'{self.prefix}*')
+        for item in pubsub.listen():
+            try:
+                target = item['channel'].decode().rsplit(':', 1)[-1]
+                if target == ALL_USERS:
+                    self.deliver_all(item['data'].decode())
+                else:
+                    self.deliver(int(target), item['data'].decode())
+            except (ValueError, AttributeError):
+                logger.warning('Ignoring malformed event on %r', item.get('channel'))
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub():
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                config = get_config()
+                if config['BACKEND'] == 'redis':
+                    _hub = RedisHub(config['QUEUE_SIZE'], config['REDIS_URL'], config['CHANNEL_PREFIX'])
+                else:
+                    _hub = LocalHub(config['QUEUE_SIZE'])
+    return _hub
+
+
+def publish(user_id, event, data):
+    """Push `event` to the user's open streams once the current transaction commits"""
+    message = encode(event, data)
+    transaction.on_commit(lambda: _safe_publish(user_id, message))
+
+
+def publish_all(event, data):
+    """Push `event` to every open stream once the current transaction commits"""
+    message = encode(event, data)
+    transaction.on_commit(lambda: _safe_publish(None, message))
+
+
+def _safe_publish(user_id, message):
+    try:
+        if user_id is None:
+            get_hub().publish_all(message)
+        else:
+            get_hub().publish(user_id, message)
+    except Exception:
+        # Live updates are best effort; never fail the request that caused them
+        logger.exception('Failed to publish event for user %s', user_id)
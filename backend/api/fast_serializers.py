@@ -0,0 +1,130 @@
+# Fast list serialization straight from `.values()` rows
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.response import Response
+
+MONTHS = ['يناير', 'فبراير', 'مارس', 'أبريل', 'مايو', 'يونيو',
+          'يوليو', 'أغسطس', 'سبتمبر', 'أكتوبر', 'نوفمبر', 'ديسمبر']
+
+# "1 يناير" ... "31 ديسمبر", indexed by [month - 1][day - 1]
+FORMATTED_DATES = [[f'{day} {month}' for day in range(1, 32)] for month in MONTHS]
+
+JUST_NOW = 'منذ لحظات'
+MINUTES_AGO = [None] + [f'منذ {minutes} دقيقة' for minutes in range(1, 60)]
+HOURS_AGO = [None] + [f'منذ {hours} ساعة' for hours in range(1, 24)]
+_DAYS_AGO = {}
+
+
+def days_ago(days):
+    text = _DAYS_AGO.get(days)
+    if text is None:
+        text = _DAYS_AGO[days] = f'منذ {days} يوم'
+    return text
+
+
+def time_ago(created_at, now):
+    """Same text as Activity.time_ago / NotificationSerializer.get_time_ago"""
+    diff = now - created_at
+    if diff.days > 0:
+        return days_ago(diff.days)
+    seconds = diff.seconds
+    if seconds >= 3600:
+        return HOURS_AGO[seconds // 3600]
+    if seconds >= 60:
+        return MINUTES_AGO[seconds // 60]
+    return JUST_NOW
+
+
+def datetime_formatter():
+    """Matches rest_framework DateTimeField.to_representation for aware datetimes"""
+    tz = timezone.get_current_timezone()
+
+    def format_datetime(value):
+        if value is None:
+            return None
+        text = value.astimezone(tz).isoformat()
+        if text.endswith('+00:00'):
+            text = text[:-6] + 'Z'
+        return text
+    return format_datetime
+
+
+class FastSerializer:
+    """Turn `.values(*fields)` rows into the exact dicts the DRF serializer returns"""
+    fields = ()
+
+    def serialize(self, rows, now=None):
+        now = now or timezone.now()
+        fmt = datetime_formatter()
+        return [self.row(row, now, fmt) for row in rows]
+
+    def row(self, row, now, fmt):
+        raise NotImplementedError
+
+
+class FastTaskSerializer(FastSerializer):
+    fields = ('id', 'title', 'priority', 'due_date', 'completed', 'created_at', 'updated_at')
+
+    def row(self, row, now, fmt):
+        due_date = row['due_date']
+        return {
+            'id': row['id'],
+            'title': row['title'],
+            'priority': row['priority'],
+            'due_date': due_date.isoformat() if due_date else None,
+            'completed': row['completed'],
+            'created_at': fmt(row['created_at']),
+            'updated_at': fmt(row['updated_at']),
+            'formatted_date': FORMATTED_DATES[due_date.month - 1][due_date.day - 1] if due_date else None,
+        }
+
+
+class FastNotificationSerializer(FastSerializer):
+    fields = ('id', 'title', 'description', 'type', 'is_read', 'created_at')
+
+    def row(self, row, now, fmt):
+        return {
+            'id': row['id'],
+            'title': row['title'],
+            'description': row['description'],
+            'type': row['type'],
+            'is_read': row['is_read'],
+            'created_at': fmt(row['created_at']),
+            'time_ago': time_ago(row['created_at'], now),
+        }
+
+
+class FastActivitySerializer(FastSerializer):
+    fields = ('id', 'type', 'icon', 'title', 'created_at')
+
+    def row(self, row, now, fmt):
+        return {
+            'id': row['id'],
+            'type': row['type'],
+            'icon': row['icon'],
+            'title': row['title'],
+            'created_at': fmt(row['created_at']),
+            'time_ago': time_ago(row['created_at'], now),
+        }
+
+
+class FastListMixin:
+    """
+    Serve `list` from `.values()` rows through `fast_serializer_class`.
+
+    Responses are identical to the regular serializer; switch it off with
+    FAST_LIST_SERIALIZATION = False.
+    """
+    fast_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if not getattr(settings, 'FAST_LIST_SERIALIZATION', True) or self.fast_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+
+        serializer = self.fast_serializer_class()
+        queryset = self.filter_queryset(self.get_queryset()).values(*serializer.fields)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return Response(serializer.serialize(queryset))
+
@@ -0,0 +1,295 @@
+# Deterministic synthetic data for load testing
+import datetime
+import multiprocessing
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from .cache import dashboard_cache
+from .models import User, Task, Notification, Activity, Statistics, UserCounters
+from . import charts
+
+DISTRIBUTIONS = ('fixed', 'uniform', 'exponential', 'pareto')
+# Users handed to a worker at a time; small enough to balance skewed distributions
+USERS_PER_UNIT = 100
+
+TASK_WORDS = ('إعداد', 'مراجعة', 'تحديث', 'اجتماع', 'تصميم', 'اختبار', 'نشر', 'متابعة')
+TASK_SUBJECTS = ('تقرير المبيعات', 'واجهة المستخدم', 'عقود العملاء', 'خطة التسويق', 'قاعدة البيانات',
+                 'الميزانية', 'فريق الدعم', 'الموقع الإلكتروني')
+NOTIFICATIONS = (
+    ('info', 'طلب جديد', 'تم استلام طلب شراء جديد'),
+    ('success', 'تم الدفع', 'تم استلام دفعة بنجاح'),
+    ('warning', 'تنبيه المخزون', 'المخزون أقل من الحد الأدنى'),
+    ('error', 'فشل المزامنة', 'تعذرت مزامنة البيانات مع الخادم'),
+)
+NOTIFICATION_WEIGHTS = (50, 25, 15, 10)
+ACTIVITIES = (
+    ('success', 'check', 'تم إكمال مهمة'),
+    ('info', 'check', 'تم إنشاء مهمة'),
+    ('info', 'user', 'تسجيل دخول ناجح'),
+    ('warning', 'alert', 'موعد تسليم قريب'),
+    ('danger', 'x', 'تم حذف مهمة'),
+    ('info', 'message', 'رسالة جديدة'),
+)
+ACTIVITY_WEIGHTS = (30, 25, 25, 10, 5, 5)
+COUNTER_FIELDS = ('tasks_total', 'tasks_completed', 'notifications_unread')
+# Models with auto_now/auto_now_add fields, which bulk_create would overwrite with the current time
+TIMESTAMPED = (Task, Notification)
+
+
+def parse_spec(value):
+    """'MEAN[:DISTRIBUTION]' -> (mean, distribution), e.g. '50:pareto'"""
+    mean, _, distribution = value.partition(':')
+    distribution = distribution or 'uniform'
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f'Unknown distribution {distribution!r} (choose from {", ".join(DISTRIBUTIONS)})')
+    mean = float(mean)
+    if mean < 0:
+        raise ValueError('The mean must not be negative')
+    return mean, distribution
+
+
+def draw(rng, mean, distribution):
+    """A per-user row count with the given mean"""
+    if mean == 0:
+        return 0
+    if distribution == 'fixed':
+        return round(mean)
+    if distribution == 'uniform':
+        return rng.randint(0, round(2 * mean))
+    if distribution == 'exponential':
+        return int(rng.expovariate(1 / mean))
+    # Pareto with alpha 1.5 has mean 3; a few users get most of the rows
+    return min(int(rng.paretovariate(1.5) * mean / 3), int(mean * 100))
+
+
+class UserRows:
+    """The rows of one user, built from an RNG seeded with (seed, user index)"""
+
+    def __init__(self, config, index, user_id):
+        self.rng = random.Random(f'{config["seed"]}:{index}')
+        self.config = config
+        self.user_id = user_id
+        self.now = config['now']
+        self.span = config['history_days'] * 86400
+
+    def created_at(self):
+        return self.now - datetime.timedelta(seconds=self.rng.random() * self.span)
+
+    def tasks(self):
+        rng, today = self.rng, self.config['until']
+        for i in range(draw(rng, *self.config['tasks'])):
+            created_at = self.created_at()
+            yield Task(
+                user_id=self.user_id,
+                title=f'{rng.choice(TASK_WORDS)} {rng.choice(TASK_SUBJECTS)} {i + 1}',
+                priority=rng.choices(('high', 'medium', 'low'), (25, 50, 25))[0],
+                due_date=today + datetime.timedelta(days=rng.randint(-30, 60)) if rng.random() < 0.8 else None,
+                completed=rng.random() < 0.4,
+                created_at=created_at,
+                updated_at=min(created_at + datetime.timedelta(hours=rng.random() * 72), self.now),
+            )
+
+    def notifications(self):
+        rng = self.rng
+        for _ in range(draw(rng, *self.config['notifications'])):
+            type, title, description = rng.choices(NOTIFICATIONS, NOTIFICATION_WEIGHTS)[0]
+            yield Notification(user_id=self.user_id, title=title, description=description, type=type,
+                                is_read=rng.random() < 0.7, created_at=self.created_at())
+
+    def activities(self):
+        rng = self.rng
+        for _ in range(draw(rng, *self.config['activities'])):
+            type, icon, title = rng.choices(ACTIVITIES, ACTIVITY_WEIGHTS)[0]
+            yield Activity(user_id=self.user_id, type=type, icon=icon, title=title, created_at=self.created_at())
+
+
+class Writer:
+    """Buffers rows per model and writes each full buffer with one bulk_create"""
+
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+        self.buffers = {Task: [], Notification: [], Activity: [], UserCounters: []}
+        self.written = dict.fromkeys(self.buffers, 0)
+
+    def add(self, row):
+        buffer = self.buffers[type(row)]
+        buffer.append(row)
+        if len(buffer) >= self.chunk_size:
+            self.flush(type(row))
+
+    def flush(self, model=None):
+        for model in [model] if model else list(self.buffers):
+            rows = self.buffers[model]
+            if not rows:
+                continue
+            with transaction.atomic():
+                if model is UserCounters:
+                    model.objects.bulk_create(rows, batch_size=self.chunk_size, update_conflicts=True,
+                                              unique_fields=['user'], update_fields=list(COUNTER_FIELDS))
+                elif model in TIMESTAMPED:
+                    self.insert_as_is(model, rows)
+                else:
+                    model.objects.bulk_create(rows, batch_size=self.chunk_size)
+            self.written[model] += len(rows)
+            self.buffers[model] = []
+
+    def insert_as_is(self, model, rows):
+        """
+        INSERT the rows with every value as generated, auto_now and
+        auto_now_add included. A plain INSERT works on every backend, unlike
+        restoring the timestamps by primary key, which MySQL does not return.
+        """
+        ops = connection.ops
+        fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+        sql = (f'INSERT INTO {ops.quote_name(model._meta.db_table)} '
+               f'({", ".join(ops.quote_name(field.column) for field in fields)}) VALUES ')
+        placeholder = f'({", ".join(["%s"] * len(fields))})'
+        batch_size = min(self.chunk_size, ops.bulk_batch_size(fields, rows) or self.chunk_size)
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                cursor.execute(sql + ', '.join([placeholder] * len(batch)), [
+                    field.get_db_prep_save(getattr(row, field.attname), connection)
+                    for row in batch for field in fields])
+
+
+def generate_unit(config, users):
+    """Rows for a list of (index, user id); returns {model label: rows written}"""
+    writer = Writer(config['chunk_size'])
+    for index, user_id in users:
+        rows = UserRows(config, index, user_id)
+        total = completed = unread = 0
+        for task in rows.tasks():
+            total += 1
+            completed += task.completed
+            writer.add(task)
+        for notification in rows.notifications():
+            unread += not notification.is_read
+            writer.add(notification)
+        for activity in rows.activities():
+            writer.add(activity)
+        writer.add(UserCounters(user_id=user_id, tasks_total=total, tasks_completed=completed,
+                                notifications_unread=unread))
+    writer.flush()
+    return {model._meta.label: count for model, count in writer.written.items()}
+
+
+def _generate_in_worker(args):
+    return generate_unit(*args)
+
+
+def create_users(config):
+    """Bulk-create the users and return their ids in index order"""
+    password = make_password(config['password'])
+    prefix, count, chunk_size = config['prefix'], config['users'], config['chunk_size']
+    width = len(str(max(count - 1, 0)))
+    for offset in range(0, count, chunk_size):
+        User.objects.bulk_create([
+            User(username=f'{prefix}-{index:0{width}d}', email=f'{prefix}-{index:0{width}d}@example.com',
+                 password=password, first_name='مستخدم', last_name=str(index))
+            for index in range(offset, min(offset + chunk_size, count))
+        ])
+    # Zero-padded names sort in index order
+    return list(User.objects.filter(username__startswith=f'{prefix}-').order_by('username')
+                .values_list('id', flat=True))
+
+
+def statistics_rows(config):
+    """One Statistics row per day for `years` years up to `until`, as a smooth random walk"""
+    rng = random.Random(f'{config["seed"]}:statistics')
+    last = config['until']
+    days = round(config['years'] * 365)
+    revenue = 100000.0
+    for offset in range(days - 1, -1, -1):
+        day = last - datetime.timedelta(days=offset)
+        revenue = max(revenue * (1 + rng.gauss(0.0005, 0.02)), 1000)
+        # Weekends sell less
+        daily = revenue * (0.7 if day.weekday() in (4, 5) else 1.0)
+        shares = [rng.uniform(20, 40), rng.uniform(15, 30), rng.uniform(15, 30), rng.uniform(5, 20)]
+        scale = 100 / sum(shares)
+        products, services, subscriptions = (round(share * scale, 2) for share in shares[:3])
+        yield Statistics(
+            record_date=day,
+            revenue=Decimal(f'{daily:.2f}'),
+            expenses=Decimal(f'{daily * rng.uniform(0.4, 0.7):.2f}'),
+            active_users=int(daily / 10 * rng.uniform(0.9, 1.1)),
+            completed_projects=rng.randint(0, 20),
+            conversion_rate=Decimal(f'{rng.uniform(10, 35):.2f}'),
+            products_sales=Decimal(f'{products:.2f}'),
+            services_sales=Decimal(f'{services:.2f}'),
+            subscriptions_sales=Decimal(f'{subscriptions:.2f}'),
+            consulting_sales=Decimal(f'{100 - products - services - subscriptions:.2f}'),
+        )
+
+
+def generate_statistics(config):
+    """
+    Insert the daily statistics and rebuild their rollups; returns the number of days.
+
+    Days that already have a row keep it: the generator never overwrites
+    real (or earlier generated) figures.
+    """
+    batch, written = [], 0
+    for row in statistics_rows(config):
+        batch.append(row)
+        if len(batch) >= config['chunk_size']:
+            Statistics.objects.bulk_create(batch, ignore_conflicts=True)
+            written += len(batch)
+            batch = []
+    if batch:
+        Statistics.objects.bulk_create(batch, ignore_conflicts=True)
+        written += len(batch)
+    if written:
+        last = config['until']
+        charts.refresh_rollups(last - datetime.timedelta(days=written - 1), last)
+        dashboard_cache.bump()
+    return written
+
+
+def generate(config, workers=1, progress=None):
+    """
+    Create `config['users']` users with their tasks, notifications and
+    activities, plus `config['years']` of daily statistics.
+
+    Users are processed in units of USERS_PER_UNIT, in this process or across
+    `workers` forked processes; every user's rows come from its own seeded
+    RNG, so the data is the same whatever the split. `progress(written)` is
+    called with the running totals after each unit.
+    """
+    # Timestamps count back from midnight after `until`, never from the clock
+    config = {**config, 'now': end_of(config['until'])}
+    user_ids = list(enumerate(create_users(config)))
+    units = [user_ids[start:start + USERS_PER_UNIT] for start in range(0, len(user_ids), USERS_PER_UNIT)]
+    totals = {'api.User': len(user_ids)}
+
+    def collect(written):
+        for label, count in written.items():
+            totals[label] = totals.get(label, 0) + count
+        if progress:
+            progress(totals)
+
+    if workers > 1 and units:
+        # Children inherit the settings through fork; they must not share our connection
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(workers) as pool:
+            for written in pool.imap_unordered(_generate_in_worker, [(config, unit) for unit in units]):
+                collect(written)
+    else:
+        for unit in units:
+            collect(generate_unit(config, unit))
+
+    totals['api.Statistics'] = generate_statistics(config)
+    return totals
+
+
+def supports_parallel_writes():
+    """SQLite takes one writer at a time; extra processes would only wait on the lock"""
+    return connection.vendor != 'sqlite'
+
+
+def end_of(day):
+    return timezone.make_aware(datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time.min))
@@ -0,0 +1,75 @@
+# Login handling shared by the DRF view and the native async view
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .activity_log import log_activity
+from .authentication import tokens_for_user
+from .serializers import LoginSerializer, UserSerializer
+
+LOGIN = {'HASH_WORKERS': 4, 'MAX_PENDING': 256, **getattr(settings, 'LOGIN', {})}
+
+# Password hashing is CPU bound; a fixed pool keeps a login burst from
+# starving the event loop or spawning a thread per request
+_executor = ThreadPoolExecutor(max_workers=LOGIN['HASH_WORKERS'], thread_name_prefix='login')
+_pending = 0
+
+BUSY_MESSAGE = 'عدد كبير من محاولات الدخول، حاول مرة أخرى بعد قليل'
+
+
+def login(data):
+    """Validate credentials and return (status, body) like LoginView always has"""
+    serializer = LoginSerializer(data=data)
+    if not serializer.is_valid():
+        return 400, serializer.errors
+
+    user = serializer.validated_data['user']
+    refresh = tokens_for_user(user)
+
+    # Log activity
+    log_activity(
+        user=user,
+        type='info',
+        icon='user',
+        title='تسجيل دخول ناجح'
+    )
+
+    return 200, {
+        'message': 'تم تسجيل الدخول بنجاح',
+        'user': UserSerializer(user).data,
+        'tokens': {
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+        }
+    }
+
+
+def _pooled_login(data):
+    # Pool threads outlive requests; honour CONN_MAX_AGE like a request would
+    close_old_connections()
+    try:
+        return login(data)
+    finally:
+        close_old_connections()
+
+
+async def alogin(data):
+    """
+    Run login() on the hashing pool.
+
+    Returns (429, ...) instead of queueing once MAX_PENDING logins are waiting.
+    """
+    global _pending
+    if _pending >= LOGIN['MAX_PENDING']:
+        return 429, {'detail': BUSY_MESSAGE}
+    _pending += 1
+    try:
+        # run_in_executor does not copy contextvars; without them the metrics labels,
+        # replica pinning and slow-query view name set by the middlewares are lost
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(_executor, context.run, _pooled_login, data)
+    finally:
+        _pending -= 1
@@ -0,0 +1,32 @@
+# Move old activities into the monthly archive files
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api import archive
+from api.models import Activity
+
+
+class Command(BaseCommand):
+    help = (
+        'Move activities older than --days into gzip NDJSON files under ACTIVITY_ARCHIVE["DIR"] '
+        '(one per month) and delete them from the table in batches. Safe to run from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=archive.ARCHIVE['RETENTION_DAYS'],
+                            help='Keep this many days in the table')
+        parser.add_argument('--batch-size', type=int, default=archive.ARCHIVE['BATCH_SIZE'])
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            cutoff = timezone.now() - timedelta(days=options['days'])
+            count = Activity.objects.filter(created_at__lt=cutoff).count()
+            self.stdout.write(f'Would archive {count} activit{"y" if count == 1 else "ies"}')
+            return
+
+        moved = archive.archive_activities(options['days'], options['batch_size'], options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} activities to {archive.archive_dir()}'))
@@ -0,0 +1,156 @@
+# Concurrent write throughput with and without the database tuning profile
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+
+from api import counters
+from api.activity_log import log_activity
+from api.models import Task, UserCounters
+
+# (name, DB_TUNING, SQLITE_TRANSACTION_MODE)
+PROFILES = (('default', '0', ''), ('tuned', '1', 'IMMEDIATE'), ('deferred', '1', 'DEFERRED'))
+PREFIX = 'bench-db-writes'
+
+
+class Command(BaseCommand):
+    help = (
+        'Run writer and reader threads against the database once with Django defaults (DB_TUNING=0) '
+        'and once with the tuned profile (DB_TUNING=1), on SQLite also with DEFERRED instead of IMMEDIATE '
+        'transactions, and report committed writes per second and '
+        'lock errors. Each write locks the user\'s counters row (select_for_update, as broadcasts do), '
+        'then creates a task, bumps the counters and logs an activity in one transaction. SQLite runs '
+        'on scratch files; MySQL uses the configured database and removes its rows afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per profile')
+        parser.add_argument('--atomic-reads', action='store_true',
+                            help='Readers wrap each query in atomic(), like a read-only transaction')
+        parser.add_argument('--profile', choices=[profile[0] for profile in PROFILES],
+                            help='Run only this profile')
+        parser.add_argument('--worker', action='store_true', help='(internal) run one profile in this process')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            return self.run_worker(options)
+
+        engine = settings.DATABASES['default']['ENGINE']
+        profiles = [profile for profile in PROFILES if options['profile'] in (None, profile[0])
+                    and (engine.endswith('sqlite3') or profile[0] != 'deferred')]
+        worker = [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'bench_db_writes', '--worker',
+                  '--writers', str(options['writers']), '--readers', str(options['readers']),
+                  '--duration', str(options['duration'])]
+        if options['atomic_reads']:
+            worker.append('--atomic-reads')
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for name, tuning, transaction_mode in profiles:
+                env = {**os.environ, 'DB_TUNING': tuning, 'SQLITE_TRANSACTION_MODE': transaction_mode,
+                       'ACTIVITY_LOG_MODE': 'sync', 'BROADCASTS_MODE': 'sync', 'SLOW_QUERIES_ENABLED': '0',
+                       'METRICS_ENABLED': '0'}
+                if engine.endswith('sqlite3'):
+                    env['DB_NAME'] = str(Path(directory) / f'{name}.sqlite3')
+                self.stdout.write(f'{name}: {options["writers"]} writers, {options["readers"]} readers, '
+                                  f'{options["duration"]:.0f}s...')
+                completed = subprocess.run(worker, env=env, capture_output=True, text=True)
+                if completed.returncode:
+                    raise CommandError(f'{name} run failed:\n{completed.stderr}')
+                results[name] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+        self.stdout.write('')
+        self.stdout.write(f'{"profile":<8} {"writes/s":>9} {"reads/s":>9} {"locked":>7} '
+                          f'{"write p50":>10} {"write p99":>10}')
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<8} {result["writes"] / result["wall"]:>9.1f} {result["reads"] / result["wall"]:>9.1f} '
+                f'{result["locked"]:>7} {result["p50"]:>8.1f}ms {result["p99"]:>8.1f}ms')
+        if 'default' in results and 'tuned' in results and results['default']['writes']:
+            speedup = results['tuned']['writes'] / results['default']['writes']
+            self.stdout.write(self.style.SUCCESS(f'tuned profile: {speedup:.1f}x the committed writes'))
+
+    def run_worker(self, options):
+        if connection.vendor == 'sqlite':
+            call_command('migrate', verbosity=0)
+        User = get_user_model()
+        User.objects.filter(username__startswith=PREFIX).delete()
+        users = [User.objects.create(username=f'{PREFIX}-{index}', email=f'{PREFIX}-{index}@example.com')
+                 for index in range(max(options['writers'], 1))]
+        counters.reconcile([user.id for user in users])
+        connection.close()
+
+        latencies, stats = [], {'writes': 0, 'reads': 0, 'locked': 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options['duration']
+
+        def writer(user):
+            try:
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        with transaction.atomic():
+                            UserCounters.objects.select_for_update().get(user=user)
+                            task = Task.objects.create(user=user, title='bench')
+                            counters.adjust(user.id, tasks_total=1)
+                            log_activity(user=user, type='info', icon='check', title=f'bench {task.id}')
+                    except OperationalError:
+                        with lock:
+                            stats['locked'] += 1
+                        continue
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        stats['writes'] += 1
+                        latencies.append(elapsed)
+            finally:
+                connection.close()
+
+        def reader(user):
+            try:
+                while time.perf_counter() < deadline:
+                    try:
+                        if options['atomic_reads']:
+                            with transaction.atomic():
+                                list(Task.objects.filter(user=user).order_by('-created_at')[:20])
+                        else:
+                            list(Task.objects.filter(user=user).order_by('-created_at')[:20])
+                    except OperationalError:
+                        with lock:
+                            stats['locked'] += 1
+                        continue
+                    with lock:
+                        stats['reads'] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=writer, args=(user,)) for user in users[:options['writers']]]
+        threads += [threading.Thread(target=reader, args=(users[index % len(users)],))
+                    for index in range(options['readers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+        User.objects.filter(username__startswith=PREFIX).delete()
+        latencies.sort()
+        self.stdout.write(json.dumps({**stats, 'wall': wall, 'p50': self.pct(latencies, 50),
+                                      'p99': self.pct(latencies, 99)}))
+
+    def pct(self, values, percentile):
+        if not values:
+            return 0.0
+        index = min(len(values) - 1, int(len(values) * percentile / 100))
+        return values[index] * 1000
@@ -0,0 +1,74 @@
+# Login throughput benchmark against a running server
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Send concurrent logins to a running server and report logins per second and latency. '
+        'Compare the WSGI view (--path auth/login/) with the async one (--path async/auth/login/) '
+        'while `loadtest` runs against the same server to see how other requests are affected.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000/api/')
+        parser.add_argument('--path', default='auth/login/')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run')
+        parser.add_argument('--email', default='admin@example.com')
+        parser.add_argument('--password', default='admin123')
+
+    def handle(self, *args, **options):
+        url = options['base_url'].rstrip('/') + '/' + options['path']
+        body = json.dumps({'email': options['email'], 'password': options['password']}).encode()
+        headers = {'Content-Type': 'application/json'}
+
+        latencies = []
+        statuses = {}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options['duration']
+
+        def worker():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(urllib.request.Request(url, data=body, headers=headers),
+                                                timeout=60) as resp:
+                        resp.read()
+                        code = resp.status
+                except urllib.error.HTTPError as exc:
+                    code = exc.code
+                except (urllib.error.URLError, OSError):
+                    code = 'error'
+                elapsed = time.perf_counter() - started
+                with lock:
+                    statuses[code] = statuses.get(code, 0) + 1
+                    if code == 200:
+                        latencies.append(elapsed)
+
+        threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+        latencies.sort()
+        self.stdout.write(f'responses: {", ".join(f"{code}={count}" for code, count in sorted(statuses.items(), key=str))}')
+        self.stdout.write(
+            f'p50 {self.pct(latencies, 50):.0f} ms, p95 {self.pct(latencies, 95):.0f} ms, '
+            f'p99 {self.pct(latencies, 99):.0f} ms')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(latencies) / wall:.1f} logins/s over {wall:.1f}s at concurrency {options["concurrency"]}'))
+
+    def pct(self, values, percentile):
+        if not values:
+            return 0.0
+        index = min(len(values) - 1, int(len(values) * percentile / 100))
+        return values[index] * 1000
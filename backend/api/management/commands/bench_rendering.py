@@ -0,0 +1,138 @@
+# Throughput and bytes on the wire per endpoint: JSON backends x compression
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api import compression, renderers
+from api.authentication import tokens_for_user
+from api.cache import dashboard_cache
+from api.models import Task, Notification, Activity, Statistics
+
+User = get_user_model()
+
+ENDPOINTS = [
+    ('tasks', '/api/tasks/?page_size=100'),
+    ('notifications', '/api/notifications/?page_size=100'),
+    ('activities', '/api/activities/?page_size=100'),
+    ('statistics', '/api/statistics/'),
+    ('dashboard', '/api/statistics/dashboard/'),
+    ('chart', '/api/statistics/chart/'),
+    ('bootstrap', '/api/bootstrap/'),
+    ('async tasks', '/api/async/tasks/?page_size=100'),
+    ('tasks export', '/api/tasks/export/?fmt=ndjson'),
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Request each read endpoint in process with the stdlib and orjson JSON backends, uncompressed '
+        'and with every available Content-Encoding, and report requests per second, the time spent '
+        'rendering the JSON and response bytes. Checks that both backends send identical bodies. '
+        'Rows are created in a transaction that is rolled back, and the dashboard cache is invalidated afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Tasks, notifications and activities')
+        parser.add_argument('--requests', type=int, default=30, help='Requests per endpoint and setup')
+
+    def handle(self, *args, **options):
+        setups = [('stdlib', None), ('orjson', None)]
+        setups += [('orjson', encoding) for encoding in compression.available_encodings()]
+        if renderers.orjson is None:
+            raise CommandError('orjson is not installed; there is nothing to compare')
+
+        backend = renderers.JSON['BACKEND']
+        try:
+            with transaction.atomic():
+                user = self.seed(options['rows'])
+                headers = {'HTTP_AUTHORIZATION': f'Bearer {tokens_for_user(user).access_token}'}
+                self.stdout.write(f'{"endpoint":<14} {"json":<7} {"encoding":<9} {"req/s":>8} {"render µs":>10} '
+                                  f'{"bytes":>10} {"ratio":>6}')
+                for name, url in ENDPOINTS:
+                    self.compare(name, url, headers, setups, options['requests'])
+                raise _Rollback
+        except _Rollback:
+            pass
+        finally:
+            renderers.JSON['BACKEND'] = backend
+            # The dashboard was cached from the rolled-back rows, which sent no signal
+            dashboard_cache.bump()
+
+    def compare(self, name, url, headers, setups, count):
+        client = Client()
+        plain = {}
+        for json_backend, encoding in setups:
+            renderers.JSON['BACKEND'] = json_backend
+            extra = {**headers, 'HTTP_ACCEPT_ENCODING': encoding} if encoding else headers
+            response, body = self.fetch(client, url, extra)  # warm up caches
+            started = time.perf_counter()
+            for _ in range(count):
+                self.fetch(client, url, extra)
+            rate = count / (time.perf_counter() - started)
+
+            render = '-'
+            if encoding is None:
+                plain[json_backend] = body
+                if hasattr(response, 'data'):
+                    render = f'{self.render_time(json_backend, response.data, count):.0f}'
+            ratio = len(body) / len(plain['orjson']) if plain.get('orjson') else 1.0
+            self.stdout.write(f'{name:<14} {json_backend:<7} {encoding or "identity":<9} {rate:>8.1f} '
+                              f'{render:>10} {len(body):>10} {ratio:>6.2f}')
+        if plain['stdlib'] != plain['orjson']:
+            raise CommandError(f'{name}: orjson body differs from the stdlib one')
+
+    def fetch(self, client, url, extra):
+        response = client.get(url, **extra)
+        if response.status_code != 200:
+            raise CommandError(f'{url} answered {response.status_code}')
+        if response.streaming:
+            return response, b''.join(response.streaming_content)
+        return response, response.content
+
+    def render_time(self, json_backend, data, count):
+        """Best time in µs to render a DRF response's data with the backend"""
+        renderer = renderers.FastJSONRenderer() if json_backend == 'orjson' else JSONRenderer()
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            renderer.render(data)
+            timings.append(time.perf_counter() - started)
+        return min(timings) * 1e6
+
+    def seed(self, count):
+        user = User.objects.create_user(username='bench-rendering', email='bench-rendering@example.com',
+                                        password='bench-rendering')
+        now = timezone.now()
+        today = now.date()
+        Task.objects.bulk_create(
+            Task(user=user, title=f'مهمة {i}', priority=('high', 'medium', 'low')[i % 3],
+                 due_date=today + timedelta(days=i % 400) if i % 5 else None, completed=i % 2 == 0)
+            for i in range(count))
+        Notification.objects.bulk_create(
+            Notification(user=user, title=f'إشعار {i}', description='وصف الإشعار',
+                         type=('info', 'success', 'warning', 'error')[i % 4], is_read=i % 3 == 0,
+                         created_at=now - timedelta(minutes=i * 7))
+            for i in range(count))
+        Activity.objects.bulk_create(
+            Activity(user=user, type='success', icon='check', title=f'نشاط {i}',
+                     created_at=now - timedelta(minutes=i * 7))
+            for i in range(count))
+        if not Statistics.objects.exists():
+            Statistics.objects.bulk_create(
+                Statistics(record_date=today - timedelta(days=i), revenue=Decimal(150000 + i * 37),
+                           active_users=12000 + i, completed_projects=300 + i % 50,
+                           conversion_rate=Decimal('24.80'), products_sales=35, services_sales=25,
+                           subscriptions_sales=25, consulting_sales=15, expenses=Decimal('90000.50'))
+                for i in range(730))
+        return user
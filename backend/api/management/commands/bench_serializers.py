@@ -0,0 +1,95 @@
+# Microbenchmark: DRF serializers vs the `.values()` fast path
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api.fast_serializers import FastTaskSerializer, FastNotificationSerializer, FastActivitySerializer
+from api.models import Task, Notification, Activity
+from api.serializers import TaskSerializer, NotificationSerializer, ActivitySerializer
+
+User = get_user_model()
+
+CASES = [
+    ('tasks', Task, TaskSerializer, FastTaskSerializer),
+    ('notifications', Notification, NotificationSerializer, FastNotificationSerializer),
+    ('activities', Activity, ActivitySerializer, FastActivitySerializer),
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Serialize 1k/10k-row pages with the DRF serializers and with the fast `.values()` path, '
+        'check that the rendered JSON is byte-identical and report the timings. '
+        'All rows are created inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, action='append', help='Page size to test (repeatable, default 1000 and 10000)')
+        parser.add_argument('--repeat', type=int, default=5, help='Best of N runs')
+
+    def handle(self, *args, **options):
+        sizes = options['rows'] or [1000, 10000]
+        try:
+            with transaction.atomic():
+                user = self.seed(max(sizes))
+                self.stdout.write(f'{"endpoint":<15} {"rows":>6} {"drf ms":>9} {"fast ms":>9} {"speedup":>8}')
+                for name, model, serializer_class, fast_class in CASES:
+                    queryset = model.objects.filter(user=user).order_by('-created_at', '-id')
+                    for size in sizes:
+                        self.compare(name, queryset, serializer_class, fast_class, size, options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def seed(self, count):
+        user = User.objects.create_user(username='bench-serializers', email='bench-serializers@example.com',
+                                        password='bench-serializers')
+        now = timezone.now()
+        today = now.date()
+        Task.objects.bulk_create(
+            Task(user=user, title=f'مهمة {i}', priority=('high', 'medium', 'low')[i % 3],
+                 due_date=today + timedelta(days=i % 400) if i % 5 else None, completed=i % 2 == 0)
+            for i in range(count))
+        Notification.objects.bulk_create(
+            Notification(user=user, title=f'إشعار {i}', description='وصف الإشعار',
+                         type=('info', 'success', 'warning', 'error')[i % 4], is_read=i % 3 == 0,
+                         created_at=now - timedelta(minutes=i * 7))
+            for i in range(count))
+        Activity.objects.bulk_create(
+            Activity(user=user, type='success', icon='check', title=f'نشاط {i}',
+                     created_at=now - timedelta(minutes=i * 7))
+            for i in range(count))
+        return user
+
+    def compare(self, name, queryset, serializer_class, fast_class, size, repeat):
+        renderer = JSONRenderer()
+        fast = fast_class()
+
+        def drf():
+            return renderer.render(serializer_class(list(queryset[:size]), many=True).data)
+
+        def fast_path():
+            return renderer.render(fast.serialize(list(queryset.values(*fast.fields)[:size])))
+
+        drf_ms, expected = self.best(drf, repeat)
+        fast_ms, actual = self.best(fast_path, repeat)
+        if expected != actual:
+            raise CommandError(f'{name}: fast output differs from {serializer_class.__name__} at {size} rows')
+        self.stdout.write(f'{name:<15} {size:>6} {drf_ms:>9.1f} {fast_ms:>9.1f} {drf_ms / fast_ms:>7.1f}x')
+
+    def best(self, func, repeat):
+        timings = []
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            output = func()
+            timings.append(time.perf_counter() - started)
+        return min(timings) * 1000, output
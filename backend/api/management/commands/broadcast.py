@@ -0,0 +1,53 @@
+# Send a notification to every active user, or resume unfinished broadcasts
+from django.core.management.base import BaseCommand, CommandError
+
+from api import broadcasts
+from api.models import Broadcast, Notification
+
+
+class Command(BaseCommand):
+    help = (
+        'Create a broadcast and fan it out to every active user in bulk_create chunks, '
+        'or with --resume continue broadcasts left pending or interrupted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--title')
+        parser.add_argument('--description', default='')
+        parser.add_argument('--type', default='info', choices=[choice for choice, _ in Notification.TYPE_CHOICES])
+        parser.add_argument('--resume', nargs='?', const='all', metavar='ID',
+                            help='Resume one broadcast, or every unfinished one')
+        parser.add_argument('--chunk-size', type=int, default=broadcasts.BROADCASTS['CHUNK_SIZE'])
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            if options['resume'] == 'all':
+                pending = list(broadcasts.unfinished())
+            else:
+                pending = list(Broadcast.objects.filter(pk=options['resume']))
+                if not pending:
+                    raise CommandError(f'Broadcast {options["resume"]} does not exist')
+            if not pending:
+                self.stdout.write('Nothing to resume')
+            for broadcast in pending:
+                self.send(broadcast, options['chunk_size'])
+            return
+
+        if not options['title']:
+            raise CommandError('--title is required (or use --resume)')
+        broadcast = broadcasts.create_broadcast(options['title'], options['description'], options['type'])
+        self.stdout.write(f'Broadcast {broadcast.pk} to {broadcast.total_recipients} user(s)')
+        self.send(broadcast, options['chunk_size'])
+
+    def send(self, broadcast, chunk_size):
+        last_reported = [None]
+
+        def progress(current):
+            if current.progress == last_reported[0]:
+                return
+            last_reported[0] = current.progress
+            self.stdout.write(f'  #{current.pk}: {current.sent_count}/{current.total_recipients} '
+                              f'({current.progress}%) up to user {current.last_user_id}')
+
+        broadcast = broadcasts.send(broadcast, chunk_size, progress)
+        self.stdout.write(self.style.SUCCESS(f'Broadcast {broadcast.pk} completed, {broadcast.sent_count} sent'))
@@ -0,0 +1,25 @@
+# Deactivate accounts so their access tokens stop working on every worker
+from django.core.management.base import BaseCommand, CommandError
+
+from api.authentication import deactivate_users, users_by_email
+from api.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Deactivate users by email and drop them from the shared auth cache, so their '
+        'access tokens are rejected right away (a bare .update() would skip the cache).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('emails', nargs='+')
+
+    def handle(self, *args, **options):
+        user_ids = []
+        for email in options['emails']:
+            ids = list(users_by_email(email).values_list('pk', flat=True))
+            if not ids:
+                raise CommandError(f'No user with email {email}')
+            user_ids += ids
+        count = deactivate_users(User.objects.filter(pk__in=user_ids))
+        self.stdout.write(self.style.SUCCESS(f'Deactivated {count} user(s)'))
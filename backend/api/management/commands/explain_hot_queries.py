@@ -0,0 +1,107 @@
+# Compare query plans of the hot per-user queries with and without the composite indexes
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.models import User, Task, Notification, Activity
+
+
+# Plan fragments that mean the database sorts rows itself / answers from the index alone
+SORT_MARKERS = ('USE TEMP B-TREE', 'Using filesort')
+INDEX_ONLY_MARKERS = ('COVERING INDEX', 'Using index')
+
+COMPOSITE_INDEXES = [
+    (Task, 'tasks_user_created_idx'),
+    (Task, 'tasks_user_completed_idx'),
+    (Notification, 'notif_user_created_idx'),
+    (Notification, 'notif_user_read_idx'),
+    (Activity, 'activities_user_created_idx'),
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+def hot_queries(user_id):
+    """Queries issued by the list, progress and unread_count endpoints"""
+    return [
+        ('tasks list', Task.objects.filter(user_id=user_id)[:20], False),
+        ('tasks progress (total)', Task.objects.filter(user_id=user_id).order_by().values('id'), True),
+        ('tasks progress (completed)',
+         Task.objects.filter(user_id=user_id, completed=True).order_by().values('id'), True),
+        ('notifications list', Notification.objects.filter(user_id=user_id)[:20], False),
+        ('notifications unread_count',
+         Notification.objects.filter(user_id=user_id, is_read=False).order_by().values('id'), True),
+        ('activities list', Activity.objects.filter(user_id=user_id)[:10], False),
+    ]
+
+
+def describe(queryset, index_only):
+    plan = queryset.explain()
+    sorts = any(marker in plan for marker in SORT_MARKERS)
+    covered = any(marker in plan for marker in INDEX_ONLY_MARKERS)
+    ok = not sorts and (covered or not index_only)
+    return plan, sorts, covered, ok
+
+
+class Command(BaseCommand):
+    help = 'Print EXPLAIN for the hot per-user queries before and after the composite indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='User id to plan for (defaults to the first user)')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the full plan text')
+        parser.add_argument('--strict', action='store_true',
+                            help='Exit with an error if a hot query still sorts or misses its covering index')
+
+    def handle(self, *args, **options):
+        user_id = options['user'] or User.objects.order_by('id').values_list('id', flat=True).first() or 0
+
+        after = self.collect(user_id)
+        before = None
+        if connection.features.can_rollback_ddl:
+            before = self.collect_without_indexes(user_id)
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'{connection.vendor} cannot roll back DDL; showing current plans only'))
+
+        failures = []
+        for name, plan, sorts, covered, ok in after:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            if before:
+                old = next(row for row in before if row[0] == name)
+                self.stdout.write(f'  before: sort={old[2]} index_only={old[3]}')
+                if options['verbose_plans']:
+                    self.stdout.write(self.indent(old[1]))
+            self.stdout.write(f'  after:  sort={sorts} index_only={covered}')
+            if options['verbose_plans']:
+                self.stdout.write(self.indent(plan))
+            if not ok:
+                failures.append(name)
+
+        if failures:
+            message = 'Queries not served by an index: ' + ', '.join(failures)
+            if options['strict']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('All hot queries are served by the composite indexes'))
+
+    def collect(self, user_id):
+        return [(name, *describe(queryset, index_only)) for name, queryset, index_only in hot_queries(user_id)]
+
+    def collect_without_indexes(self, user_id):
+        """Drop the composite indexes inside a transaction, plan, then roll back"""
+        result = []
+        try:
+            with connection.schema_editor() as editor:
+                for model, name in COMPOSITE_INDEXES:
+                    index = next(i for i in model._meta.indexes if i.name == name)
+                    editor.remove_index(model, index)
+                result = self.collect(user_id)
+                raise _Rollback
+        except _Rollback:
+            pass
+        return result
+
+    def indent(self, plan):
+        return '\n'.join('    ' + line for line in plan.splitlines())
@@ -0,0 +1,41 @@
+# Load daily Statistics from a CSV or NDJSON export
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import importer
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream a CSV or NDJSON file ("-" for stdin) into the statistics table, upserting on record_date. '
+        'Columns are the Statistics field names; missing columns are left untouched on existing days.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--fmt', choices=importer.FORMATS, help='Defaults to the file extension (CSV otherwise)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Validate only')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['fmt'] or importer.detect_format(path)
+        if path == '-':
+            result = importer.import_statistics(sys.stdin.buffer, fmt, options['batch_size'], options['dry_run'])
+        else:
+            try:
+                stream = open(path, 'rb')
+            except OSError as exc:
+                raise CommandError(str(exc))
+            with stream:
+                result = importer.import_statistics(stream, fmt, options['batch_size'], options['dry_run'])
+
+        for error in result.errors:
+            self.stderr.write(f'line {error["line"]}: {error["errors"]}')
+        if result.error_count > len(result.errors):
+            self.stderr.write(f'... and {result.error_count - len(result.errors)} more')
+        verb = 'Validated' if options['dry_run'] else 'Upserted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {result.upserted if not options["dry_run"] else result.rows - result.error_count} '
+            f'of {result.rows} row(s) ({result.first_date} .. {result.last_date}), {result.error_count} error(s)'))
@@ -0,0 +1,103 @@
+# Concurrent HTTP load generator for comparing WSGI and ASGI deployments
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = [
+    'tasks/',
+    'tasks/progress/',
+    'notifications/',
+    'notifications/unread_count/',
+    'activities/',
+    'statistics/dashboard/',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Hammer the read endpoints of a running server and report throughput and latency. '
+        'Run once against the WSGI deployment (--prefix "") and once against the ASGI one '
+        '(--prefix async/) to compare them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000/api/')
+        parser.add_argument('--prefix', default='', help='Path prefix, e.g. "async/" for the native async views')
+        parser.add_argument('--path', action='append', dest='paths', help='Endpoint to hit (repeatable)')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run')
+        parser.add_argument('--token', help='Access token; otherwise --email/--password are used to log in')
+        parser.add_argument('--email', default='admin@example.com')
+        parser.add_argument('--password', default='admin123')
+
+    def handle(self, *args, **options):
+        base = options['base_url'].rstrip('/') + '/'
+        token = options['token'] or self.login(base, options['email'], options['password'])
+        urls = [base + options['prefix'] + path for path in (options['paths'] or DEFAULT_PATHS)]
+        headers = {'Authorization': f'Bearer {token}'}
+
+        latencies = {url: [] for url in urls}
+        errors = {url: 0 for url in urls}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options['duration']
+
+        def worker(offset):
+            index = offset
+            while time.perf_counter() < deadline:
+                url = urls[index % len(urls)]
+                index += 1
+                started = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=30) as resp:
+                        resp.read()
+                    ok = True
+                except (urllib.error.URLError, OSError):
+                    ok = False
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if ok:
+                        latencies[url].append(elapsed)
+                    else:
+                        errors[url] += 1
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['concurrency'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+        total = sum(len(values) for values in latencies.values())
+        self.stdout.write(f'{"endpoint":<45} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}')
+        for url in urls:
+            values = sorted(latencies[url])
+            self.stdout.write(
+                f'{url[len(base):]:<45} {len(values) / wall:>8.1f} {self.pct(values, 50):>8.1f} '
+                f'{self.pct(values, 95):>8.1f} {self.pct(values, 99):>8.1f} {errors[url]:>7}')
+        all_values = sorted(v for values in latencies.values() for v in values)
+        self.stdout.write(self.style.SUCCESS(
+            f'total: {total / wall:.1f} req/s over {wall:.1f}s at concurrency {options["concurrency"]}, '
+            f'mean {statistics.mean(all_values) * 1000 if all_values else 0:.1f} ms, '
+            f'errors {sum(errors.values())}'))
+
+    def login(self, base, email, password):
+        body = json.dumps({'email': email, 'password': password}).encode()
+        request = urllib.request.Request(base + 'auth/login/', data=body,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=30) as resp:
+                return json.loads(resp.read())['tokens']['access']
+        except (urllib.error.URLError, KeyError, ValueError) as exc:
+            raise CommandError(f'Login failed: {exc}')
+
+    def pct(self, values, percentile):
+        if not values:
+            return 0.0
+        index = min(len(values) - 1, int(len(values) * percentile / 100))
+        return values[index] * 1000
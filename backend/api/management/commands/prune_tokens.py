@@ -0,0 +1,46 @@
+# Delete expired refresh tokens from the simplejwt blacklist tables in batches
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete outstanding and blacklisted refresh tokens that expired more than --grace-hours ago. '
+        'Rows are removed in short transactions of --batch-size so it can run from cron on a live database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--grace-hours', type=float, default=0,
+                            help='Keep tokens for this long after they expire')
+        parser.add_argument('--sleep', type=float, default=0,
+                            help='Seconds to pause between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be deleted')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        expired = OutstandingToken.objects.filter(expires_at__lt=cutoff)
+
+        if options['dry_run']:
+            blacklisted = BlacklistedToken.objects.filter(token__expires_at__lt=cutoff).count()
+            self.stdout.write(f'Would delete {expired.count()} outstanding and {blacklisted} blacklisted token(s)')
+            return
+
+        outstanding_total = blacklisted_total = 0
+        while True:
+            ids = list(expired.order_by('id').values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            with transaction.atomic():
+                blacklisted_total += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+                outstanding_total += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {outstanding_total} outstanding and {blacklisted_total} blacklisted token(s)'))
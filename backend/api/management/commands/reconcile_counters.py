@@ -0,0 +1,17 @@
+# Recompute the denormalized per-user counters from the source tables
+from django.core.management.base import BaseCommand
+
+from api import counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute task and notification counters for every user (or the given ones)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help='Only reconcile this user id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = counters.reconcile(options['users'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Reconciled counters, {fixed} row(s) corrected'))
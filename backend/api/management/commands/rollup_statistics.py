@@ -0,0 +1,35 @@
+# Rebuild the weekly and monthly Statistics rollups
+from argparse import ArgumentTypeError
+
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from api import charts
+
+
+def day(value):
+    """argparse type: YYYY-MM-DD, rejecting malformed and impossible dates"""
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ArgumentTypeError(f'invalid date {value!r}, expected YYYY-MM-DD')
+    return parsed
+
+
+class Command(BaseCommand):
+    help = 'Recompute weekly and monthly Statistics rollups (all of them, or those overlapping a date range)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', type=day, help='First day (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='end', type=day, help='Last day (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        start, end = options['start'], options['end']
+        if start and not end:
+            end = start
+        if end and not start:
+            start = end
+        written = charts.refresh_rollups(start, end)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} rollup row(s)'))
@@ -0,0 +1,47 @@
+# Report the slow-query log
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from api.models import SlowQuery
+
+
+class Command(BaseCommand):
+    help = 'List the slowest query fingerprints by total time (or count / max), with their EXPLAIN plans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--order', choices=('total', 'count', 'max', 'avg'), default='total')
+        parser.add_argument('--view', help='Only fingerprints first seen in views containing this text')
+        parser.add_argument('--plans', action='store_true', help='Print the stored EXPLAIN plan and sample SQL')
+        parser.add_argument('--width', type=int, default=120, help='Truncate fingerprints to this many characters')
+        parser.add_argument('--reset', action='store_true', help='Delete the log after printing it')
+
+    def handle(self, *args, **options):
+        ordering = {
+            'total': '-total_time',
+            'count': '-count',
+            'max': '-max_time',
+            'avg': F('total_time') / F('count'),
+        }[options['order']]
+        rows = SlowQuery.objects.all()
+        if options['view']:
+            rows = rows.filter(view__icontains=options['view'])
+        rows = rows.order_by(ordering.desc() if options['order'] == 'avg' else ordering)[:options['limit']]
+
+        self.stdout.write(f'{"total s":>9} {"count":>8} {"avg ms":>9} {"max ms":>9}  view / fingerprint')
+        for row in rows:
+            self.stdout.write(
+                f'{row.total_time:9.2f} {row.count:8d} {row.total_time * 1000 / max(row.count, 1):9.1f} '
+                f'{row.max_time * 1000:9.1f}  {row.view or "-"} [{row.fingerprint_hash[:12]}]')
+            fingerprint = row.fingerprint
+            if len(fingerprint) > options['width']:
+                fingerprint = fingerprint[:options['width'] - 3] + '...'
+            self.stdout.write(f'{"":>39}  {fingerprint}')
+            if options['plans']:
+                self.stdout.write(f'{"":>39}  sql: {row.sample_sql}')
+                for line in (row.plan or '(no plan)').splitlines():
+                    self.stdout.write(f'{"":>39}  | {line}')
+
+        if options['reset']:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f'Cleared {deleted} fingerprint(s)'))
@@ -0,0 +1,39 @@
+# Local replica stand-in: copy the primary SQLite file over the replica
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from api.replicas import REPLICA
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database into the replica file (DB_REPLICA_NAME) with the SQLite '
+        'backup API, once or every --interval seconds to imitate replication lag. Production replicas '
+        'are kept current by the database server.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help='Keep copying every N seconds')
+
+    def handle(self, *args, **options):
+        alias = REPLICA['ALIAS']
+        if alias is None:
+            raise CommandError('No replica configured (set DB_REPLICA_NAME)')
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[alias]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError('sync_replica only copies SQLite files; use server replication otherwise')
+        if str(primary.settings_dict['NAME']) == str(replica.settings_dict['NAME']):
+            raise CommandError('The replica and the primary are the same file')
+
+        while True:
+            started = time.perf_counter()
+            primary.ensure_connection()
+            replica.ensure_connection()
+            primary.connection.backup(replica.connection)
+            self.stdout.write(f'Copied {primary.settings_dict["NAME"]} to {replica.settings_dict["NAME"]} '
+                              f'in {(time.perf_counter() - started) * 1000:.0f} ms')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,337 @@
+# Per-route request metrics, exported in the Prometheus text format
+import atexit
+import contextvars
+import hmac
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.contrib.auth.models import AnonymousUser
+from django.db.backends.signals import connection_created
+from rest_framework import authentication, permissions
+
+METRICS = {'ENABLED': True, 'DIR': None, 'TOKEN': '', 'FLUSH_INTERVAL': 5, **getattr(settings, 'METRICS', {})}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+HISTOGRAMS = (
+    ('http_request_duration_seconds', 'Time from request to response headers (streams: to the last chunk)',
+     LATENCY_BUCKETS),
+    ('http_request_db_queries', 'Database queries per request', QUERY_BUCKETS),
+    ('http_response_size_bytes', 'Response body size', SIZE_BUCKETS),
+)
+
+
+class RequestStats:
+    """What one request did; filled in by the database wrapper while it is current"""
+    __slots__ = ('started', 'queries', 'db_time', 'size')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.size = 0
+
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper; contextvars follow sync_to_async, so async views are counted too"""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+def install_wrapper(sender, connection, **kwargs):
+    # connection_created fires on every reconnect; wrap each connection object once
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def _histogram(buckets):
+    # Per-bucket counts (the last one is +Inf), then the sum
+    return [0] * (len(buckets) + 1) + [0.0]
+
+
+def _observe(histogram, buckets, value):
+    histogram[bisect_left(buckets, value)] += 1
+    histogram[-1] += value
+
+
+class Registry:
+    """
+    Metrics of this process, keyed by (method, route).
+
+    With METRICS['DIR'] set, every process also writes its totals to
+    DIR/<pid>.json at most every FLUSH_INTERVAL seconds and the exporter sums
+    all files, so any worker can answer a scrape for the whole server.
+    """
+
+    def __init__(self, directory=None, flush_interval=5):
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.routes = {}
+        self.responses = {}
+        self._flushed = time.monotonic()
+
+    def observe(self, method, route, status, stats, duration):
+        with self._lock:
+            if self.pid != os.getpid():
+                # Forked after import (e.g. gunicorn --preload): start from zero
+                self._reset()
+            key = (method, route)
+            route_stats = self.routes.get(key)
+            if route_stats is None:
+                route_stats = self.routes[key] = {
+                    'duration': _histogram(LATENCY_BUCKETS),
+                    'queries': _histogram(QUERY_BUCKETS),
+                    'size': _histogram(SIZE_BUCKETS),
+                    'db_time': 0.0,
+                }
+            _observe(route_stats['duration'], LATENCY_BUCKETS, duration)
+            _observe(route_stats['queries'], QUERY_BUCKETS, stats.queries)
+            _observe(route_stats['size'], SIZE_BUCKETS, stats.size)
+            route_stats['db_time'] += stats.db_time
+            status_key = (method, route, str(status))
+            self.responses[status_key] = self.responses.get(status_key, 0) + 1
+            due = self.directory and time.monotonic() - self._flushed >= self.flush_interval
+        if due:
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'routes': [[*key, {name: list(values) if isinstance(values, list) else values
+                                   for name, values in route_stats.items()}]
+                           for key, route_stats in self.routes.items()],
+                'responses': [[*key, count] for key, count in self.responses.items()],
+            }
+
+    def flush(self):
+        """Write this process's totals for the other workers (atomic rename)"""
+        if not self.directory:
+            return
+        self._flushed = time.monotonic()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f'{os.getpid()}.json'
+        temporary = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        temporary.write_text(json.dumps(self.snapshot()))
+        os.replace(temporary, path)
+
+    def collect(self):
+        """Totals over every process that has written a file (dead ones included, so counters never drop)"""
+        snapshots = [self.snapshot()]
+        if self.directory and self.directory.is_dir():
+            own = f'{os.getpid()}.json'
+            for path in self.directory.glob('*.json'):
+                if path.name == own:
+                    continue
+                try:
+                    snapshots.append(json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    # Being replaced right now; its numbers arrive on the next scrape
+                    continue
+        return merge(snapshots)
+
+
+def merge(snapshots):
+    """Sum snapshots into ({(method, route): stats}, {(method, route, status): count})"""
+    routes, responses = {}, {}
+    for snapshot in snapshots:
+        for method, route, route_stats in snapshot['routes']:
+            total = routes.get((method, route))
+            if total is None:
+                routes[(method, route)] = {name: list(values) if isinstance(values, list) else values
+                                           for name, values in route_stats.items()}
+                continue
+            for name, values in route_stats.items():
+                if isinstance(values, list):
+                    total[name] = [a + b for a, b in zip(total[name], values)]
+                else:
+                    total[name] += values
+        for method, route, status, count in snapshot['responses']:
+            responses[(method, route, status)] = responses.get((method, route, status), 0) + count
+    return routes, responses
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(routes, responses):
+    """Prometheus text exposition format 0.0.4"""
+    lines = [
+        '# HELP http_requests_total Requests by route and status',
+        '# TYPE http_requests_total counter',
+    ]
+    for (method, route, status), count in sorted(responses.items()):
+        lines.append(f'http_requests_total{_labels(method=method, route=route, status=status)} {count}')
+
+    for (name, help_text, buckets), field in zip(HISTOGRAMS, ('duration', 'queries', 'size')):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for (method, route), route_stats in sorted(routes.items()):
+            values = route_stats[field]
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), values):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(method=method, route=route, le=bound)} {cumulative}')
+            labels = _labels(method=method, route=route)
+            lines.append(f'{name}_sum{labels} {_number(values[-1])}')
+            lines.append(f'{name}_count{labels} {cumulative}')
+
+    lines += [
+        '# HELP http_request_db_seconds_total Time spent in database queries',
+        '# TYPE http_request_db_seconds_total counter',
+    ]
+    for (method, route), route_stats in sorted(routes.items()):
+        lines.append(f'http_request_db_seconds_total{_labels(method=method, route=route)} '
+                     f'{_number(route_stats["db_time"])}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = Registry(METRICS['DIR'], METRICS['FLUSH_INTERVAL'])
+if METRICS['ENABLED']:
+    connection_created.connect(install_wrapper, dispatch_uid='api.metrics.install_wrapper')
+    atexit.register(registry.flush)
+
+
+def route_name(request):
+    # URL names keep the label set small: 'task-detail', not one series per id
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unmatched'
+
+
+class MetricsMiddleware:
+    """
+    Record latency, query count, database time and response size per route.
+
+    Works for sync and async views. Streaming responses are recorded when the
+    stream ends, including the queries run while it was being consumed.
+    Put it first in MIDDLEWARE so the numbers cover the whole stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not METRICS['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats)
+
+    def finish(self, request, response, stats):
+        method, route, status = request.method, route_name(request), response.status_code
+
+        def done():
+            registry.observe(method, route, status, stats, time.perf_counter() - stats.started)
+
+        if not response.streaming:
+            stats.size = len(response.content)
+            done()
+        elif response.is_async:
+            response.streaming_content = _astream(response.streaming_content, stats, done)
+        else:
+            response.streaming_content = _stream(response.streaming_content, stats, done)
+        return response
+
+
+def _stream(chunks, stats, done):
+    chunks = iter(chunks)
+    try:
+        while True:
+            token = _current.set(stats)
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            finally:
+                _current.reset(token)
+            stats.size += len(chunk)
+            yield chunk
+    finally:
+        done()
+
+
+async def _astream(chunks, stats, done):
+    chunks = aiter(chunks)
+    try:
+        while True:
+            token = _current.set(stats)
+            try:
+                chunk = await anext(chunks)
+            except StopAsyncIteration:
+                return
+            finally:
+                _current.reset(token)
+            stats.size += len(chunk)
+            yield chunk
+    finally:
+        done()
+
+
+class MetricsTokenAuthentication(authentication.BaseAuthentication):
+    """`Authorization: Bearer <METRICS['TOKEN']>` for the Prometheus scraper; other tokens fall through to JWT"""
+
+    def authenticate(self, request):
+        expected = METRICS['TOKEN']
+        parts = request.headers.get('Authorization', '').split()
+        if not expected or len(parts) != 2 or parts[0] != 'Bearer':
+            return None
+        # Bytes: compare_digest refuses str with non-ASCII characters
+        if hmac.compare_digest(parts[1].encode(), expected.encode()):
+            return AnonymousUser(), 'metrics'
+        return None
+
+
+class CanReadMetrics(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.auth == 'metrics' or bool(request.user and request.user.is_staff)
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_activity_created_at_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCounters',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('tasks_total', models.IntegerField(default=0)),
+                ('tasks_completed', models.IntegerField(default=0)),
+                ('notifications_unread', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'User counters',
+                'db_table': 'user_counters',
+            },
+        ),
+    ]
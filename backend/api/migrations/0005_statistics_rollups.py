@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='statistics',
+            name='expenses',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.CreateModel(
+            name='StatisticsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('week', 'أسبوعي'), ('month', 'شهري')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expenses', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('days', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'statistics_rollups',
+                'ordering': ['period', 'period_start'],
+                'constraints': [models.UniqueConstraint(fields=('period', 'period_start'), name='statistics_rollup_period_uniq')],
+            },
+        ),
+    ]
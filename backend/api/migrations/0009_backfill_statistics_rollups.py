@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+
+def backfill_rollups(apps, schema_editor):
+    # Databases upgraded past 0005 already have Statistics rows; build their rollups.
+    # Self-contained so later changes to api.charts or the models cannot break it.
+    Statistics = apps.get_model('api', 'Statistics')
+    StatisticsRollup = apps.get_model('api', 'StatisticsRollup')
+    for period, truncate in (('week', TruncWeek), ('month', TruncMonth)):
+        rows = (Statistics.objects.annotate(bucket=truncate('record_date'))
+                .order_by()
+                .values('bucket')
+                .annotate(revenue=Sum('revenue'), expenses=Sum('expenses'), days=Count('id')))
+        StatisticsRollup.objects.filter(period=period).delete()
+        StatisticsRollup.objects.bulk_create([
+            StatisticsRollup(
+                period=period,
+                # TruncX returns a datetime on some backends even for a DateField
+                period_start=row['bucket'].date() if isinstance(row['bucket'], datetime) else row['bucket'],
+                revenue=row['revenue'], expenses=row['expenses'], days=row['days'])
+            for row in rows
+        ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_slow_queries'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
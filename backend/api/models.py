@@ -1,6 +1,7 @@
 # API Models for Smart Dashboard
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.db.models.functions import Lower
 from django.utils import timezone
 
 
@@ -11,6 +12,10 @@ class User(AbstractUser):
     
     class Meta:
         db_table = 'users'
+        indexes = [
+            # Login looks users up by LOWER(email)
+            models.Index(Lower('email'), name='users_email_lower_idx'),
+        ]
     
     def __str__(self):
         return self.username
@@ -35,6 +40,10 @@ class Task(models.Model):
     class Meta:
         db_table = 'tasks'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='tasks_user_created_idx'),
+            models.Index(fields=['user', 'completed'], name='tasks_user_completed_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -59,6 +68,10 @@ class Notification(models.Model):
     class Meta:
         db_table = 'notifications'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='notif_user_created_idx'),
+            models.Index(fields=['user', 'is_read'], name='notif_user_read_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -85,11 +98,15 @@ class Activity(models.Model):
     type = models.CharField(max_length=20, choices=TYPE_CHOICES, default='info')
     icon = models.CharField(max_length=20, choices=ICON_CHOICES, default='info')
     title = models.CharField(max_length=255)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the event happens rather than on INSERT, activities may be written in batches later
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         db_table = 'activities'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='activities_user_created_idx'),
+        ]
         verbose_name_plural = 'Activities'
     
     def __str__(self):
@@ -124,6 +141,7 @@ class Statistics(models.Model):
     services_sales = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     subscriptions_sales = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     consulting_sales = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    expenses = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     
     class Meta:
         db_table = 'statistics'
@@ -132,3 +150,104 @@ class Statistics(models.Model):
     
     def __str__(self):
         return f'Statistics for {self.record_date}'
+
+
+class StatisticsRollup(models.Model):
+    """Precomputed weekly and monthly totals of the daily Statistics rows"""
+    PERIOD_CHOICES = [
+        ('week', 'أسبوعي'),
+        ('month', 'شهري'),
+    ]
+    
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    period_start = models.DateField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expenses = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    days = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'statistics_rollups'
+        ordering = ['period', 'period_start']
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'period_start'], name='statistics_rollup_period_uniq'),
+        ]
+    
+    def __str__(self):
+        return f'{self.period} rollup from {self.period_start}'
+
+
+class UserCounters(models.Model):
+    """Denormalized per-user counters kept in step with tasks and notifications"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='counters')
+    tasks_total = models.IntegerField(default=0)
+    tasks_completed = models.IntegerField(default=0)
+    notifications_unread = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'user_counters'
+        verbose_name_plural = 'User counters'
+    
+    def __str__(self):
+        return f'Counters for {self.user_id}'
+
+
+class Broadcast(models.Model):
+    """A notification sent to every active user, fanned out in chunks"""
+    STATUS_CHOICES = [
+        ('pending', 'بانتظار الإرسال'),
+        ('running', 'قيد الإرسال'),
+        ('completed', 'مكتمل'),
+    ]
+    
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='broadcasts')
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    type = models.CharField(max_length=20, choices=Notification.TYPE_CHOICES, default='info')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Recipients are processed in user id order; everything up to here has been sent
+    last_user_id = models.BigIntegerField(default=0)
+    total_recipients = models.IntegerField(default=0)
+    sent_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'broadcasts'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return self.title
+    
+    @property
+    def progress(self):
+        """Percentage of recipients reached"""
+        if self.status == 'completed':
+            return 100
+        if not self.total_recipients:
+            return 0
+        return min(round(self.sent_count * 100 / self.total_recipients), 100)
+
+
+class SlowQuery(models.Model):
+    """Queries over the slow-query threshold, aggregated by normalized SQL"""
+    fingerprint_hash = models.CharField(max_length=40, unique=True)
+    fingerprint = models.TextField()
+    # SQL of the first occurrence (placeholders only), the one EXPLAIN ran for
+    sample_sql = models.TextField()
+    view = models.CharField(max_length=255, blank=True)
+    database = models.CharField(max_length=100, default='default')
+    count = models.BigIntegerField(default=0)
+    total_time = models.FloatField(default=0)  # seconds
+    max_time = models.FloatField(default=0)  # seconds
+    plan = models.TextField(blank=True)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'slow_queries'
+        ordering = ['-total_time']
+        verbose_name_plural = 'Slow queries'
+    
+    def __str__(self):
+        return self.fingerprint[:80]
@@ -0,0 +1,168 @@
+# Pagination for per-user timelines
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _value(item, field):
+    """Read a field from a model instance or a `.values()` row"""
+    if isinstance(item, dict):
+        return item[field]
+    return getattr(item, field)
+
+
+def encode_cursor(created_at, pk):
+    """Build an opaque cursor pointing just after (created_at, pk)"""
+    payload = json.dumps([created_at.isoformat(), pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (created_at, pk) for a cursor, or raise ValueError"""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    created_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    created_at = parse_datetime(created_at)
+    if created_at is None or not isinstance(pk, int):
+        raise ValueError(cursor)
+    return created_at, pk
+
+
+def keyset_queryset(queryset, cursor):
+    """Order newest first and skip everything up to the cursor position"""
+    queryset = queryset.order_by('-created_at', '-id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    return queryset
+
+
+def _split_page(rows, page_size):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(_value(last, 'created_at'), _value(last, 'id'))
+    return rows, next_cursor
+
+
+def keyset_page(queryset, cursor, page_size):
+    """
+    Return (rows, next_cursor) for one page of a queryset ordered newest first.
+
+    The position is kept on (created_at, id) so every page is a single index
+    range scan no matter how deep it is.
+    """
+    rows = list(keyset_queryset(queryset, cursor)[:page_size + 1])
+    return _split_page(rows, page_size)
+
+
+async def akeyset_page(queryset, cursor, page_size):
+    """Async variant of keyset_page()"""
+    rows = [row async for row in keyset_queryset(queryset, cursor)[:page_size + 1]]
+    return _split_page(rows, page_size)
+
+
+class TimelinePagination(PageNumberPagination):
+    """
+    Page-number pagination with an opt-in keyset mode.
+
+    - `?pagination=cursor` (or any `?cursor=`) switches to keyset paging on
+      (created_at, id). No COUNT and no OFFSET are issued; pass `count=true`
+      to get the total anyway.
+    - `?count=false` keeps page numbers but skips the COUNT query.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    count_query_param = 'count'
+    invalid_cursor_message = 'مؤشر الصفحة غير صالح'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.mode = 'page'
+        self.with_count = self._flag(request, default=True)
+
+        if self.cursor_query_param in request.query_params or \
+                request.query_params.get(self.mode_query_param) == 'cursor':
+            return self.paginate_keyset(queryset, request)
+        if not self.with_count:
+            return self.paginate_without_count(queryset, request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def paginate_keyset(self, queryset, request):
+        self.mode = 'cursor'
+        self.with_count = self._flag(request, default=False)
+        self.total = queryset.count() if self.with_count else None
+        try:
+            rows, self.next_cursor = keyset_page(
+                queryset, request.query_params.get(self.cursor_query_param), self.get_page_size(request))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return rows
+
+    def paginate_without_count(self, queryset, request):
+        self.mode = 'uncounted'
+        page_size = self.get_page_size(request)
+        try:
+            self.page_number = max(int(request.query_params.get(self.page_query_param, 1)), 1)
+        except ValueError:
+            raise NotFound(self.invalid_page_message.format(page_number='', message=''))
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def get_paginated_response(self, data):
+        if self.mode == 'page':
+            return super().get_paginated_response(data)
+
+        body = OrderedDict()
+        if self.with_count:
+            body['count'] = self.total
+        body['next'] = self.get_next_link()
+        if self.mode == 'uncounted':
+            body['previous'] = self.get_previous_link()
+        body['results'] = data
+        return Response(body)
+
+    def get_next_link(self):
+        if self.mode == 'page':
+            return super().get_next_link()
+        url = self.request.build_absolute_uri()
+        if self.mode == 'cursor':
+            if not self.next_cursor:
+                return None
+            url = remove_query_param(url, self.mode_query_param)
+            return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+        if not self.has_next:
+            return None
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        if self.mode == 'page':
+            return super().get_previous_link()
+        if self.page_number <= 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+    def _flag(self, request, default):
+        value = request.query_params.get(self.count_query_param)
+        if value is None:
+            return default
+        return value.lower() not in ('0', 'false', 'no')
+
+
+class ActivityPagination(TimelinePagination):
+    """The activity feed shows the latest 10 entries per page"""
+    page_size = 10
@@ -0,0 +1,70 @@
+# JSON rendering and parsing with orjson, falling back to DRF's stdlib encoder
+from django.conf import settings
+from rest_framework import parsers, renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib backend is used instead
+    orjson = None
+
+JSON = {'BACKEND': getattr(settings, 'JSON_BACKEND', 'orjson')}
+
+# Dates, times and the types orjson does not know go through DRF's encoder,
+# so the output matches JSONRenderer byte for byte (Decimal -> float, UTC -> 'Z')
+_encoder = JSONEncoder()
+_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+# JSONRenderer escapes these so the output is also valid JavaScript
+_LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+def use_orjson():
+    return orjson is not None and JSON['BACKEND'] == 'orjson'
+
+
+def dumps(data):
+    """UTF-8 JSON bytes, compact, the same as the API renders them"""
+    if use_orjson():
+        try:
+            return _escape(orjson.dumps(data, default=_encoder.default, option=_OPTIONS))
+        except orjson.JSONEncodeError:
+            # e.g. integers over 64 bits; the stdlib handles them
+            pass
+    return renderers.JSONRenderer().render(data)
+
+
+def _escape(content):
+    for raw, escaped in _LINE_SEPARATORS:
+        if raw in content:
+            content = content.replace(raw, escaped)
+    return content
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer with orjson doing the encoding; indented output still uses the stdlib"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (not use_orjson() or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {})):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class FastJSONParser(parsers.JSONParser):
+    """JSONParser with orjson doing the decoding"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if not use_orjson():
+            return super().parse(stream, media_type, parser_context)
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            body = stream.read()
+            if encoding.lower().replace('-', '') != 'utf8':
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,162 @@
+# Read-replica routing: safe requests read from the replica until they write
+import contextvars
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA = {'ALIAS': 'replica' if 'replica' in settings.DATABASES else None}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingState:
+    """Where the current request may read from; shared by every thread serving it"""
+    __slots__ = ('replica', 'pinned')
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.pinned = False
+
+
+# Unset outside requests (commands, background threads): everything uses the primary
+_state = contextvars.ContextVar('replica_routing', default=None)
+
+
+def use_replica(request, view_func=None):
+    """Safe methods read from the replica unless the view sets `replica_reads = False`"""
+    if request.method not in SAFE_METHODS:
+        return False
+    view = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None) or view_func
+    return getattr(view, 'replica_reads', True)
+
+
+class ReplicaRouter:
+    """
+    Send reads of safe requests to the replica alias.
+
+    Any write pins the rest of the request to the primary, so it reads its
+    own writes, and reads inside a transaction on the primary stay there.
+    Writes and migrations always go to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias, state = REPLICA['ALIAS'], _state.get()
+        if alias is None or state is None or not state.replica or state.pinned:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Same data on both sides
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema through replication
+        return db != REPLICA['ALIAS']
+
+
+def pin_to_primary():
+    """Read the rest of this request from the primary (e.g. before a read that must be fresh)"""
+    state = _state.get()
+    if state is not None:
+        state.pinned = True
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block only; a write in it still pins the request"""
+    outer = _state.get()
+    inner = RoutingState(False)
+    token = _state.set(inner)
+    try:
+        yield
+    finally:
+        _state.reset(token)
+        if inner.pinned and outer is not None:
+            outer.pinned = True
+
+
+class ReplicaMiddleware:
+    """
+    Set up routing for each request. Streaming responses keep it while they
+    are consumed, so exports read from the replica too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if REPLICA['ALIAS'] is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state = RoutingState(use_replica(request))
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        state = RoutingState(use_replica(request))
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(response, state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if state is not None and state.replica:
+            state.replica = use_replica(request, view_func)
+
+    def finish(self, response, state):
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _astream(response.streaming_content, state)
+            else:
+                response.streaming_content = _stream(response.streaming_content, state)
+        return response
+
+
+def _stream(chunks, state):
+    chunks = iter(chunks)
+    while True:
+        token = _state.set(state)
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        finally:
+            _state.reset(token)
+        yield chunk
+
+
+async def _astream(chunks, state):
+    chunks = aiter(chunks)
+    while True:
+        token = _state.set(state)
+        try:
+            chunk = await anext(chunks)
+        except StopAsyncIteration:
+            return
+        finally:
+            _state.reset(token)
+        yield chunk
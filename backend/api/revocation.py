@@ -0,0 +1,143 @@
+# Refresh-token blacklist checked from memory instead of the database
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as BaseTokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+BLACKLIST = {'REFRESH_INTERVAL': 5, **getattr(settings, 'TOKEN_BLACKLIST', {})}
+
+
+class BlacklistSet:
+    """
+    Blacklisted JTIs held in process.
+
+    The first check loads every unexpired entry; after that only rows with a
+    higher id than the last one seen are fetched, at most once per
+    REFRESH_INTERVAL seconds. Expired JTIs are dropped as they age out.
+    """
+
+    def __init__(self, refresh_interval=5):
+        self.refresh_interval = refresh_interval
+        self._jtis = {}  # jti -> expiry (epoch seconds)
+        self._last_id = None
+        self._next_refresh = 0.0
+        self._next_purge = 0.0
+        self._lock = threading.Lock()
+
+    def __contains__(self, jti):
+        self.refresh()
+        exp = self._jtis.get(jti)
+        return exp is not None and exp > time.time()
+
+    def add(self, jti, exp):
+        with self._lock:
+            self._jtis[jti] = exp
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now < self._next_refresh:
+            return
+        with self._lock:
+            if not force and now < self._next_refresh:
+                return
+            rows = BlacklistedToken.objects.order_by('id')
+            if self._last_id is None:
+                last_id = rows.aggregate(last=Max('id'))['last'] or 0
+                rows = rows.filter(id__lte=last_id, token__expires_at__gt=timezone.now())
+            else:
+                last_id = self._last_id
+                rows = rows.filter(id__gt=last_id)
+            for pk, jti, expires_at in rows.values_list('id', 'token__jti', 'token__expires_at').iterator():
+                self._jtis[jti] = expires_at.timestamp()
+                last_id = max(last_id, pk)
+            self._last_id = last_id
+            if now >= self._next_purge:
+                self._purge()
+                self._next_purge = now + 300
+            self._next_refresh = now + self.refresh_interval
+
+    def clear(self):
+        with self._lock:
+            self._jtis.clear()
+            self._last_id = None
+            self._next_refresh = 0.0
+
+    def __len__(self):
+        return len(self._jtis)
+
+    def _purge(self):
+        cutoff = time.time()
+        self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp > cutoff}
+
+
+blacklisted_jtis = BlacklistSet(BLACKLIST['REFRESH_INTERVAL'])
+
+
+class RefreshToken(BaseRefreshToken):
+    """
+    RefreshToken whose blacklist check uses the in-process BlacklistSet.
+
+    The set can lag behind other workers (by REFRESH_INTERVAL, or for good if
+    their insert commits out of id order), so blacklist() also refuses a token
+    that is already in the table: a rotated refresh token cannot be used twice.
+
+    Rotation still writes to the database: blacklisting the old token and
+    recording the new one are one INSERT each. blacklist() and outstand()
+    skip simplejwt's extra user and get_or_create lookups, so a refresh is
+    four queries (user check, outstanding lookup, two INSERTs) instead of eight.
+    """
+
+    def check_blacklist(self):
+        if self.payload[jwt_settings.JTI_CLAIM] in blacklisted_jtis:
+            raise TokenError('Token is blacklisted')
+
+    def _outstanding_fields(self):
+        return {
+            'jti': self.payload[jwt_settings.JTI_CLAIM],
+            'token': str(self),
+            'created_at': self.current_time,
+            'expires_at': datetime_from_epoch(self.payload['exp']),
+        }
+
+    def _user(self):
+        User = get_user_model()
+        return User.objects.filter(**{jwt_settings.USER_ID_FIELD: self.payload.get(jwt_settings.USER_ID_CLAIM)}).first()
+
+    def blacklist(self):
+        jti = self.payload[jwt_settings.JTI_CLAIM]
+        # Tokens issued by tokens_for_user() are already outstanding; the user is only needed otherwise
+        token = OutstandingToken.objects.filter(jti=jti).first()
+        if token is None:
+            token, _ = OutstandingToken.objects.get_or_create(
+                jti=jti, defaults={**self._outstanding_fields(), 'user': self._user()})
+        try:
+            # The unique token_id makes the INSERT itself the "already blacklisted" check
+            with transaction.atomic():
+                entry, created = BlacklistedToken.objects.create(token=token), True
+        except IntegrityError:
+            entry, created = None, False
+        blacklisted_jtis.add(jti, self.payload['exp'])
+        if not created:
+            raise TokenError('Token is blacklisted')
+        return entry, created
+
+    def outstand(self):
+        """Record a freshly issued token; its new jti cannot be in the table yet"""
+        user_id = self.payload.get(jwt_settings.USER_ID_CLAIM)
+        if jwt_settings.USER_ID_FIELD != get_user_model()._meta.pk.name:
+            return OutstandingToken.objects.create(**self._outstanding_fields(), user=self._user())
+        return OutstandingToken.objects.create(**self._outstanding_fields(), user_id=user_id)
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    token_class = RefreshToken
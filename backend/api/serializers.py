@@ -1,7 +1,8 @@
 # Serializers for API
 from rest_framework import serializers
 from django.contrib.auth import authenticate
-from .models import User, Task, Notification, Activity, Statistics
+from .authentication import normalize_email, users_by_email
+from .models import User, Task, Notification, Activity, Statistics, Broadcast
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -21,6 +22,12 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         model = User
         fields = ['username', 'email', 'password', 'password_confirm', 'first_name', 'last_name']
     
+    def validate_email(self, value):
+        value = normalize_email(value)
+        if value and users_by_email(value).exists():
+            raise serializers.ValidationError('هذا البريد الإلكتروني مستخدم بالفعل')
+        return value
+    
     def validate(self, data):
         if data['password'] != data['password_confirm']:
             raise serializers.ValidationError({'password_confirm': 'كلمات المرور غير متطابقة'})
@@ -41,9 +48,8 @@ class LoginSerializer(serializers.Serializer):
         email = data.get('email')
         password = data.get('password')
         
-        try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
+        user = users_by_email(email).first()
+        if user is None:
             raise serializers.ValidationError({'email': 'لا يوجد حساب بهذا البريد الإلكتروني'})
         
         if not user.check_password(password):
@@ -116,6 +122,24 @@ class StatisticsSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class StatisticsImportSerializer(serializers.ModelSerializer):
+    """One imported Statistics row; record_date conflicts are resolved by the upsert"""
+    class Meta:
+        model = Statistics
+        exclude = ['id']
+        extra_kwargs = {'record_date': {'validators': []}}
+
+
+class BroadcastSerializer(serializers.ModelSerializer):
+    """Serializer for Broadcast model"""
+    class Meta:
+        model = Broadcast
+        fields = ['id', 'title', 'description', 'type', 'status', 'total_recipients', 'sent_count',
+                  'progress', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = ['id', 'status', 'total_recipients', 'sent_count', 'progress',
+                            'created_at', 'started_at', 'finished_at']
+
+
 class ChartDataSerializer(serializers.Serializer):
     """Serializer for chart data"""
     labels = serializers.ListField(child=serializers.CharField())
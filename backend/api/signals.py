@@ -0,0 +1,32 @@
+# Signal handlers keeping derived data in step with the models
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_user
+from .cache import dashboard_cache
+from .models import Statistics, User
+from . import charts
+
+
+@receiver(post_save, sender=Statistics)
+@receiver(post_delete, sender=Statistics)
+def refresh_statistics_rollups(sender, instance, **kwargs):
+    """Recompute the week and month rollups containing the changed day"""
+    charts.refresh_rollups(instance.record_date, instance.record_date)
+
+
+@receiver(post_save, sender=Statistics)
+@receiver(post_delete, sender=Statistics)
+def invalidate_dashboard_cache(sender, instance, **kwargs):
+    """Bump the dashboard cache version once the write is visible to readers"""
+    transaction.on_commit(dashboard_cache.bump)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop the cached auth user now and again after commit, so a concurrent
+    request cannot re-cache the old row in between"""
+    invalidate_user(instance.pk)
+    transaction.on_commit(lambda: invalidate_user(instance.pk))
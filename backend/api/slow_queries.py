@@ -0,0 +1,236 @@
+# Slow-query log: fingerprints, originating views and EXPLAIN plans
+import atexit
+import contextvars
+import hashlib
+import logging
+import re
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import IntegrityError, connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERIES = {'ENABLED': True, 'THRESHOLD_MS': 200, 'EXPLAIN': True, 'FLUSH_INTERVAL': 5,
+                **getattr(settings, 'SLOW_QUERIES', {})}
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDERS = re.compile(r'%s|\?')
+_IN_LISTS = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)')
+_VALUE_ROWS = re.compile(r'(\([?, ]+\))(?:\s*,\s*\([?, ]+\))+')
+_SPACES = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """
+    SQL with its literals and placeholders replaced by ?, so the same ORM
+    query groups together whatever its parameters. IN lists and multi-row
+    VALUES collapse to one element.
+    """
+    sql = _STRINGS.sub('?', sql)
+    sql = _NUMBERS.sub('?', sql)
+    sql = _PLACEHOLDERS.sub('?', sql)
+    sql = _VALUE_ROWS.sub(r'\1, ...', sql)
+    sql = _IN_LISTS.sub('(?, ...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def fingerprint_hash(shape):
+    return hashlib.sha1(shape.encode()).hexdigest()
+
+
+# The request being served, for naming the view behind a query
+_request = contextvars.ContextVar('slow_query_request', default=None)
+# Set while the log writes its own rows so they are not timed
+_recording = contextvars.ContextVar('slow_query_recording', default=False)
+
+
+def view_name(request):
+    """'api.views.TaskViewSet.list' for the view resolved for `request`"""
+    match = getattr(request, 'resolver_match', None) if request is not None else None
+    if match is None:
+        return request.path if request is not None else ''
+    func = match.func
+    cls = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    if cls is None:
+        return f'{func.__module__}.{func.__qualname__}'
+    name = f'{cls.__module__}.{cls.__qualname__}'
+    action = (getattr(func, 'actions', None) or {}).get(request.method.lower())
+    return f'{name}.{action}' if action else name
+
+
+class SlowQueryLog:
+    """
+    Aggregate slow queries in memory and write them out from a daemon thread.
+
+    Every occurrence is logged right away; the table keeps one row per
+    fingerprint with its count and timings. The first time a fingerprint is
+    stored, its sample SELECT is run through EXPLAIN on the flusher's own
+    connection, so requests never wait for a plan. Parameters are only held
+    for that and never stored (they can be emails, tokens or hashes).
+    """
+
+    def __init__(self, flush_interval):
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def add(self, sql, params, many, elapsed, alias, view):
+        shape = fingerprint(sql)
+        key = fingerprint_hash(shape)
+        logger.warning('Slow query (%.1f ms) in %s [%s]: %s', elapsed * 1000, view or '-', key[:12], shape)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                self._pending[key] = {
+                    'fingerprint': shape, 'sql': sql, 'params': None if many else params, 'view': view,
+                    'database': alias, 'count': 1, 'total_time': elapsed, 'max_time': elapsed,
+                }
+            else:
+                entry['count'] += 1
+                entry['total_time'] += elapsed
+                entry['max_time'] = max(entry['max_time'], elapsed)
+        self._ensure_thread()
+
+    def flush(self):
+        """Write the pending aggregates; returns the number of fingerprints written"""
+        token = _recording.set(True)
+        try:
+            with self._flush_lock:
+                with self._lock:
+                    pending, self._pending = self._pending, {}
+                now = timezone.now()
+                for key, entry in pending.items():
+                    try:
+                        updated = SlowQuery.objects.filter(fingerprint_hash=key).update(
+                            count=F('count') + entry['count'],
+                            total_time=F('total_time') + entry['total_time'],
+                            max_time=Greatest('max_time', entry['max_time']),
+                            last_seen=now,
+                        )
+                        if not updated:
+                            self._create(key, entry, now)
+                    except Exception:
+                        logger.exception('Could not store slow query %s', key[:12])
+                return len(pending)
+        finally:
+            _recording.reset(token)
+
+    def _create(self, key, entry, now):
+        row = SlowQuery(
+            fingerprint_hash=key, fingerprint=entry['fingerprint'], sample_sql=entry['sql'],
+            view=entry['view'][:255], database=entry['database'], count=entry['count'],
+            total_time=entry['total_time'], max_time=entry['max_time'], last_seen=now,
+            plan=explain(entry['database'], entry['sql'], entry['params']) if SLOW_QUERIES['EXPLAIN'] else '',
+        )
+        try:
+            with transaction.atomic():
+                row.save()
+        except IntegrityError:
+            # Another process stored this fingerprint first; add ours to its row
+            SlowQuery.objects.filter(fingerprint_hash=key).update(
+                count=F('count') + row.count, total_time=F('total_time') + row.total_time,
+                max_time=Greatest('max_time', row.max_time), last_seen=now)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='slow-query-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        try:
+            while True:
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                self.flush()
+        finally:
+            connections.close_all()
+
+
+def explain(alias, sql, params):
+    """The query plan of a SELECT, or '' for statements EXPLAIN could change or cannot take"""
+    if params is None or not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return ''
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            rows = cursor.fetchall()
+    except Exception as exc:
+        return f'EXPLAIN failed: {exc}'
+    if connection.vendor == 'sqlite':
+        # (id, parent, notused, detail)
+        return '\n'.join(str(row[-1]) for row in rows)
+    return '\n'.join('\t'.join('' if value is None else str(value) for value in row) for row in rows)
+
+
+log = SlowQueryLog(SLOW_QUERIES['FLUSH_INTERVAL'])
+
+
+def record_slow(execute, sql, params, many, context):
+    """Database execute wrapper that times every query and hands slow ones to the log"""
+    if _recording.get():
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        if elapsed * 1000 >= SLOW_QUERIES['THRESHOLD_MS']:
+            log.add(sql, params, many, elapsed, context['connection'].alias, view_name(_request.get()))
+
+
+def install_wrapper(sender, connection, **kwargs):
+    if record_slow not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_slow)
+
+
+if SLOW_QUERIES['ENABLED']:
+    connection_created.connect(install_wrapper, dispatch_uid='api.slow_queries.install_wrapper')
+    atexit.register(log.flush)
+
+
+class SlowQueryMiddleware:
+    """Remember the current request so slow queries can name their view"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not SLOW_QUERIES['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = _request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _request.reset(token)
+
+    async def __acall__(self, request):
+        token = _request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _request.reset(token)
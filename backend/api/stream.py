@@ -0,0 +1,91 @@
+# Server-Sent Events endpoint (served natively under ASGI)
+import asyncio
+import secrets
+
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from .authentication import aauthenticate
+from .events import get_config, get_hub
+
+
+def ticket_key(ticket):
+    return f'events-ticket:{ticket}'
+
+
+async def consume_ticket(ticket):
+    """
+    The user id a stream ticket was issued to, or None. The ticket is
+    deleted on first use; only the request whose delete succeeds gets in.
+    """
+    if not ticket:
+        return None
+    key = ticket_key(ticket)
+    user_id = await cache.aget(key)
+    if user_id is None or not await cache.adelete(key):
+        return None
+    return user_id
+
+
+async def _messages(user_id, config):
+    hub = get_hub()
+    subscription = hub.subscribe(user_id)
+    try:
+        yield f'retry: {config["RETRY"]}\n\n'
+        yield 'event: ready\ndata: {}\n\n'
+        while True:
+            try:
+                yield await subscription.get(config['HEARTBEAT'])
+            except asyncio.TimeoutError:
+                # Comment line: keeps proxies from closing an idle connection
+                yield ': ping\n\n'
+    finally:
+        hub.unsubscribe(subscription)
+
+
+# Bearer token only, no session cookie to forge a request with
+@csrf_exempt
+async def stream_ticket(request):
+    """
+    Exchange the bearer token for a short-lived, single-use stream ticket.
+
+    EventSource cannot send headers; the ticket goes in the stream URL
+    instead of the access token, so access logs never hold a usable token.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'detail': 'Method not allowed.'}, status=405)
+    user_id = await aauthenticate(request)
+    if user_id is None:
+        return JsonResponse({'detail': 'بيانات الاعتماد غير صالحة'}, status=401)
+    ticket = secrets.token_urlsafe(32)
+    ttl = get_config()['TICKET_TTL']
+    await cache.aset(ticket_key(ticket), user_id, ttl)
+    return JsonResponse({'ticket': ticket, 'expires_in': ttl})
+
+
+async def event_stream(request):
+    """
+    Push notification, activity and counter changes for the current user.
+
+    Each open stream is one coroutine and one bounded queue, so a worker
+    can hold thousands of idle connections. Under WSGI an open stream would
+    tie up a worker thread for good, so the client is told to poll instead.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': 'Method not allowed.'}, status=405)
+    if not isinstance(request, ASGIRequest):
+        response = JsonResponse({'detail': 'البث المباشر يتطلب خادم ASGI', 'fallback': 'polling'}, status=503)
+        response['Retry-After'] = '3600'
+        return response
+    user_id = await aauthenticate(request)
+    if user_id is None:
+        user_id = await consume_ticket(request.GET.get('ticket'))
+    if user_id is None:
+        return JsonResponse({'detail': 'بيانات الاعتماد غير صالحة'}, status=401)
+
+    response = StreamingHttpResponse(_messages(user_id, get_config()), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,159 @@
+# Query and latency budgets for endpoint tests
+import os
+import statistics
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from datetime import date, timedelta
+
+from django.db import connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from api import authentication, broadcasts, charts, counters
+from api.cache import dashboard_cache
+from api.models import User, Task, Notification, Activity, Statistics
+from api.slow_queries import fingerprint
+
+# Rows per table for the main user (other users get the same); PERF_TEST_ROWS=5000 for a heavier run
+ROWS = int(os.environ.get('PERF_TEST_ROWS', 200))
+OTHER_USERS = 3
+STATISTICS_DAYS = 730
+# Latency budgets depend on the machine, so they are only checked with PERF_LATENCY=1;
+# query budgets always are
+CHECK_LATENCY = os.environ.get('PERF_LATENCY', '0') == '1'
+# Multiply every latency budget, e.g. PERF_LATENCY_FACTOR=3 on a slow machine
+LATENCY_FACTOR = float(os.environ.get('PERF_LATENCY_FACTOR', 1))
+# Requests timed per read-only endpoint; the median is compared to the budget
+RUNS = int(os.environ.get('PERF_TEST_RUNS', 3))
+
+
+def assert_latency(test, elapsed, ms, label):
+    """Fail `test` if `elapsed` ms is over the `ms` budget (only with PERF_LATENCY=1)"""
+    if CHECK_LATENCY:
+        budget = ms * LATENCY_FACTOR
+        test.assertLessEqual(elapsed, budget, f'{label}: {elapsed:.1f} ms, budget {budget:.0f} ms ({ROWS} rows/table)')
+
+
+def describe_queries(queries, budget):
+    """
+    Readable report of an over-budget request.
+
+    Queries within the budget are prefixed with a space and the extra ones
+    with '+', like a diff against the budget; statements that ran more than
+    once are listed afterwards since they are the usual N+1 suspects.
+    """
+    lines = [f'{len(queries)} queries executed, budget is {budget} (+{len(queries) - budget}):']
+    for index, query in enumerate(queries, start=1):
+        lines.append(f'{" " if index <= budget else "+"} {index:>3}. {query["sql"]}')
+    repeated = [(count, shape) for shape, count in
+                Counter(fingerprint(query['sql']) for query in queries).items() if count > 1]
+    if repeated:
+        lines.append('Repeated statements:')
+        lines.extend(f'  x{count} {shape}' for count, shape in sorted(repeated, reverse=True))
+    return '\n'.join(lines)
+
+
+def seed(user, rows=ROWS, days=STATISTICS_DAYS):
+    """Tasks, notifications and activities for `user`, spread over the last months"""
+    now = timezone.now()
+    Task.objects.bulk_create([
+        Task(user=user, title=f'مهمة {i}', priority=('high', 'medium', 'low')[i % 3],
+             due_date=now.date() + timedelta(days=i % 60) if i % 4 else None, completed=i % 3 == 0)
+        for i in range(rows)])
+    Task.objects.filter(user=user).update(created_at=now - timedelta(hours=1))
+    Notification.objects.bulk_create([
+        Notification(user=user, title=f'إشعار {i}', description='وصف', type='info', is_read=i % 2 == 0,
+                     created_at=now - timedelta(minutes=i * 17))
+        for i in range(rows)])
+    Activity.objects.bulk_create([
+        Activity(user=user, type='info', icon='check', title=f'نشاط {i}', created_at=now - timedelta(minutes=i * 13))
+        for i in range(rows)])
+
+
+def seed_statistics(days=STATISTICS_DAYS):
+    today = timezone.localdate()
+    Statistics.objects.bulk_create([
+        Statistics(record_date=today - timedelta(days=i), revenue=1000 + i, expenses=400 + i, active_users=i)
+        for i in range(days)])
+    charts.refresh_rollups()
+
+
+# Password hashing is slow on purpose; a fast hasher keeps login/register budgets about the view
+@override_settings(ACTIVITY_LOG={'MODE': 'sync'}, FAST_LIST_SERIALIZATION=True,
+                   CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                   PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BudgetTestCase(APITestCase):
+    """
+    APITestCase with `assertBudget()` for an endpoint's query count and latency.
+
+    Every test runs against the same seeded dataset (see ROWS). Requests are
+    force-authenticated so the budgets cover the view itself; the JWT path has
+    its own tests. Caches are process-local (see CACHES), so clearing them
+    never touches a running instance.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='perf', email='perf@example.com', password='perf-pass-1')
+        cls.admin = User.objects.create_user(username='perf-admin', email='perf-admin@example.com',
+                                             password='perf-pass-1', is_staff=True)
+        seed(cls.user)
+        for i in range(OTHER_USERS):
+            seed(User.objects.create_user(username=f'other{i}', email=f'other{i}@example.com', password='x'))
+        seed_statistics()
+        counters.reconcile()
+        cls.today = date.today()
+
+    def setUp(self):
+        dashboard_cache.backend.clear()
+        authentication.user_cache.clear()
+        self._broadcast_mode = broadcasts.BROADCASTS['MODE']
+        broadcasts.BROADCASTS['MODE'] = 'sync'
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        broadcasts.BROADCASTS['MODE'] = self._broadcast_mode
+
+    @contextmanager
+    def queryBudget(self, queries):
+        """Fail with the executed queries if the block runs more than `queries`;
+        on_commit callbacks run inside the block, as they would after a real commit.
+        Queries on every alias the test may use are counted, so routed reads are not
+        missed (TestCase refuses queries on the others)."""
+        with ExitStack() as stack:
+            captured = [stack.enter_context(CaptureQueriesContext(connections[alias]))
+                        for alias in connections if alias in self.databases]
+            with self.captureOnCommitCallbacks(execute=True):
+                yield captured
+        executed = [query for context in captured for query in context.captured_queries
+                    if query['sql'] not in ('BEGIN', 'COMMIT') and not query['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        if len(executed) > queries:
+            self.fail(describe_queries(executed, queries))
+
+    def assertBudget(self, method, url, queries, ms, status=200, runs=None, **kwargs):
+        """
+        Request `url` and check its query count and median latency.
+
+        Read-only requests run `RUNS` times when latency is checked; the first
+        run is the one whose queries are counted (cold caches), the median of
+        all is timed. Extra keyword arguments go to the test client.
+        """
+        runs = runs or (RUNS if method == 'get' and CHECK_LATENCY else 1)
+        timings = []
+        response = None
+        for run in range(runs):
+            started = time.perf_counter()
+            if run == 0:
+                with self.queryBudget(queries):
+                    response = getattr(self.client, method)(url, **kwargs)
+            else:
+                getattr(self.client, method)(url, **kwargs)
+            timings.append((time.perf_counter() - started) * 1000)
+            if run == 0:
+                self.assertEqual(response.status_code, status, getattr(response, 'data', response))
+
+        assert_latency(self, statistics.median(timings), ms, f'{method.upper()} {url}: median of {runs} run(s)')
+        return response
@@ -0,0 +1,84 @@
+import tempfile
+from unittest import mock
+
+from django.test import TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from api import activity_log, archive
+from api.activity_log import ActivityBuffer, build_activity
+from api.models import Activity, User
+from .base import BudgetTestCase, ROWS
+
+
+class ActivityBudgetTests(BudgetTestCase):
+
+    def test_list(self):
+        self.assertBudget('get', reverse('activity-list'), queries=2, ms=60)
+
+    def test_retrieve(self):
+        activity = Activity.objects.filter(user=self.user).first()
+        self.assertBudget('get', reverse('activity-detail', args=[activity.pk]), queries=1, ms=20)
+
+    def test_export(self):
+        response = self.assertBudget('get', reverse('activity-export'), queries=1, ms=100 + ROWS // 20,
+                                     data={'fmt': 'ndjson'})
+        self.assertEqual(b''.join(response.streaming_content).count(b'\n'), ROWS)
+
+    def test_archive(self):
+        with tempfile.TemporaryDirectory() as directory, mock.patch.dict(archive.ARCHIVE, DIR=directory):
+            archive.archive_activities(days=0)
+            month = timezone.now().strftime('%Y-%m')
+            # Served from the file, not the database
+            self.assertBudget('get', reverse('activity-archive'), queries=0, ms=200, data={'month': month})
+
+    def test_archive_reads_own_rows_with_limit(self):
+        with tempfile.TemporaryDirectory() as directory, mock.patch.dict(archive.ARCHIVE, DIR=directory):
+            now = timezone.now()
+            month = now.strftime('%Y-%m')
+            # Months are UTC in the archive
+            first_day = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            expected = list(Activity.objects.filter(user=self.user, created_at__gte=first_day)
+                            .order_by('-created_at', '-id').values_list('id', flat=True))
+            archive.archive_activities(days=0, batch_size=ROWS // 3)
+            response = self.client.get(reverse('activity-archive'), {'month': month, 'limit': 10})
+            self.assertEqual(response.data['count'], len(expected))
+            self.assertEqual([row['id'] for row in response.data['results']], expected[:10])
+
+            # Only this user's members are inflated
+            members = archive._user_members(self.user.id, month)
+            size = archive.archive_path(month).stat().st_size
+            self.assertLess(sum(length for _, length in members), size / 2)
+
+
+class ActivityBufferTests(TransactionTestCase):
+
+    def test_bad_row_does_not_block_the_batch(self):
+        gone = User.objects.create_user(username='gone', email='gone@example.com', password='x')
+        live = User.objects.create_user(username='live', email='live@example.com', password='x')
+        buffer = ActivityBuffer(batch_size=100, flush_interval=60, max_queue=100)
+        buffer._pending = [build_activity(gone, 'info', 'check', 'orphan')]
+        User.objects.filter(pk=gone.pk).delete()
+        buffer._pending.append(build_activity(live, 'info', 'check', 'kept'))
+
+        with self.assertLogs('api.activity_log', 'WARNING'), \
+                mock.patch.object(activity_log.events, 'publish') as publish:
+            self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(buffer._pending, [])
+        self.assertEqual(list(Activity.objects.values_list('title', flat=True)), ['kept'])
+        # Published after the write, with the stored id; the dropped row never is
+        publish.assert_called_once()
+        self.assertEqual(publish.call_args.args[2]['id'], Activity.objects.get().pk)
+
+    def test_buffered_rows_are_published_after_the_flush(self):
+        user = User.objects.create_user(username='buffered', email='buffered@example.com', password='x')
+        buffer = ActivityBuffer(batch_size=100, flush_interval=60, max_queue=100)
+        with mock.patch.object(activity_log, 'get_buffer', return_value=buffer), \
+                mock.patch.dict(activity_log.settings.ACTIVITY_LOG, MODE='buffered'), \
+                mock.patch.object(activity_log.events, 'publish') as publish:
+            activity_log.log_activity(user, 'info', 'check', 'queued')
+            self.assertFalse(Activity.objects.exists())
+            publish.assert_not_called()
+            buffer.shutdown()
+        publish.assert_called_once()
+        self.assertEqual(Activity.objects.get().title, 'queued')
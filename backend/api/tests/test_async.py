@@ -0,0 +1,131 @@
+import contextvars
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from api import authentication, login
+from api.authentication import tokens_for_user
+from api.cache import dashboard_cache
+from api.dashboard import aget_dashboard, get_dashboard
+from api.models import User
+from .base import BudgetTestCase, assert_latency
+
+
+class AsyncBudgetTests(BudgetTestCase):
+    """
+    The native async endpoints, authenticated with a bearer token like real clients.
+
+    The request is driven from the test thread so the views' thread-sensitive
+    database calls land on the connection whose queries are counted.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.client = AsyncClient()
+        self.headers = {'authorization': f'Bearer {tokens_for_user(self.user).access_token}'}
+
+    def assertAsyncBudget(self, url, queries, ms, status=200, **params):
+        started = time.perf_counter()
+        with self.queryBudget(queries):
+            response = async_to_sync(self.client.get)(url, params, headers=self.headers)
+        elapsed = (time.perf_counter() - started) * 1000
+        self.assertEqual(response.status_code, status)
+        assert_latency(self, elapsed, ms, f'GET {url}')
+        return response
+
+    def test_task_list(self):
+        self.assertAsyncBudget(reverse('async-task-list'), queries=3, ms=80)
+
+    def test_task_progress(self):
+        self.assertAsyncBudget(reverse('async-task-progress'), queries=2, ms=30)
+
+    def test_notification_list(self):
+        self.assertAsyncBudget(reverse('async-notification-list'), queries=3, ms=80)
+
+    def test_notification_unread_count(self):
+        self.assertAsyncBudget(reverse('async-notification-unread-count'), queries=2, ms=30)
+
+    def test_activity_list(self):
+        self.assertAsyncBudget(reverse('async-activity-list'), queries=3, ms=80)
+
+    def test_dashboard(self):
+        self.assertAsyncBudget(reverse('async-dashboard'), queries=4, ms=60)
+
+    def test_dashboard_hit_uses_async_cache_reads(self):
+        payload = get_dashboard()
+        # A blocking cache read on the event loop would hit the patched method
+        with mock.patch.object(type(dashboard_cache.backend), 'get', side_effect=AssertionError('blocking read')):
+            self.assertEqual(async_to_sync(aget_dashboard)(), payload)
+
+    def test_cached_user_uses_async_cache_reads(self):
+        self.assertAsyncBudget(reverse('async-task-progress'), queries=2, ms=30)
+        # The user is cached by now; a blocking read on the event loop would hit the patched method
+        backend = type(authentication.user_cache)
+        with mock.patch.object(backend, 'get', side_effect=AssertionError('blocking read')):
+            self.assertAsyncBudget(reverse('async-task-progress'), queries=1, ms=30)
+
+    def test_event_stream_requires_token(self):
+        self.headers = {}
+        self.assertAsyncBudget(reverse('event-stream'), queries=0, ms=30, status=401)
+
+    def test_event_stream_ticket_is_single_use(self):
+        response = async_to_sync(self.client.post)(reverse('event-ticket'), headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        ticket = response.json()['ticket']
+
+        stream = async_to_sync(self.client.get)(reverse('event-stream'), {'ticket': ticket})
+        self.assertEqual(stream.status_code, 200)
+        self.assertEqual(stream['Content-Type'], 'text/event-stream')
+        again = async_to_sync(self.client.get)(reverse('event-stream'), {'ticket': ticket})
+        self.assertEqual(again.status_code, 401)
+        # Access tokens are not accepted in the URL
+        token = self.headers['authorization'].split()[1]
+        self.assertEqual(async_to_sync(self.client.get)(reverse('event-stream'), {'token': token}).status_code, 401)
+
+    def test_event_stream_needs_asgi(self):
+        # The WSGI test client: polling instead of holding a worker thread
+        response = Client().get(reverse('event-stream'), headers=self.headers)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['fallback'], 'polling')
+
+
+@override_settings(ACTIVITY_LOG={'MODE': 'sync'},
+                   PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AsyncLoginBudgetTests(TransactionTestCase):
+    """
+    Login runs on the hashing pool, whose threads have their own connections:
+    the data must be committed for them to see it and their queries cannot be
+    counted here, so only the latency is budgeted (LoginView covers the count).
+    """
+
+    def setUp(self):
+        User.objects.create_user(username='perf', email='perf@example.com', password='perf-pass-1')
+
+    def test_login(self):
+        started = time.perf_counter()
+        response = async_to_sync(AsyncClient().post)(
+            reverse('async-login'), {'email': 'PERF@example.com', 'password': 'perf-pass-1'},
+            content_type='application/json')
+        elapsed = (time.perf_counter() - started) * 1000
+        self.assertEqual(response.status_code, 200)
+        assert_latency(self, elapsed, 100, 'async login')
+
+    def test_request_context_reaches_the_hashing_pool(self):
+        # Metrics labels, replica pinning and the slow-query view name are contextvars
+        marker = contextvars.ContextVar('marker')
+        seen = []
+
+        def fake_login(data):
+            seen.append(marker.get(None))
+            return 200, {}
+
+        async def request():
+            marker.set('request')
+            return await login.alogin({})
+
+        with mock.patch.object(login, 'login', fake_login):
+            self.assertEqual(async_to_sync(request)(), (200, {}))
+        self.assertEqual(seen, ['request'])
@@ -0,0 +1,90 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from api import authentication
+from api.authentication import deactivate_users, tokens_for_user
+from api.models import User
+from api.revocation import blacklisted_jtis
+from .base import BudgetTestCase
+
+
+class AuthBudgetTests(BudgetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Budgets are for the steady state: the in-memory blacklist is loaded once per process
+        blacklisted_jtis.clear()
+        blacklisted_jtis.refresh()
+
+    def test_register(self):
+        self.client.force_authenticate(None)
+        self.assertBudget('post', reverse('register'), queries=11, ms=100, status=201, data={
+            'username': 'new-user', 'email': 'New-User@Example.com',
+            'password': 'new-pass-123', 'password_confirm': 'new-pass-123'})
+
+    def test_login(self):
+        self.client.force_authenticate(None)
+        self.assertBudget('post', reverse('login'), queries=3, ms=100,
+                          data={'email': 'PERF@example.com', 'password': 'perf-pass-1'})
+
+    def test_logout(self):
+        refresh = str(tokens_for_user(self.user))
+        self.assertBudget('post', reverse('logout'), queries=2, ms=50, data={'refresh': refresh})
+
+    def test_current_user(self):
+        self.assertBudget('get', reverse('current-user'), queries=0, ms=20)
+
+    def test_token_refresh(self):
+        self.client.force_authenticate(None)
+        refresh = str(tokens_for_user(self.user))
+        # User check, outstanding lookup, then one INSERT each to blacklist the old token and record the new one
+        response = self.assertBudget('post', reverse('token_refresh'), queries=4, ms=50, data={'refresh': refresh})
+        # Rotated: the old token cannot be used again
+        self.assertEqual(self.client.post(reverse('token_refresh'), {'refresh': refresh}).status_code, 401)
+        self.assertEqual(self.client.post(reverse('token_refresh'), {'refresh': response.data['refresh']}).status_code,
+                         200)
+
+    def test_token_refresh_replay_with_stale_blacklist(self):
+        # Another worker's set has not seen the rotation yet: the INSERT still refuses the replay
+        self.client.force_authenticate(None)
+        refresh = str(tokens_for_user(self.user))
+        self.assertEqual(self.client.post(reverse('token_refresh'), {'refresh': refresh}).status_code, 200)
+        blacklisted_jtis.clear()
+        with mock.patch.object(blacklisted_jtis, 'refresh'):
+            self.assertEqual(self.client.post(reverse('token_refresh'), {'refresh': refresh}).status_code, 401)
+
+
+class JWTAuthenticationBudgetTests(BudgetTestCase):
+    """The bearer-token path: one user lookup on a cold cache, none once warm"""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens_for_user(self.user).access_token}')
+
+    def test_cold_cache(self):
+        self.assertBudget('get', reverse('current-user'), queries=1, ms=20, runs=1)
+
+    def test_warm_cache(self):
+        self.client.get(reverse('current-user'))
+        self.assertBudget('get', reverse('current-user'), queries=0, ms=20)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(reverse('current-user'))
+        deactivate_users(User.objects.filter(pk=self.user.pk))
+        self.assertBudget('get', reverse('current-user'), queries=1, ms=20, status=401)
+
+
+class TokenClaimsTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='claims', email='claims@example.com', password='x')
+
+    def test_profile_claims_only_in_stateless_mode(self):
+        self.assertNotIn('email', tokens_for_user(self.user).access_token)
+        with mock.patch.dict(authentication.USER_CACHE, {'MODE': 'stateless'}):
+            token = tokens_for_user(self.user).access_token
+        self.assertEqual(token['email'], 'claims@example.com')
+        self.assertEqual(authentication.user_from_claims(token).pk, self.user.pk)
@@ -0,0 +1,176 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from django.utils import timezone
+
+from api import authentication, counters, db, metrics, renderers
+from api.cache import dashboard_cache
+from api.dashboard import get_dashboard, sample_statistics
+from api.models import Broadcast, Notification, Statistics, Task, User
+from .base import BudgetTestCase, OTHER_USERS
+
+
+class BootstrapBudgetTests(BudgetTestCase):
+
+    def test_bootstrap(self):
+        self.assertBudget('get', reverse('bootstrap'), queries=7, ms=150, runs=1)
+
+    def test_bootstrap_sections(self):
+        self.assertBudget('get', reverse('bootstrap'), queries=1, ms=30, data={'include': 'progress,unread_count'})
+
+
+class BroadcastBudgetTests(BudgetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.admin)
+
+    def test_create(self):
+        # Sent in this request (sync mode); the count must not depend on the number of users
+        self.assertBudget('post', reverse('broadcast-list'), queries=12, ms=200, status=202,
+                          data={'title': 'صيانة مجدولة', 'description': 'سيتوقف النظام لمدة ساعة'})
+        self.assertEqual(Broadcast.objects.get().sent_count, OTHER_USERS + 2)
+
+    def test_list(self):
+        Broadcast.objects.bulk_create([Broadcast(title=f'بث {i}', created_by=self.admin) for i in range(20)])
+        self.assertBudget('get', reverse('broadcast-list'), queries=2, ms=50)
+
+    def test_resume(self):
+        broadcast = Broadcast.objects.create(title='بث', total_recipients=User.objects.count())
+        self.assertBudget('post', reverse('broadcast-resume', args=[broadcast.pk]), queries=12, ms=200,
+                          status=202)
+
+
+class CounterConsistencyTests(BudgetTestCase):
+    """The incrementally maintained counters must match a recount after any mix of writes"""
+
+    def assertCountersMatch(self):
+        row = counters.get_counters(self.user.id)
+        stored = {field: getattr(row, field) for field in counters.FIELDS}
+        self.assertEqual(stored, counters.compute(self.user.id))
+
+    def test_task_and_notification_writes(self):
+        tasks = list(Task.objects.filter(user=self.user).order_by('id').values_list('id', flat=True)[:30])
+        notification = Notification.objects.filter(user=self.user, is_read=False).first()
+
+        self.client.post(reverse('task-list'), {'title': 'جديدة', 'priority': 'low', 'completed': True})
+        self.client.patch(reverse('task-toggle', args=[tasks[0]]))
+        self.client.patch(reverse('task-detail', args=[tasks[1]]), {'completed': True})
+        self.client.delete(reverse('task-detail', args=[tasks[2]]))
+        self.client.post(reverse('task-bulk-create'), {'tasks': [{'title': 'أ', 'completed': True}, {'title': 'ب'}]},
+                         format='json')
+        self.client.patch(reverse('task-bulk-update'), {'tasks': [{'id': pk, 'completed': True} for pk in tasks[3:10]]},
+                          format='json')
+        self.client.patch(reverse('task-bulk-toggle'), {'ids': tasks[5:15] + tasks[5:7]}, format='json')
+        self.client.post(reverse('task-bulk-delete'), {'ids': tasks[12:20]}, format='json')
+        self.assertCountersMatch()
+
+        self.client.post(reverse('notification-list'), {'title': 'إشعار', 'type': 'info'})
+        self.client.patch(reverse('notification-mark-read', args=[notification.pk]))
+        self.client.patch(reverse('notification-mark-read', args=[notification.pk]))
+        self.client.delete(reverse('notification-detail', args=[
+            Notification.objects.filter(user=self.user, is_read=False).first().pk]))
+        self.assertCountersMatch()
+        self.client.patch(reverse('notification-mark-all-read'))
+        self.assertCountersMatch()
+
+
+class FastListSerializationTests(BudgetTestCase):
+    """FAST_LIST_SERIALIZATION must not change a single byte of the list responses"""
+
+    def test_same_bytes_as_serializers(self):
+        now = timezone.now()
+        for name in ('task-list', 'notification-list', 'activity-list'):
+            for params in ({}, {'page': 2}, {'pagination': 'cursor'}):
+                with self.subTest(name=name, params=params), mock.patch('django.utils.timezone.now', return_value=now):
+                    fast = self.client.get(reverse(name), params)
+                    with override_settings(FAST_LIST_SERIALIZATION=False):
+                        plain = self.client.get(reverse(name), params)
+                    self.assertEqual(fast.status_code, 200)
+                    self.assertEqual(fast.content, plain.content)
+
+
+class SeedBudgetTests(BudgetTestCase):
+
+    def test_seed(self):
+        self.client.force_authenticate(None)
+        Statistics.objects.filter(record_date=timezone.now().date()).delete()
+        self.assertBudget('post', reverse('seed-data'), queries=30, ms=1000, status=201)
+
+
+class MetricsBudgetTests(BudgetTestCase):
+
+    def test_metrics(self):
+        self.client.get(reverse('task-list'))
+        self.client.force_authenticate(self.admin)
+        response = self.assertBudget('get', reverse('metrics'), queries=0, ms=30)
+        self.assertIn(b'http_request_db_queries_count{method="GET",route="task-list"}', response.content)
+
+    def test_metrics_requires_staff(self):
+        self.assertBudget('get', reverse('metrics'), queries=0, ms=20, status=403)
+
+    @mock.patch.dict(metrics.METRICS, {'TOKEN': 'scrape-secret'})
+    def test_metrics_token(self):
+        self.client.force_authenticate(None)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        # A non-ASCII token (WSGI headers arrive decoded as latin-1) is rejected, not a server error
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer caf\xe9')
+        self.assertEqual(response.status_code, 403)
+
+
+@skipUnless(connection.vendor == 'sqlite' and db.SQLITE_PRAGMAS, 'SQLite tuning profile is off')
+class TestCacheIsolationTests(TestCase):
+
+    def test_module_caches_are_process_local(self):
+        # Clearing them in tests must never reach a running instance's file or Redis cache
+        self.assertIsInstance(caches['default'], LocMemCache)
+        self.assertIs(dashboard_cache.backend.cache, caches['default'])
+        self.assertIs(authentication.user_cache.cache, caches['default'])
+
+
+class DatabaseTuningTests(TestCase):
+
+    def test_pragmas_applied_on_connect(self):
+        values = db.sqlite_pragmas(connection)
+        self.assertEqual(values['busy_timeout'], db.SQLITE_PRAGMAS['busy_timeout'])
+        self.assertEqual(values['synchronous'], 1)  # NORMAL
+
+
+class GenerateDataTests(TestCase):
+
+    def test_keeps_existing_statistics_and_generated_timestamps(self):
+        until = date(2025, 6, 30)
+        Statistics.objects.create(record_date=until, revenue=Decimal('123.45'))
+        call_command('generate_data', users=2, tasks='5:fixed', notifications='5:fixed', activities='0',
+                     years=0.1, until=until.isoformat(), verbosity=0, stdout=StringIO())
+
+        self.assertEqual(Statistics.objects.get(record_date=until).revenue, Decimal('123.45'))
+        self.assertEqual(Statistics.objects.count(), round(0.1 * 365))
+        # Generated times count back from `until`, not from the clock, on every backend
+        limit = timezone.make_aware(datetime.combine(until + timedelta(days=1), time.min))
+        self.assertEqual(Task.objects.count(), 10)
+        self.assertFalse(Task.objects.filter(created_at__gt=limit).exists())
+        self.assertFalse(Task.objects.filter(updated_at__gt=limit).exists())
+        self.assertEqual(Notification.objects.count(), 10)
+        self.assertFalse(Notification.objects.filter(created_at__gt=limit).exists())
+        self.assertGreater(len(set(Task.objects.values_list('created_at', flat=True))), 1)
+
+
+@skipUnless(renderers.orjson, 'orjson is not installed')
+class BenchRenderingTests(TestCase):
+
+    def test_rolled_back_statistics_are_not_left_in_the_dashboard_cache(self):
+        # No statistics: the command seeds its own inside the rolled-back transaction
+        call_command('bench_rendering', rows=3, requests=1, stdout=StringIO())
+        self.assertFalse(Statistics.objects.exists())
+        self.assertEqual(get_dashboard()['total_revenue'], sample_statistics().revenue)
@@ -0,0 +1,35 @@
+from django.urls import reverse
+
+from api.models import Notification
+from .base import BudgetTestCase
+
+
+class NotificationBudgetTests(BudgetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.notification = Notification.objects.filter(user=self.user, is_read=False).first()
+
+    def test_list(self):
+        self.assertBudget('get', reverse('notification-list'), queries=2, ms=60)
+
+    def test_retrieve(self):
+        self.assertBudget('get', reverse('notification-detail', args=[self.notification.pk]), queries=1, ms=20)
+
+    def test_create(self):
+        self.assertBudget('post', reverse('notification-list'), queries=3, ms=50, status=201,
+                          data={'title': 'إشعار جديد', 'type': 'info'})
+
+    def test_destroy(self):
+        self.assertBudget('delete', reverse('notification-detail', args=[self.notification.pk]),
+                          queries=4, ms=50, status=204)
+
+    def test_mark_read(self):
+        self.assertBudget('patch', reverse('notification-mark-read', args=[self.notification.pk]),
+                          queries=4, ms=50)
+
+    def test_mark_all_read(self):
+        self.assertBudget('patch', reverse('notification-mark-all-read'), queries=4, ms=100)
+
+    def test_unread_count(self):
+        self.assertBudget('get', reverse('notification-unread-count'), queries=1, ms=20)
@@ -0,0 +1,113 @@
+import datetime
+import gzip
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock, skipIf, skipUnless
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from api import compression, renderers
+
+PAYLOAD = {
+    'revenue': Decimal('156420.50'),
+    'conversion_rate': Decimal('24.80'),
+    'created_at': datetime.datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+    'local': datetime.datetime(2026, 1, 2, 6, 4, 5, tzinfo=datetime.timezone(datetime.timedelta(hours=3))),
+    'due_date': datetime.date(2026, 1, 31),
+    'title': 'مهمة جديدة',
+    'label': gettext_lazy('Invalid page.'),
+    'counts': {1: 2},
+    'items': ({'id': 1, 'ok': True, 'none': None, 'ratio': 0.1},),
+}
+
+
+@skipIf(renderers.orjson is None, 'orjson is not installed')
+class JSONBackendTests(SimpleTestCase):
+
+    def test_same_bytes_as_drf_renderer(self):
+        self.assertEqual(renderers.FastJSONRenderer().render(PAYLOAD), JSONRenderer().render(PAYLOAD))
+
+    def test_decimal_is_a_number(self):
+        self.assertEqual(renderers.dumps({'revenue': Decimal('156420.50')}), b'{"revenue":156420.5}')
+
+    def test_stdlib_backend(self):
+        with mock.patch.dict(renderers.JSON, {'BACKEND': 'stdlib'}), \
+                mock.patch.object(renderers.orjson, 'dumps', side_effect=AssertionError):
+            self.assertEqual(renderers.dumps(PAYLOAD), JSONRenderer().render(PAYLOAD))
+
+    def test_parser(self):
+        parser = renderers.FastJSONParser()
+        self.assertEqual(parser.parse(BytesIO('{"title": "مهمة", "n": 1.5}'.encode())),
+                         {'title': 'مهمة', 'n': 1.5})
+        with self.assertRaises(ParseError):
+            parser.parse(BytesIO(b'{"title": '))
+
+
+class CompressionTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(compression.COMPRESSION, {'MIN_SIZE': 1024, 'ENCODINGS': ('gzip',)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = RequestFactory()
+
+    def serve(self, response, accept_encoding='gzip, deflate, br'):
+        middleware = compression.CompressionMiddleware(lambda request: response)
+        return middleware(self.factory.get('/api/tasks/', HTTP_ACCEPT_ENCODING=accept_encoding))
+
+    def test_negotiate(self):
+        self.assertEqual(compression.negotiate('gzip, deflate, br'), 'gzip')
+        self.assertEqual(compression.negotiate('*'), 'gzip')
+        self.assertIsNone(compression.negotiate('gzip;q=0, deflate'))
+        self.assertIsNone(compression.negotiate(''))
+
+    def test_large_json_is_compressed(self):
+        body = renderers.dumps([{'title': f'مهمة {i}'} for i in range(200)])
+        response = self.serve(HttpResponse(body, content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), body)
+
+    def test_small_body_and_unaccepted_encoding_are_left_alone(self):
+        response = self.serve(HttpResponse(b'{"ok":true}', content_type='application/json'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response = self.serve(HttpResponse(b'x' * 4096, content_type='application/json'), 'identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_streaming_is_compressed_in_chunks(self):
+        rows = [f'{{"id":{i}}}\n'.encode() for i in range(500)]
+        response = self.serve(StreamingHttpResponse(iter(rows), content_type='application/x-ndjson'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(rows))
+
+    def test_event_stream_is_not_compressed(self):
+        response = self.serve(StreamingHttpResponse(iter([b'data: x\n\n'] * 500), content_type='text/event-stream'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def assertPadded(self, encoding):
+        """Same content, random length: the size no longer tracks how well it compressed (BREACH)"""
+        decompress = compression.brotli.decompress if encoding == 'br' else gzip.decompress
+        body = renderers.dumps([{'title': f'مهمة {i}'} for i in range(200)])
+        rows = [f'{{"id":{i}}}\n'.encode() for i in range(50)]
+        whole, streamed = [], []
+        for _ in range(20):
+            whole.append(compression.compress(encoding, body))
+            compressor = compression.StreamCompressor(encoding)
+            streamed.append(b''.join(map(compressor.compress, rows)) + compressor.finish())
+        for compressed, expected in ((whole, body), (streamed, b''.join(rows))):
+            self.assertGreater(len(set(map(len, compressed))), 1)
+            for item in compressed:
+                self.assertEqual(decompress(item), expected)
+
+    def test_gzip_length_is_padded(self):
+        self.assertPadded('gzip')
+
+    @skipUnless(compression.brotli, 'brotli is not installed')
+    def test_brotli_length_is_padded(self):
+        self.assertPadded('br')
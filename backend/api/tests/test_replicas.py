@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from api import replicas
+from api.models import Task
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    """Routing decisions only; the test database has no replica to query"""
+
+    def setUp(self):
+        patcher = mock.patch.dict(replicas.REPLICA, {'ALIAS': 'replica'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = replicas.ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def serve(self, request, view, view_func=None):
+        """Run `view` inside the middleware, returning what it returned"""
+        seen = []
+
+        def get_response(request):
+            middleware.process_view(request, view_func, (), {})
+            seen.append(view())
+            return HttpResponse()
+
+        middleware = replicas.ReplicaMiddleware(get_response)
+        middleware(request)
+        return seen[0]
+
+    def read(self):
+        return self.router.db_for_read(Task)
+
+    def test_safe_request_reads_replica(self):
+        self.assertEqual(self.serve(self.factory.get('/api/tasks/'), self.read), 'replica')
+
+    def test_unsafe_request_reads_primary(self):
+        self.assertEqual(self.serve(self.factory.post('/api/tasks/'), self.read), 'default')
+
+    def test_write_pins_request_to_primary(self):
+        def view():
+            before = self.read()
+            self.assertEqual(self.router.db_for_write(Task), 'default')
+            return before, self.read()
+
+        self.assertEqual(self.serve(self.factory.get('/api/tasks/'), view), ('replica', 'default'))
+
+    def test_view_can_opt_out(self):
+        class View:
+            replica_reads = False
+
+        def view_func(request):
+            pass
+        view_func.cls = View
+
+        self.assertEqual(self.serve(self.factory.get('/api/tasks/'), self.read, view_func), 'default')
+
+    def test_primary_reads_block(self):
+        def view():
+            with replicas.primary_reads():
+                inside = self.read()
+            return inside, self.read()
+
+        self.assertEqual(self.serve(self.factory.get('/api/tasks/'), view), ('default', 'replica'))
+
+    def test_outside_requests_use_primary(self):
+        self.assertEqual(self.read(), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'api'))
+        self.assertTrue(self.router.allow_migrate('default', 'api'))
+
+    def test_streaming_response_keeps_routing(self):
+        def chunks():
+            yield self.read()
+
+        middleware = replicas.ReplicaMiddleware(lambda request: StreamingHttpResponse(chunks()))
+        response = middleware(self.factory.get('/api/tasks/export/'))
+        self.assertEqual(b''.join(response.streaming_content), b'replica')
@@ -0,0 +1,96 @@
+from importlib import import_module
+
+from django.apps import apps
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from api import charts
+from api.cache import LRUBackend, VersionedCache
+from api.models import Statistics, StatisticsRollup
+
+from .base import BudgetTestCase, STATISTICS_DAYS
+
+
+class StatisticsBudgetTests(BudgetTestCase):
+
+    def test_list(self):
+        self.assertBudget('get', reverse('statistics-list'), queries=2, ms=100)
+
+    def test_dashboard_cold(self):
+        self.assertBudget('get', reverse('statistics-dashboard'), queries=3, ms=50, runs=1)
+
+    def test_dashboard_warm(self):
+        self.client.get(reverse('statistics-dashboard'))
+        self.assertBudget('get', reverse('statistics-dashboard'), queries=0, ms=20)
+
+    def test_chart(self):
+        for period in ('week', 'month', 'year'):
+            with self.subTest(period=period):
+                response = self.assertBudget('get', reverse('statistics-chart'), queries=1, ms=50,
+                                             data={'period': period})
+                for dataset in response.data['datasets']:
+                    self.assertTrue(all(type(value) is int for value in dataset['data']), dataset['data'])
+
+    def test_month_chart_covers_the_calendar_month(self):
+        expected = [0] * 4
+        for record_date, revenue in Statistics.objects.filter(
+                record_date__gte=self.today.replace(day=1)).values_list('record_date', 'revenue'):
+            expected[min((record_date.day - 1) // 7, 3)] += revenue
+        self.assertEqual(charts.chart_data('month', self.today)['revenue'], [int(round(v)) for v in expected])
+
+    def test_backfill_migration_matches_refresh(self):
+        # The migration has its own copy of the bucketing; both must agree
+        backfill = import_module('api.migrations.0009_backfill_statistics_rollups').backfill_rollups
+        fields = ('period', 'period_start', 'revenue', 'expenses', 'days')
+        rollups = list(StatisticsRollup.objects.order_by('period', 'period_start').values_list(*fields))
+        StatisticsRollup.objects.all().delete()
+        backfill(apps, None)
+        self.assertEqual(list(StatisticsRollup.objects.order_by('period', 'period_start').values_list(*fields)),
+                         rollups)
+
+    def test_rollup_command_rejects_bad_dates(self):
+        for value in ('2024-13-01', 'yesterday'):
+            with self.subTest(value=value), self.assertRaisesMessage(CommandError, 'invalid date'):
+                call_command('rollup_statistics', '--from', value)
+
+    def test_cache_stats(self):
+        self.client.force_authenticate(self.admin)
+        self.assertBudget('get', reverse('statistics-cache-stats'), queries=0, ms=20)
+
+    def test_export(self):
+        response = self.assertBudget('get', reverse('statistics-export'), queries=1, ms=150)
+        self.assertEqual(b''.join(response.streaming_content).count(b'\n'), STATISTICS_DAYS + 1)
+
+    def test_import(self):
+        self.client.force_authenticate(self.admin)
+        lines = ['record_date,revenue,expenses']
+        lines += [f'2010-01-{day:02d},{day * 100},{day * 10}' for day in range(1, 29)]
+        upload = SimpleUploadedFile('statistics.csv', '\n'.join(lines).encode(), content_type='text/csv')
+        response = self.assertBudget('post', reverse('statistics-import-rows'), queries=8, ms=200,
+                                     data={'file': upload}, format='multipart')
+        self.assertEqual(response.data['upserted'], 28)
+
+
+class VersionedCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = VersionedCache('test', LRUBackend(), timeout=60, lock_timeout=0.05)
+
+    def test_bump_invalidates(self):
+        self.assertEqual(self.cache.get_or_build('key', lambda: 1), 1)
+        self.assertEqual(self.cache.get_or_build('key', lambda: 2), 1)
+        self.cache.bump()
+        self.assertEqual(self.cache.get_or_build('key', lambda: 2), 2)
+
+    def test_foreign_lock_is_not_released(self):
+        lock_key = f'test:v{self.cache.version()}:key:lock'
+        self.cache.backend.add(lock_key, 'other-worker', 60)
+        # The other worker never finishes: build after the wait, leave its lock alone
+        self.assertEqual(self.cache.get_or_build('key', lambda: 3), 3)
+        self.assertEqual(self.cache.backend.get(lock_key), 'other-worker')
+
+    def test_own_lock_is_released(self):
+        self.cache.get_or_build('key', lambda: 4)
+        self.assertIsNone(self.cache.backend.get(f'test:v{self.cache.version()}:key:lock'))
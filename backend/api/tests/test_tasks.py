@@ -0,0 +1,167 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+
+from api import exports
+from api.authentication import tokens_for_user
+from api.models import Task
+from .base import BudgetTestCase, ROWS
+
+
+class TaskBudgetTests(BudgetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.task_ids = list(Task.objects.filter(user=self.user).order_by('id').values_list('id', flat=True))
+
+    def test_list(self):
+        self.assertBudget('get', reverse('task-list'), queries=2, ms=60)
+
+    def test_list_cursor(self):
+        first = self.client.get(reverse('task-list'), {'pagination': 'cursor'}).data
+        self.assertBudget('get', first['next'], queries=1, ms=60)
+
+    def test_retrieve(self):
+        self.assertBudget('get', reverse('task-detail', args=[self.task_ids[0]]), queries=1, ms=20)
+
+    def test_create(self):
+        self.assertBudget('post', reverse('task-list'), queries=4, ms=50, status=201,
+                          data={'title': 'مهمة جديدة', 'priority': 'high'})
+
+    def test_update(self):
+        self.assertBudget('patch', reverse('task-detail', args=[self.task_ids[0]]), queries=4, ms=50,
+                          data={'title': 'عنوان معدل'})
+
+    def test_destroy(self):
+        self.assertBudget('delete', reverse('task-detail', args=[self.task_ids[0]]), queries=5, ms=50, status=204)
+
+    def test_toggle(self):
+        self.assertBudget('patch', reverse('task-toggle', args=[self.task_ids[0]]), queries=4, ms=50)
+
+    def test_progress(self):
+        self.assertBudget('get', reverse('task-progress'), queries=1, ms=20)
+
+    def test_export(self):
+        response = self.assertBudget('get', reverse('task-export'), queries=1, ms=100 + ROWS // 20)
+        self.assertEqual(b''.join(response.streaming_content).count(b'\n'), ROWS + 1)
+
+    def test_export_escapes_formulas(self):
+        Task.objects.filter(user=self.user).delete()
+        Task.objects.create(user=self.user, title='=HYPERLINK("http://example.com")')
+        Task.objects.create(user=self.user, title='-2+3')
+        Task.objects.create(user=self.user, title='@SUM(A1)')
+        body = b''.join(self.client.get(reverse('task-export')).streaming_content).decode()
+        self.assertIn('"\'=HYPERLINK(""http://example.com"")"', body)
+        self.assertIn("'-2+3", body)
+        self.assertIn("'@SUM(A1)", body)
+        ndjson = b''.join(self.client.get(reverse('task-export'), {'fmt': 'ndjson'}).streaming_content)
+        self.assertIn(b'"title":"-2+3"', ndjson)
+
+    def test_export_streams_under_asgi(self):
+        # Django drains sync iterators with list() under ASGI; the first piece must
+        # go out while the rows are still being read
+        stream_rows, progress = exports.stream_rows, []
+
+        def tracked(*args, **kwargs):
+            for part in stream_rows(*args, **kwargs):
+                progress.append('part')
+                yield part
+            progress.append('exhausted')
+
+        headers = {'authorization': f'Bearer {tokens_for_user(self.user).access_token}'}
+
+        async def first_parts():
+            response = await AsyncClient().get(reverse('task-export'), {'fmt': 'ndjson'}, headers=headers)
+            self.assertTrue(response.is_async)
+            received = []
+            async for part in response:
+                received.append((part, list(progress)))
+            return received
+
+        with mock.patch.object(exports, 'stream_rows', tracked), mock.patch.object(exports, 'ROWS_PER_WRITE', 50):
+            received = async_to_sync(first_parts)()
+        self.assertGreater(len(received), 1)
+        self.assertNotIn('exhausted', received[0][1])
+        self.assertEqual(b''.join(part for part, _ in received).count(b'\n'), ROWS)
+
+    # Bulk endpoints: the query count must not grow with the number of items
+
+    def test_bulk_create(self):
+        tasks = [{'title': f'مهمة {i}', 'priority': 'low'} for i in range(100)]
+        self.assertBudget('post', reverse('task-bulk-create'), queries=4, ms=300, status=201,
+                          data={'tasks': tasks}, format='json')
+
+    def test_bulk_update(self):
+        tasks = [{'id': pk, 'priority': 'high'} for pk in self.task_ids[:100]]
+        self.assertBudget('patch', reverse('task-bulk-update'), queries=5, ms=300,
+                          data={'tasks': tasks}, format='json')
+
+    def test_bulk_toggle(self):
+        self.assertBudget('patch', reverse('task-bulk-toggle'), queries=5, ms=150,
+                          data={'ids': self.task_ids[:100]}, format='json')
+
+    def test_bulk_delete(self):
+        self.assertBudget('post', reverse('task-bulk-delete'), queries=5, ms=150,
+                          data={'ids': self.task_ids[:100]}, format='json')
+
+
+class TaskBehaviourTests(BudgetTestCase):
+    """What the optimized list and bulk paths return, not how fast"""
+
+    def test_cursor_walks_tied_timestamps_once(self):
+        # seed() gives every task the same created_at: the id must break the ties
+        self.assertEqual(Task.objects.filter(user=self.user).values('created_at').distinct().count(), 1)
+        seen, page = [], self.client.get(reverse('task-list'), {'pagination': 'cursor'}).data
+        while True:
+            seen += [task['id'] for task in page['results']]
+            if not page['next']:
+                break
+            page = self.client.get(page['next']).data
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(sorted(seen), sorted(Task.objects.filter(user=self.user).values_list('id', flat=True)))
+
+    def test_bulk_update_reports_each_item(self):
+        own = Task.objects.filter(user=self.user).order_by('id')[:2]
+        foreign = Task.objects.exclude(user=self.user).first()
+        response = self.client.patch(reverse('task-bulk-update'), {'tasks': [
+            {'id': own[0].pk, 'title': 'معدل'},
+            {'id': own[1].pk, 'priority': 'urgent'},
+            {'id': foreign.pk, 'title': 'ليست لي'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status'] for result in response.data['results']], ['updated', 'error', 'error'])
+        self.assertEqual((response.data['succeeded'], response.data['failed']), (1, 2))
+        self.assertEqual(Task.objects.get(pk=own[0].pk).title, 'معدل')
+        self.assertNotEqual(Task.objects.get(pk=own[1].pk).priority, 'urgent')
+        self.assertNotEqual(Task.objects.get(pk=foreign.pk).title, 'ليست لي')
+
+    def test_bulk_toggle_flips_duplicates_once(self):
+        task = Task.objects.filter(user=self.user).first()
+        response = self.client.patch(reverse('task-bulk-toggle'), {'ids': [task.pk, task.pk]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        task.refresh_from_db()
+        self.assertEqual([result['completed'] for result in response.data['results']], [task.completed] * 2)
+
+        response = self.client.patch(reverse('task-bulk-toggle'), {'ids': [task.pk], 'completed': 'yes'},
+                                     format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_delete_only_own_tasks(self):
+        own = Task.objects.filter(user=self.user).first()
+        foreign = Task.objects.exclude(user=self.user).first()
+        response = self.client.post(reverse('task-bulk-delete'), {'ids': [own.pk, foreign.pk, 0]}, format='json')
+        self.assertEqual([result['status'] for result in response.data['results']], ['deleted', 'error', 'error'])
+        self.assertFalse(Task.objects.filter(pk=own.pk).exists())
+        self.assertTrue(Task.objects.filter(pk=foreign.pk).exists())
+
+    def test_bulk_rejects_bad_payloads(self):
+        before = Task.objects.count()
+        response = self.client.post(reverse('task-bulk-delete'), {'ids': ['1']}, format='json')
+        self.assertEqual(response.status_code, 400)
+        # Nothing valid at all is a 400 with the per-item errors
+        response = self.client.post(reverse('task-bulk-create'), {'tasks': [{'priority': 'low'}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['results'][0]['status'], 'error')
+        self.assertEqual(Task.objects.count(), before)
@@ -1,7 +1,7 @@
 # API URL Configuration
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import views, stream, async_views
 
 # Create router and register viewsets
 router = DefaultRouter()
@@ -9,6 +9,7 @@ router.register(r'tasks', views.TaskViewSet, basename='task')
 router.register(r'notifications', views.NotificationViewSet, basename='notification')
 router.register(r'activities', views.ActivityViewSet, basename='activity')
 router.register(r'statistics', views.StatisticsViewSet, basename='statistics')
+router.register(r'broadcasts', views.BroadcastViewSet, basename='broadcast')
 
 urlpatterns = [
     # Authentication endpoints
@@ -17,6 +18,26 @@ urlpatterns = [
     path('auth/logout/', views.LogoutView.as_view(), name='logout'),
     path('auth/me/', views.CurrentUserView.as_view(), name='current-user'),
     
+    # Initial dashboard load in one request
+    path('bootstrap/', views.BootstrapView.as_view(), name='bootstrap'),
+    
+    # Live updates (Server-Sent Events, needs an ASGI server)
+    path('events/ticket/', stream.stream_ticket, name='event-ticket'),
+    path('events/stream/', stream.event_stream, name='event-stream'),
+    
+    # Native async read endpoints (same responses as their DRF counterparts)
+    path('async/auth/login/', async_views.login, name='async-login'),
+    path('async/tasks/', async_views.task_list, name='async-task-list'),
+    path('async/tasks/progress/', async_views.task_progress, name='async-task-progress'),
+    path('async/notifications/', async_views.notification_list, name='async-notification-list'),
+    path('async/notifications/unread_count/', async_views.notification_unread_count,
+         name='async-notification-unread-count'),
+    path('async/activities/', async_views.activity_list, name='async-activity-list'),
+    path('async/statistics/dashboard/', async_views.dashboard, name='async-dashboard'),
+    
+    # Prometheus scrape target (staff users or the METRICS_TOKEN bearer token)
+    path('metrics', views.MetricsView.as_view(), name='metrics'),
+    
     # Seed data (development only)
     path('seed/', views.seed_data, name='seed-data'),
     
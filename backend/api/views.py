@@ -1,20 +1,34 @@
 # API Views for Smart Dashboard
-from rest_framework import viewsets, status, permissions
+from rest_framework import viewsets, mixins, status, permissions
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
-from django.db.models import Sum, Count
+from rest_framework.reverse import reverse
+from rest_framework.utils.urls import replace_query_param
+from django.db import transaction
+from django.http import HttpResponse
+from django.db.models import Sum, Count, Case, When, Value
 from django.utils import timezone
 from datetime import timedelta
-import random
 
-from .models import User, Task, Notification, Activity, Statistics
+from .models import User, Task, Notification, Activity, Statistics, Broadcast
 from .serializers import (
     UserSerializer, UserRegistrationSerializer, LoginSerializer,
     TaskSerializer, NotificationSerializer, ActivitySerializer,
-    StatisticsSerializer, DashboardStatsSerializer
+    StatisticsSerializer, DashboardStatsSerializer, BroadcastSerializer
 )
+from .authentication import tokens_for_user
+from .login import login
+from .revocation import RefreshToken
+from .exports import ExportMixin
+from .pagination import TimelinePagination, ActivityPagination, keyset_page
+from .fast_serializers import (
+    FastListMixin, FastTaskSerializer, FastNotificationSerializer, FastActivitySerializer
+)
+from .activity_log import log_activity, log_activities, build_activity
+from . import archive, broadcasts, counters, charts, events, importer, metrics
+from .cache import dashboard_cache
+from .dashboard import get_dashboard
 
 
 # ===========================
@@ -29,7 +43,7 @@ class RegisterView(APIView):
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = tokens_for_user(user)
             
             # Create welcome notification
             Notification.objects.create(
@@ -38,9 +52,10 @@ class RegisterView(APIView):
                 description='تم إنشاء حسابك بنجاح. استمتع باستخدام لوحة التحكم.',
                 type='success'
             )
+            counters.adjust(user.id, notifications_unread=1)
             
             # Log activity
-            Activity.objects.create(
+            log_activity(
                 user=user,
                 type='success',
                 icon='user',
@@ -63,28 +78,8 @@ class LoginView(APIView):
     permission_classes = [permissions.AllowAny]
     
     def post(self, request):
-        serializer = LoginSerializer(data=request.data)
-        if serializer.is_valid():
-            user = serializer.validated_data['user']
-            refresh = RefreshToken.for_user(user)
-            
-            # Log activity
-            Activity.objects.create(
-                user=user,
-                type='info',
-                icon='user',
-                title='تسجيل دخول ناجح'
-            )
-            
-            return Response({
-                'message': 'تم تسجيل الدخول بنجاح',
-                'user': UserSerializer(user).data,
-                'tokens': {
-                    'refresh': str(refresh),
-                    'access': str(refresh.access_token),
-                }
-            })
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        status_code, body = login(request.data)
+        return Response(body, status=status_code)
 
 
 class LogoutView(APIView):
@@ -114,19 +109,24 @@ class CurrentUserView(APIView):
 # Task Views
 # ===========================
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(FastListMixin, ExportMixin, viewsets.ModelViewSet):
     """ViewSet for Task CRUD operations"""
     serializer_class = TaskSerializer
+    fast_serializer_class = FastTaskSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TimelinePagination
+    export_columns = ('id', 'title', 'priority', 'due_date', 'completed', 'created_at', 'updated_at')
+    export_name = 'tasks'
     
     def get_queryset(self):
         return Task.objects.filter(user=self.request.user)
     
     def perform_create(self, serializer):
         task = serializer.save(user=self.request.user)
+        counters.adjust(task.user_id, tasks_total=1, tasks_completed=int(task.completed))
         
         # Log activity
-        Activity.objects.create(
+        log_activity(
             user=self.request.user,
             type='info',
             icon='check',
@@ -134,10 +134,12 @@ class TaskViewSet(viewsets.ModelViewSet):
         )
     
     def perform_update(self, serializer):
+        was_completed = serializer.instance.completed
         task = serializer.save()
+        counters.adjust(task.user_id, tasks_completed=int(task.completed) - int(was_completed))
         
         # Log activity
-        Activity.objects.create(
+        log_activity(
             user=self.request.user,
             type='success',
             icon='check',
@@ -147,9 +149,10 @@ class TaskViewSet(viewsets.ModelViewSet):
     def perform_destroy(self, instance):
         title = instance.title
         instance.delete()
+        counters.adjust(self.request.user.id, tasks_total=-1, tasks_completed=-int(instance.completed))
         
         # Log activity
-        Activity.objects.create(
+        log_activity(
             user=self.request.user,
             type='warning',
             icon='x',
@@ -162,10 +165,11 @@ class TaskViewSet(viewsets.ModelViewSet):
         task = self.get_object()
         task.completed = not task.completed
         task.save()
+        counters.adjust(task.user_id, tasks_completed=1 if task.completed else -1)
         
         # Log activity
         status_text = 'إكمال' if task.completed else 'إلغاء إكمال'
-        Activity.objects.create(
+        log_activity(
             user=request.user,
             type='success' if task.completed else 'info',
             icon='check',
@@ -177,48 +181,235 @@ class TaskViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def progress(self, request):
         """Get task completion progress"""
-        queryset = self.get_queryset()
-        total = queryset.count()
-        completed = queryset.filter(completed=True).count()
-        percentage = round((completed / total) * 100) if total > 0 else 0
-        
+        return Response(counters.progress(counters.get_counters(request.user.id)))
+    
+    # Bulk operations: one transaction, one write statement and one Activity batch per request
+    
+    BULK_MAX_ITEMS = 500
+    
+    def _bulk_payload(self, request, key):
+        """Return the list under `key` (or the body itself), or an error Response"""
+        items = request.data.get(key) if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return None, Response({key: ['يجب إرسال قائمة غير فارغة']}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.BULK_MAX_ITEMS:
+            return None, Response({key: [f'الحد الأقصى {self.BULK_MAX_ITEMS} عنصر في الطلب الواحد']},
+                                  status=status.HTTP_400_BAD_REQUEST)
+        return items, None
+    
+    def _bulk_ids(self, request):
+        items, error = self._bulk_payload(request, 'ids')
+        if error is None and not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in items):
+            error = Response({'ids': ['يجب أن تكون المعرفات أرقاماً صحيحة']}, status=status.HTTP_400_BAD_REQUEST)
+        return items, error
+    
+    def _bulk_response(self, results, success_status=status.HTTP_200_OK):
+        failed = sum(1 for result in results if result['status'] == 'error')
+        succeeded = len(results) - failed
         return Response({
-            'total': total,
-            'completed': completed,
-            'percentage': percentage
-        })
+            'succeeded': succeeded,
+            'failed': failed,
+            'results': results,
+        }, status=success_status if succeeded or not failed else status.HTTP_400_BAD_REQUEST)
+    
+    def _not_found(self, index, pk):
+        return {'index': index, 'id': pk, 'status': 'error', 'errors': {'id': ['المهمة غير موجودة']}}
+    
+    @action(detail=False, methods=['post'])
+    def bulk_create(self, request):
+        """Create many tasks with a single INSERT"""
+        items, error = self._bulk_payload(request, 'tasks')
+        if error:
+            return error
+        
+        results, tasks = [], []
+        for index, item in enumerate(items):
+            serializer = TaskSerializer(data=item)
+            if serializer.is_valid():
+                tasks.append(Task(user=request.user, **serializer.validated_data))
+                results.append({'index': index, 'status': 'created'})
+            else:
+                results.append({'index': index, 'status': 'error', 'errors': serializer.errors})
+        
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks)
+            counters.adjust(request.user.id, tasks_total=len(tasks),
+                            tasks_completed=sum(task.completed for task in tasks))
+            log_activities(
+                build_activity(request.user, 'info', 'check', f'تم إنشاء مهمة: {task.title}') for task in tasks)
+        
+        created = iter(tasks)
+        for result in results:
+            if result['status'] == 'created':
+                task = next(created)
+                result['id'] = task.pk
+                result['task'] = TaskSerializer(task).data
+        return self._bulk_response(results, status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['patch'])
+    def bulk_update(self, request):
+        """Partially update many tasks with a single bulk UPDATE"""
+        items, error = self._bulk_payload(request, 'tasks')
+        if error:
+            return error
+        
+        ids = [item.get('id') for item in items if isinstance(item, dict)]
+        existing = self.get_queryset().in_bulk([pk for pk in ids if isinstance(pk, int)])
+        results, changed, fields = [], [], set()
+        completed_delta = 0
+        now = timezone.now()
+        for index, item in enumerate(items):
+            pk = item.get('id') if isinstance(item, dict) else None
+            task = existing.get(pk) if isinstance(pk, int) else None
+            if task is None:
+                results.append(self._not_found(index, pk))
+                continue
+            serializer = TaskSerializer(task, data=item, partial=True)
+            if not serializer.is_valid():
+                results.append({'index': index, 'id': pk, 'status': 'error', 'errors': serializer.errors})
+                continue
+            was_completed = task.completed
+            for field, value in serializer.validated_data.items():
+                setattr(task, field, value)
+                fields.add(field)
+            task.updated_at = now
+            completed_delta += int(task.completed) - int(was_completed)
+            if task not in changed:
+                changed.append(task)
+            results.append({'index': index, 'id': pk, 'status': 'updated', 'task': task})
+        
+        with transaction.atomic():
+            if changed:
+                Task.objects.bulk_update(changed, sorted(fields | {'updated_at'}))
+            counters.adjust(request.user.id, tasks_completed=completed_delta)
+            log_activities(
+                build_activity(request.user, 'success', 'check', f'تم تحديث مهمة: {task.title}') for task in changed)
+        
+        for result in results:
+            if 'task' in result:
+                result['task'] = TaskSerializer(result['task']).data
+        return self._bulk_response(results)
+    
+    @action(detail=False, methods=['patch'])
+    def bulk_toggle(self, request):
+        """
+        Flip completion of many tasks with one UPDATE ... WHERE id IN.
+        
+        Pass `completed` to set every task to that value instead of flipping.
+        """
+        ids, error = self._bulk_ids(request)
+        if error:
+            return error
+        target = request.data.get('completed') if isinstance(request.data, dict) else None
+        if target is not None and not isinstance(target, bool):
+            return Response({'completed': ['يجب أن تكون القيمة true أو false']}, status=status.HTTP_400_BAD_REQUEST)
+        
+        existing = {row['id']: row for row in self.get_queryset().filter(id__in=ids).values('id', 'title', 'completed')}
+        if target is None:
+            new_value = Case(When(completed=True, then=Value(False)), default=Value(True))
+        else:
+            new_value = Value(target)
+        
+        with transaction.atomic():
+            if existing:
+                self.get_queryset().filter(id__in=list(existing)).update(completed=new_value, updated_at=timezone.now())
+            
+            results, activities, seen = [], [], set()
+            completed_delta = 0
+            for index, pk in enumerate(ids):
+                row = existing.get(pk)
+                if row is None:
+                    results.append(self._not_found(index, pk))
+                    continue
+                completed = (not row['completed']) if target is None else target
+                results.append({'index': index, 'id': pk, 'status': 'updated', 'completed': completed})
+                if completed == row['completed'] or pk in seen:
+                    continue
+                seen.add(pk)
+                completed_delta += 1 if completed else -1
+                status_text = 'إكمال' if completed else 'إلغاء إكمال'
+                activities.append(build_activity(
+                    request.user, 'success' if completed else 'info', 'check', f'تم {status_text} مهمة: {row["title"]}'))
+            counters.adjust(request.user.id, tasks_completed=completed_delta)
+            log_activities(activities)
+        
+        return self._bulk_response(results)
+    
+    @action(detail=False, methods=['post'])
+    def bulk_delete(self, request):
+        """Delete many tasks with one DELETE ... WHERE id IN"""
+        ids, error = self._bulk_ids(request)
+        if error:
+            return error
+        
+        existing = {row['id']: row for row in self.get_queryset().filter(id__in=ids).values('id', 'title', 'completed')}
+        with transaction.atomic():
+            if existing:
+                self.get_queryset().filter(id__in=list(existing)).delete()
+            counters.adjust(request.user.id, tasks_total=-len(existing),
+                            tasks_completed=-sum(row['completed'] for row in existing.values()))
+            log_activities(
+                build_activity(request.user, 'warning', 'x', f'تم حذف مهمة: {row["title"]}')
+                for row in existing.values())
+        
+        results = []
+        for index, pk in enumerate(ids):
+            if pk in existing:
+                results.append({'index': index, 'id': pk, 'status': 'deleted'})
+            else:
+                results.append(self._not_found(index, pk))
+        return self._bulk_response(results)
 
 
 # ===========================
 # Notification Views
 # ===========================
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(FastListMixin, viewsets.ModelViewSet):
     """ViewSet for Notification operations"""
     serializer_class = NotificationSerializer
+    fast_serializer_class = FastNotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TimelinePagination
     
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
     
+    def perform_create(self, serializer):
+        notification = serializer.save(user=self.request.user)
+        counters.adjust(notification.user_id, notifications_unread=int(not notification.is_read))
+        events.publish(notification.user_id, 'notification', NotificationSerializer(notification).data)
+    
+    def perform_update(self, serializer):
+        was_read = serializer.instance.is_read
+        notification = serializer.save()
+        counters.adjust(notification.user_id, notifications_unread=int(was_read) - int(notification.is_read))
+    
+    def perform_destroy(self, instance):
+        instance.delete()
+        counters.adjust(self.request.user.id, notifications_unread=-int(not instance.is_read))
+    
     @action(detail=True, methods=['patch'])
     def mark_read(self, request, pk=None):
         """Mark notification as read"""
         notification = self.get_object()
-        notification.is_read = True
-        notification.save()
+        if not notification.is_read:
+            notification.is_read = True
+            notification.save()
+            counters.adjust(notification.user_id, notifications_unread=-1)
         return Response(NotificationSerializer(notification).data)
     
     @action(detail=False, methods=['patch'])
     def mark_all_read(self, request):
         """Mark all notifications as read"""
-        self.get_queryset().update(is_read=True)
+        self.get_queryset().filter(is_read=False).update(is_read=True)
+        counters.reset(request.user.id, notifications_unread=0)
         return Response({'message': 'تم تحديث جميع الإشعارات'})
     
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
         """Get count of unread notifications"""
-        count = self.get_queryset().filter(is_read=False).count()
+        count = counters.get_counters(request.user.id).notifications_unread
         return Response({'unread_count': count})
 
 
@@ -226,97 +417,190 @@ class NotificationViewSet(viewsets.ModelViewSet):
 # Activity Views
 # ===========================
 
-class ActivityViewSet(viewsets.ReadOnlyModelViewSet):
+class ActivityViewSet(FastListMixin, ExportMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for Activity (read-only)"""
     serializer_class = ActivitySerializer
+    fast_serializer_class = FastActivitySerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ActivityPagination
+    export_columns = ('id', 'type', 'icon', 'title', 'created_at')
+    export_name = 'activities'
     
     def get_queryset(self):
-        return Activity.objects.filter(user=self.request.user)[:10]
+        return Activity.objects.filter(user=self.request.user)
+    
+    @action(detail=False, methods=['get'])
+    def archive(self, request):
+        """Archived history: ?month=YYYY-MM (&limit=N), or the list of archived months"""
+        month = request.query_params.get('month')
+        if not month:
+            return Response({'months': archive.archived_months()})
+        if not archive.MONTH_RE.match(month):
+            return Response({'month': ['صيغة الشهر غير صحيحة (YYYY-MM)']}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', 0))
+        except ValueError:
+            limit = 0
+        rows, total = archive.read_archive(request.user.id, month, limit=max(limit, 0))
+        return Response({
+            'month': month,
+            'count': total,
+            'results': FastActivitySerializer().serialize(rows),
+        })
+
+
+# ===========================
+# Broadcast Views
+# ===========================
+
+class BroadcastViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """Send a notification to every active user (admins only)"""
+    serializer_class = BroadcastSerializer
+    permission_classes = [permissions.IsAdminUser]
+    queryset = Broadcast.objects.all()
+    
+    def perform_create(self, serializer):
+        broadcast = serializer.save(created_by=self.request.user,
+                                    total_recipients=broadcasts.recipients().count())
+        broadcasts.dispatch(broadcast)
+    
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        # With BROADCASTS['MODE'] 'command' (or 'thread') the fan-out continues elsewhere; poll for progress
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
+    
+    @action(detail=True, methods=['post'])
+    def resume(self, request, pk=None):
+        """Continue an interrupted broadcast"""
+        broadcast = self.get_object()
+        if broadcast.status != 'completed':
+            broadcasts.dispatch(broadcast)
+        return Response(BroadcastSerializer(broadcast).data, status=status.HTTP_202_ACCEPTED)
 
 
 # ===========================
 # Statistics Views
 # ===========================
 
-class StatisticsViewSet(viewsets.ReadOnlyModelViewSet):
+class StatisticsViewSet(ExportMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for Statistics"""
     serializer_class = StatisticsSerializer
     permission_classes = [permissions.IsAuthenticated]
     queryset = Statistics.objects.all()
+    # Same columns import_statistics reads, so an export can be re-imported
+    export_columns = tuple(field.name for field in Statistics._meta.concrete_fields if field.name != 'id')
+    export_date_field = 'record_date'
+    export_ordering = ('record_date',)
+    export_name = 'statistics'
     
     @action(detail=False, methods=['get'])
     def dashboard(self, request):
         """Get dashboard statistics"""
-        # Get latest statistics or create sample data
-        latest = Statistics.objects.first()
-        
-        if not latest:
-            # Create sample data if none exists
-            latest = Statistics.objects.create(
-                record_date=timezone.now().date(),
-                revenue=156420,
-                active_users=12847,
-                completed_projects=342,
-                conversion_rate=24.8,
-                products_sales=35,
-                services_sales=25,
-                subscriptions_sales=25,
-                consulting_sales=15
-            )
-        
-        total_sales = (latest.products_sales + latest.services_sales + 
-                      latest.subscriptions_sales + latest.consulting_sales)
-        
-        return Response({
-            'total_revenue': latest.revenue,
-            'active_users': latest.active_users,
-            'completed_projects': latest.completed_projects,
-            'conversion_rate': latest.conversion_rate,
-            'total_sales': 85420,
-            'sales_distribution': {
-                'products': float(latest.products_sales),
-                'services': float(latest.services_sales),
-                'subscriptions': float(latest.subscriptions_sales),
-                'consulting': float(latest.consulting_sales)
-            }
-        })
+        return Response(get_dashboard())
+    
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def cache_stats(self, request):
+        """Hit/miss counters of the dashboard cache in this process"""
+        return Response(dashboard_cache.stats())
     
     @action(detail=False, methods=['get'])
     def chart(self, request):
         """Get chart data for performance overview"""
         period = request.query_params.get('period', 'week')
+        return Response(charts.chart_payload(period))
+    
+    @action(detail=False, methods=['post'], url_path='import', permission_classes=[permissions.IsAdminUser])
+    def import_rows(self, request):
+        """Upsert daily statistics from an uploaded CSV or NDJSON file (`file`, optional ?fmt=)"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'file': ['يجب رفع ملف CSV أو NDJSON']}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = request.query_params.get('fmt') or importer.detect_format(upload.name)
+        if fmt not in importer.FORMATS:
+            return Response({'fmt': [f'الصيغ المدعومة: {", ".join(importer.FORMATS)}']},
+                            status=status.HTTP_400_BAD_REQUEST)
+        dry_run = request.query_params.get('dry_run', '').lower() in ('1', 'true', 'yes')
+        result = importer.import_statistics(upload.file, fmt, dry_run=dry_run)
+        return Response(result.as_dict())
+
+
+# ===========================
+# Bootstrap View
+# ===========================
+
+class BootstrapView(APIView):
+    """
+    Everything the dashboard needs on first load, in one request.
+
+    `?include=tasks,progress` limits the response to the named sections and
+    `?period=` picks the chart period. Progress and unread_count share one
+    counters read and lists return their first keyset page without a COUNT.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    SECTIONS = ('user', 'tasks', 'progress', 'notifications', 'unread_count',
+                'activities', 'dashboard', 'chart')
+    
+    def get(self, request):
+        include = request.query_params.get('include')
+        if include:
+            sections = [name for name in include.split(',') if name in self.SECTIONS]
+        else:
+            sections = list(self.SECTIONS)
         
-        # Generate sample data based on period
-        if period == 'week':
-            labels = ['السبت', 'الأحد', 'الاثنين', 'الثلاثاء', 'الأربعاء', 'الخميس', 'الجمعة']
-            revenue = [12000, 19000, 15000, 22000, 18000, 25000, 28000]
-            expenses = [8000, 11000, 9000, 14000, 12000, 16000, 15000]
-        elif period == 'month':
-            labels = [f'الأسبوع {i+1}' for i in range(4)]
-            revenue = [85000, 92000, 78000, 105000]
-            expenses = [55000, 62000, 48000, 70000]
-        else:  # year
-            labels = ['يناير', 'فبراير', 'مارس', 'أبريل', 'مايو', 'يونيو',
-                     'يوليو', 'أغسطس', 'سبتمبر', 'أكتوبر', 'نوفمبر', 'ديسمبر']
-            revenue = [random.randint(80000, 150000) for _ in range(12)]
-            expenses = [int(r * 0.6) for r in revenue]
+        user = request.user
+        data = {}
+        row = None
+        if 'progress' in sections or 'unread_count' in sections:
+            row = counters.get_counters(user.id)
         
-        return Response({
-            'labels': labels,
-            'datasets': [
-                {
-                    'label': 'الإيرادات',
-                    'data': revenue,
-                    'color': '#00d9ff'
-                },
-                {
-                    'label': 'المصروفات',
-                    'data': expenses,
-                    'color': '#8b5cf6'
-                }
-            ]
-        })
+        if 'user' in sections:
+            data['user'] = UserSerializer(user).data
+        if 'tasks' in sections:
+            data['tasks'] = self.first_page(
+                Task.objects.filter(user=user), TaskSerializer, 'task-list', TimelinePagination.page_size)
+        if 'progress' in sections:
+            data['progress'] = counters.progress(row)
+        if 'notifications' in sections:
+            data['notifications'] = self.first_page(
+                Notification.objects.filter(user=user), NotificationSerializer, 'notification-list',
+                TimelinePagination.page_size)
+        if 'unread_count' in sections:
+            data['unread_count'] = row.notifications_unread
+        if 'activities' in sections:
+            data['activities'] = self.first_page(
+                Activity.objects.filter(user=user), ActivitySerializer, 'activity-list',
+                ActivityPagination.page_size)
+        if 'dashboard' in sections:
+            data['dashboard'] = get_dashboard()
+        if 'chart' in sections:
+            data['chart'] = charts.chart_payload(request.query_params.get('period', 'week'))
+        
+        return Response(data)
+    
+    def first_page(self, queryset, serializer_class, url_name, page_size):
+        rows, cursor = keyset_page(queryset, None, page_size)
+        next_link = None
+        if cursor:
+            next_link = replace_query_param(reverse(url_name, request=self.request), 'cursor', cursor)
+        return {
+            'next': next_link,
+            'results': serializer_class(rows, many=True).data,
+        }
+
+
+# ===========================
+# Metrics View
+# ===========================
+
+class MetricsView(APIView):
+    """Per-route request metrics of all worker processes, in the Prometheus text format"""
+    authentication_classes = [metrics.MetricsTokenAuthentication, *APIView.authentication_classes]
+    permission_classes = [metrics.CanReadMetrics]
+    
+    def get(self, request):
+        return HttpResponse(metrics.render(*metrics.registry.collect()),
+                            content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 # ===========================
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Read by the settings for server-dependent defaults (CONN_MAX_AGE)
+os.environ.setdefault('SERVER_MODE', 'asgi')
 
 application = get_asgi_application()
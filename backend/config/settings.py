@@ -5,6 +5,7 @@ Django settings for Smart Dashboard Backend
 from pathlib import Path
 from datetime import timedelta
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -38,6 +39,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack
+    'api.metrics.MetricsMiddleware',
+    # Next, so the sizes it records are the compressed bytes sent
+    'api.compression.CompressionMiddleware',
+    'api.slow_queries.SlowQueryMiddleware',
+    'api.replicas.ReplicaMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -69,28 +76,93 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 
 # Database Configuration
-# For development, using SQLite. For production, configure MySQL below.
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE picks SQLite (development, default) or MySQL (production). The
+# tuned profile keeps connections open between requests and applies the
+# per-connection settings below; DB_TUNING=0 gives Django's defaults.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+DB_TUNING = os.environ.get('DB_TUNING', '1') == '1'
+
+if DB_ENGINE == 'mysql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.mysql',
+            'NAME': os.environ.get('DB_NAME', 'smart_dashboard'),
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '3306'),
+            'OPTIONS': {
+                'charset': 'utf8mb4',
+            }
+        }
     }
-}
+    if DB_TUNING:
+        DATABASES['default']['OPTIONS'].update({
+            # Strict mode rejects truncated data instead of warning; short lock
+            # waits turn a stuck writer into an error instead of a piled-up pool
+            'init_command': "SET sql_mode='STRICT_TRANS_TABLES', innodb_lock_wait_timeout=10",
+            # No gap locks between concurrent inserts, fresh reads in get_or_create
+            'isolation_level': 'read committed',
+            'connect_timeout': 5,
+        })
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+    if DB_TUNING:
+        # Take the write lock at BEGIN, where busy_timeout waits for it, rather
+        # than on the first write, where SQLite fails at once with "database is locked".
+        # The cost: every atomic block takes the lock, read-only ones too, so they
+        # queue behind writers. Every atomic block in this app writes; code adding
+        # read-only ones should read outside atomic() (WAL gives each query a
+        # consistent snapshot) or set SQLITE_TRANSACTION_MODE=DEFERRED.
+        # `manage.py bench_db_writes --atomic-reads` measures both modes.
+        DATABASES['default']['OPTIONS'] = {
+            'transaction_mode': os.environ.get('SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+        }
+
+# 'asgi' or 'wsgi', set by config/asgi.py and config/wsgi.py before the settings load
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+
+if DB_TUNING:
+    DATABASES['default'].update({
+        # Seconds a connection is reused. Under ASGI sync code runs on changing
+        # threads, each with its own connection, and persistent ones would pile
+        # up until they time out, so the default there is 0
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0 if SERVER_MODE == 'asgi' else 60)),
+        'CONN_HEALTH_CHECKS': True,
+    })
+
+# Read replica: GET/HEAD/OPTIONS requests read from it until they write
+# (api/replicas.py). DB_REPLICA_HOST points at a MySQL replica; locally
+# DB_REPLICA_NAME names a second SQLite file kept current by `manage.py sync_replica`.
+if os.environ.get('DB_REPLICA_NAME') or os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ.get('DB_REPLICA_NAME') or DATABASES['default']['NAME'],
+        # Tests read and write the primary only
+        'TEST': {'MIRROR': 'default'},
+    }
+    if os.environ.get('DB_REPLICA_HOST'):
+        DATABASES['replica'].update({
+            'HOST': os.environ['DB_REPLICA_HOST'],
+            'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        })
 
-# MySQL Configuration (uncomment and configure for production)
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.mysql',
-#         'NAME': 'smart_dashboard',
-#         'USER': 'your_mysql_user',
-#         'PASSWORD': 'your_mysql_password',
-#         'HOST': 'localhost',
-#         'PORT': '3306',
-#         'OPTIONS': {
-#             'charset': 'utf8mb4',
-#         }
-#     }
-# }
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+# Pragmas run on every new SQLite connection (api/db.py)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',  # readers no longer block the writer, nor it them
+    'synchronous': 'NORMAL',  # fsync at checkpoints only; safe with WAL
+    'busy_timeout': 5000,  # ms to wait for the write lock
+    'mmap_size': 268435456,  # read the first 256 MB through the page cache
+    'cache_size': -20000,  # 20 MB per connection
+    'temp_store': 'MEMORY',
+} if DB_TUNING else {}
 
 
 # Custom User Model
@@ -117,15 +189,31 @@ AUTH_PASSWORD_VALIDATORS = [
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# JSON encoding of requests and responses (api/renderers.py): 'orjson', or
+# 'stdlib' for DRF's own encoder (also used when orjson is not installed)
+JSON_BACKEND = os.environ.get('JSON_BACKEND', 'orjson')
+
+# Serve task/notification/activity lists from .values() rows (same output as the serializers)
+FAST_LIST_SERIALIZATION = os.environ.get('FAST_LIST_SERIALIZATION', '1') == '1'
+
 
 # JWT Configuration
 SIMPLE_JWT = {
@@ -134,6 +222,153 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Checks the blacklist from memory, see api/revocation.py
+    'TOKEN_REFRESH_SERIALIZER': 'api.revocation.TokenRefreshSerializer',
+}
+
+# In-process copy of the refresh-token blacklist; new entries are picked up
+# at most this often. Expired rows are removed by `manage.py prune_tokens`.
+TOKEN_BLACKLIST = {
+    'REFRESH_INTERVAL': 5,  # seconds
+}
+
+
+# Cache shared by every process (web workers and management commands), so an
+# invalidation in one reaches all of them. Files on local disk by default;
+# set CACHE_REDIS_URL when the workers run on several hosts.
+if os.environ.get('CACHE_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CACHE_REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', BASE_DIR / '.cache'),
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        }
+    }
+
+# `manage.py test` clears and fills the caches; never those of a running instance
+TESTING = sys.argv[1:2] == ['test']
+if TESTING:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
+# Resolving the user behind an access token
+# 'cached' keeps users up to TIMEOUT seconds (dropped when a user is saved or
+# deactivated with api.authentication.deactivate_users), 'stateless' builds
+# them from the token claims without touching the database, 'db' loads the
+# row on every request. 'lru' instead of 'django' keeps them per process.
+AUTH_USER_CACHE = {
+    'MODE': os.environ.get('AUTH_USER_CACHE_MODE', 'cached'),
+    'BACKEND': os.environ.get('AUTH_USER_CACHE_BACKEND', 'django'),
+    'ALIAS': 'default',
+    'MAX_ENTRIES': 10000,
+    'TIMEOUT': 60,  # seconds; bounds staleness for changes made without a signal
+}
+
+
+# Login: password hashing runs on a fixed thread pool for the async login view
+LOGIN = {
+    'HASH_WORKERS': int(os.environ.get('LOGIN_HASH_WORKERS', os.cpu_count() or 4)),
+    'MAX_PENDING': 256,  # queued logins per worker process before answering 429
+}
+
+
+# Activity logging
+# 'buffered' queues activities in process and writes them with bulk_create,
+# losing up to FLUSH_INTERVAL of rows if a worker is killed without a normal
+# exit; 'sync' writes each one inside the request (always used by the tests)
+ACTIVITY_LOG = {
+    'MODE': 'sync' if TESTING else os.environ.get('ACTIVITY_LOG_MODE', 'buffered'),
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 1.0,  # seconds
+    'MAX_QUEUE': 10000,
+}
+
+
+# Activity retention: `manage.py archive_activities` moves older rows into
+# gzip NDJSON files (one per month) readable through /api/activities/archive/
+ACTIVITY_ARCHIVE = {
+    'DIR': Path(os.environ.get('ACTIVITY_ARCHIVE_DIR', BASE_DIR / 'archive' / 'activities')),
+    'RETENTION_DAYS': int(os.environ.get('ACTIVITY_RETENTION_DAYS', 90)),
+    'BATCH_SIZE': 2000,
+}
+
+
+# Broadcast fan-out: 'sync' sends inline after the commit, 'command' leaves it
+# to `manage.py broadcast --resume` (cron or a worker; for large user bases),
+# 'thread' sends from a daemon thread of the web worker, which is lost when
+# the worker is recycled (development only)
+BROADCASTS = {
+    'MODE': os.environ.get('BROADCASTS_MODE', 'sync'),
+    'CHUNK_SIZE': 1000,  # notifications per transaction
+}
+
+
+# Dashboard statistics cache
+# 'django' uses the CACHES alias above, so entries, the version bumped by
+# imports and commands, and the rebuild lock are shared by every process;
+# 'lru' keeps all of them per process (single-process deployments only)
+DASHBOARD_CACHE = {
+    'BACKEND': os.environ.get('DASHBOARD_CACHE_BACKEND', 'django'),
+    'ALIAS': 'default',
+    'MAX_ENTRIES': 128,
+    'TIMEOUT': 300,  # seconds
+    'LOCK_TIMEOUT': 10,  # seconds a rebuild may hold the stampede lock
+}
+
+
+# Live event stream
+# 'local' delivers within one worker process; 'redis' fans out across workers
+EVENTS = {
+    'BACKEND': os.environ.get('EVENTS_BACKEND', 'local'),
+    'REDIS_URL': os.environ.get('EVENTS_REDIS_URL', 'redis://localhost:6379/0'),
+    'QUEUE_SIZE': 100,  # messages buffered per connection before a resync
+    'HEARTBEAT': 15,  # seconds between keep-alive comments
+    'TICKET_TTL': 30,  # seconds a single-use stream ticket stays valid
+}
+
+
+# Per-route request metrics served at /api/metrics (Prometheus text format)
+# With several worker processes set METRICS_DIR to a directory shared by all
+# of them (emptied on deploy); each worker writes its totals there and any
+# worker can answer a scrape. Prometheus authenticates with METRICS_TOKEN.
+METRICS = {
+    'ENABLED': os.environ.get('METRICS_ENABLED', '1') == '1',
+    'DIR': os.environ.get('METRICS_DIR') or None,
+    'TOKEN': os.environ.get('METRICS_TOKEN', ''),
+    'FLUSH_INTERVAL': 5,  # seconds between writes of a worker's totals
+}
+
+
+# Slow-query log: queries over THRESHOLD_MS are logged (logger api.slow_queries)
+# and aggregated per normalized SQL in the slow_queries table, with the
+# EXPLAIN plan of the first occurrence. `manage.py slow_queries` lists the worst.
+SLOW_QUERIES = {
+    'ENABLED': os.environ.get('SLOW_QUERIES_ENABLED', '1') == '1',
+    'THRESHOLD_MS': float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200)),
+    'EXPLAIN': True,
+    'FLUSH_INTERVAL': 5,  # seconds between writes to the table
+}
+
+
+# Response compression: brotli (when the brotli package is installed) or
+# gzip, whichever the client accepts, for JSON/text bodies of MIN_SIZE bytes or more
+COMPRESSION = {
+    'ENABLED': os.environ.get('COMPRESSION_ENABLED', '1') == '1',
+    'MIN_SIZE': int(os.environ.get('COMPRESSION_MIN_SIZE', 1024)),  # bytes
+    'ENCODINGS': ('br', 'gzip'),  # in order of preference
+    'GZIP_LEVEL': 6,  # streaming responses
+    'BROTLI_QUALITY': 4,  # about gzip's speed, smaller output
 }
 
 
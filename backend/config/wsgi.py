@@ -12,5 +12,7 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Read by the settings for server-dependent defaults (CONN_MAX_AGE)
+os.environ.setdefault('SERVER_MODE', 'wsgi')
 
 application = get_wsgi_application()